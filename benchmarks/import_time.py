@@ -0,0 +1,52 @@
+"""
+Measure the import time of postnormalism with -X importtime and fail when it exceeds a budget.
+
+    python -m benchmarks.import_time [budget_ms] [repeat]
+"""
+import subprocess
+import sys
+
+IMPORTS = {
+    'schema package': "import postnormalism.schema",
+    'Table': "from postnormalism.schema import Table",
+    'Database': "from postnormalism.schema import Database",
+}
+
+
+def import_time(code: str) -> tuple[int, list[tuple[int, str]]]:
+    """
+    The cumulative microseconds of the postnormalism imports done by code, in a fresh
+    interpreter, and the self time of each postnormalism module.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                            check=True)
+    total, modules = 0, []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit() or not name.strip().startswith('postnormalism'):
+            continue
+        modules.append((int(own), name.strip()))
+        # nested imports are indented under the module importing them
+        if len(name) - len(name.lstrip()) == 1:
+            total += int(cumulative)
+    return total, modules
+
+
+def main(budget_ms: float = 50, repeat: int = 5):
+    over = []
+    for label, code in IMPORTS.items():
+        # the fastest run is the least disturbed by the machine
+        total, modules = min((import_time(code) for _ in range(repeat)), key=lambda timing: timing[0])
+        slowest = ", ".join(f"{name} {own / 1000:.1f}ms" for own, name in sorted(modules, reverse=True)[:3])
+        print(f"{label}: {total / 1000:.1f}ms ({slowest})")
+        if total / 1000 > budget_ms:
+            over.append(label)
+    if over:
+        print(f"Over the {budget_ms}ms budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(*(float(arg) for arg in sys.argv[1:2]), *(int(arg) for arg in sys.argv[2:3]))
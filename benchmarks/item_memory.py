@@ -0,0 +1,46 @@
+"""
+Measure the memory footprint of DatabaseItems.
+
+    python -m benchmarks.item_memory [count]
+"""
+import sys
+import tracemalloc
+
+from postnormalism.schema import Function, Table, View
+
+
+def build_items(count: int) -> list:
+    items = []
+    for i in range(count // 3):
+        items.append(Table(create=f"""
+        CREATE TABLE app.table_{i} (
+            id BIGSERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            created_at TIMESTAMPTZ DEFAULT now()
+        );
+        """))
+        items.append(View(create=f"CREATE VIEW app.view_{i} AS SELECT * FROM app.table_{i};"))
+        items.append(Function(create=f"""
+        CREATE FUNCTION app.function_{i}() RETURNS INTEGER AS $$ SELECT {i} $$ LANGUAGE sql;
+        """))
+    return items
+
+
+def main(count: int = 30000):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    items = build_items(count)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    # The create strings belong to the caller, leave them out of the per item footprint
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    create_strings = sum(sys.getsizeof(item.create) for item in items)
+    per_item = (allocated - create_strings) / len(items)
+    print(f"{len(items)} items, {per_item:.0f} bytes per item excluding the create strings")
+    print(f"{type(items[0]).__name__} instance: {sys.getsizeof(items[0])} bytes, "
+          f"__dict__: {'yes' if hasattr(items[0], '__dict__') else 'no'}")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,26 @@
+import importlib
+
+# Analyses are imported on first use, most processes never run them
+_MODULES = {
+    'ColumnLayout': 'alignment', 'column_layout': 'alignment', 'column_layouts': 'alignment',
+    'Change': 'diff', 'diff_databases': 'diff', 'normalize_sql': 'diff',
+    'PlanIssue': 'plans', 'PlanReport': 'plans', 'explain_items': 'plans',
+    'UnindexedForeignKey': 'foreign_keys', 'find_unindexed_foreign_keys': 'foreign_keys',
+    'LockRisk': 'locks', 'analyze_ddl': 'locks', 'classify_statement': 'locks',
+    'FunctionAdvice': 'volatility', 'advise_functions': 'volatility',
+    'TriggerOverhead': 'triggers', 'measure_triggers': 'triggers', 'scratch_database': 'triggers',
+}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_MODULES[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
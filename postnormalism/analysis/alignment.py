@@ -0,0 +1,128 @@
+import re
+from dataclasses import dataclass
+
+
+TUPLE_HEADER = 24  # 23 byte heap tuple header, MAXALIGNed
+MAXALIGN = 8
+
+# type name: (length, alignment), a length of -1 marks variable length types
+TYPES = {
+    'boolean': (1, 1), 'bool': (1, 1), '"char"': (1, 1),
+    'smallint': (2, 2), 'int2': (2, 2), 'smallserial': (2, 2), 'serial2': (2, 2),
+    'integer': (4, 4), 'int': (4, 4), 'int4': (4, 4), 'serial': (4, 4), 'serial4': (4, 4),
+    'real': (4, 4), 'float4': (4, 4), 'date': (4, 4), 'oid': (4, 4), 'macaddr': (6, 4),
+    'bigint': (8, 8), 'int8': (8, 8), 'bigserial': (8, 8), 'serial8': (8, 8),
+    'double precision': (8, 8), 'float8': (8, 8), 'float': (8, 8), 'money': (8, 8),
+    'timestamp': (8, 8), 'timestamp without time zone': (8, 8),
+    'timestamptz': (8, 8), 'timestamp with time zone': (8, 8),
+    'time': (8, 8), 'time without time zone': (8, 8), 'timetz': (12, 8), 'time with time zone': (12, 8),
+    'interval': (16, 8), 'uuid': (16, 1), 'point': (16, 8),
+}
+
+TYPE_END = re.compile(
+    r'\s+(?:NOT\b|NULL\b|DEFAULT\b|PRIMARY\b|REFERENCES\b|UNIQUE\b|CHECK\b|CONSTRAINT\b|COLLATE\b|GENERATED\b)',
+    re.IGNORECASE
+)
+
+
+def column_type(definition: str) -> str:
+    """
+    The normalized type of a column definition, without type modifiers.
+    """
+    declared = TYPE_END.split(definition.split(None, 1)[1] if ' ' in definition.strip() else '', maxsplit=1)[0]
+    declared = re.sub(r'\([^)]*\)', '', declared).strip().lower()
+    return re.sub(r'\s+', ' ', declared)
+
+
+def type_layout(type_name: str) -> tuple[int, int]:
+    """
+    The on disk length and alignment of a type.  Unknown types are treated as variable length
+    values, which are stored unaligned with a one byte header when short.
+    """
+    if type_name.endswith(']') or type_name not in TYPES:
+        return -1, 1
+    return TYPES[type_name]
+
+
+def _align(offset: int, alignment: int) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def measure(layouts: list[tuple[int, int]], varlena_width: int) -> tuple[int, int]:
+    """
+    The estimated tuple width and the alignment padding inside it, with variable length values
+    estimated at varlena_width bytes.
+    """
+    offset = padding = 0
+    for length, alignment in layouts:
+        aligned = _align(offset, alignment)
+        padding += aligned - offset
+        offset = aligned + (varlena_width if length == -1 else length)
+    return TUPLE_HEADER + _align(offset, MAXALIGN), padding
+
+
+@dataclass
+class ColumnLayout:
+    """
+    The estimated tuple width of a table and the column order that minimizes its padding.
+    """
+    table: object
+    columns: list[str]
+    width: int
+    padding: int
+    proposed_columns: list[str]
+    proposed_width: int
+    proposed_padding: int
+
+    @property
+    def savings(self) -> int:
+        return self.width - self.proposed_width
+
+    def create_sql(self) -> str:
+        """
+        The CREATE TABLE with the columns in the proposed order, for tables that don't exist yet.
+        """
+        start, end = self.table.definitions_span()
+        definitions = self.table.column_definitions
+        parts = [definitions[column] for column in self.proposed_columns] + self.table.constraint_definitions
+        create = self.table.create
+        return create[:start + 1].strip() + "\n    " + ",\n    ".join(parts) + "\n" + create[end:].strip()
+
+
+def column_layout(table, varlena_width: int = 16, domains: dict[str, str] = None) -> ColumnLayout:
+    """
+    Estimate the tuple width of a table from the declared column types and propose the order
+    with the fixed width columns first by descending alignment and the variable length ones last.
+    """
+    domains = domains or {}
+    layouts = {}
+    for column, definition in table.column_definitions.items():
+        type_name = column_type(definition)
+        layouts[column] = type_layout(domains.get(type_name, type_name))
+
+    columns = list(layouts)
+    proposed = sorted(columns, key=lambda column: (layouts[column][0] == -1, -layouts[column][1]))
+    width, padding = measure([layouts[column] for column in columns], varlena_width)
+    proposed_width, proposed_padding = measure([layouts[column] for column in proposed], varlena_width)
+    return ColumnLayout(table, columns, width, padding, proposed, proposed_width, proposed_padding)
+
+
+def domain_types(database) -> dict[str, str]:
+    """
+    The base type of every registered domain by domain name.
+    """
+    domains = {}
+    for domain in database.get_items_by_type("domain"):
+        match = re.search(r'\bAS\s+(.+?)(?:\s+(?:NOT|NULL|DEFAULT|CHECK|CONSTRAINT|COLLATE)\b|;|$)', domain.create,
+                          re.IGNORECASE | re.DOTALL)
+        if match:
+            domains[domain.name.lower()] = column_type(f"value {match.group(1)}")
+    return domains
+
+
+def column_layouts(database, varlena_width: int = 16) -> list[ColumnLayout]:
+    """
+    The column layout of every registered table, resolving registered domains to their base types.
+    """
+    domains = domain_types(database)
+    return [column_layout(table, varlena_width, domains) for table in database.get_items_by_type("table")]
@@ -0,0 +1,189 @@
+import re
+from dataclasses import dataclass, field
+
+
+SQL_TOKENS = re.compile(
+    r"(?P<quoted>'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|(?P<dollar>\$(?:[A-Za-z_]\w*)?\$).*?(?P=dollar))"
+    r"|(?:\s|--[^\n]*|/\*.*?\*/)+",
+    re.DOTALL
+)
+NAMES = re.compile(r'(?<![\w.])[a-z_]\w*(?:\.[a-z_]\w*)?(?![\w.])')
+ARGUMENT_DEFAULT = re.compile(r'\s+DEFAULT\s+.*|\s*=.*', re.IGNORECASE | re.DOTALL)
+
+# Items that can't be dropped and created again without losing data, a change needs a migration
+ALTERED_TYPES = {'table', 'domain', 'schema'}
+# Items replaced in place with CREATE OR REPLACE
+REPLACED_TYPES = {'function', 'trigger'}
+# Items PostgreSQL tracks as dependents of the relations and functions they use
+DEPENDENT_TYPES = {'view', 'materialized_view', 'trigger', 'index'}
+DROP_KEYWORDS = {
+    'table': 'TABLE', 'view': 'VIEW', 'materialized_view': 'MATERIALIZED VIEW', 'function': 'FUNCTION',
+    'index': 'INDEX', 'domain': 'DOMAIN', 'schema': 'SCHEMA', 'trigger': 'TRIGGER',
+}
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Lowercase the SQL and collapse whitespace and comments outside of quotes and dollar
+    quoted bodies so that formatting changes don't count as changes.
+    """
+    parts = []
+    position = 0
+    for match in SQL_TOKENS.finditer(sql):
+        parts.append(sql[position:match.start()].lower())
+        parts.append(match.group('quoted') or ' ')
+        position = match.end()
+    parts.append(sql[position:].lower())
+    return ''.join(parts).strip().rstrip(';').strip()
+
+
+def flatten(load_order: list) -> list:
+    items = []
+    for item_or_group in load_order:
+        items.extend(item_or_group if isinstance(item_or_group, list) else [item_or_group])
+    return items
+
+
+def item_key(item) -> tuple[str, str]:
+    return item.itype, item.qualified_name
+
+
+def names(keys: set[tuple[str, str]]) -> set[str]:
+    """
+    The names the items with the given keys are referred by, schema qualified or, in the
+    public schema, unqualified.
+    """
+    found = set()
+    for item_type, qualified_name in keys:
+        if item_type not in ('trigger', 'index'):
+            found.add(qualified_name)
+            if qualified_name.startswith('public.'):
+                found.add(qualified_name[len('public.'):])
+    return found
+
+
+def dependents(sql: dict[tuple[str, str], str], keys: set[tuple[str, str]]) -> set[tuple[str, str]]:
+    """
+    The keys of the views, materialized views, triggers and indexes that depend on the items
+    with the given keys, directly or through other dependents, given the SQL of every item
+    by key.
+    """
+    candidates = {key: set(NAMES.findall(text.lower())) for key, text in sql.items() if key[0] in DEPENDENT_TYPES}
+    found = set()
+    level = set(keys)
+    while level:
+        referenced = names(level)
+        level = {
+            key for key, used in candidates.items()
+            if key not in found and key not in keys and not referenced.isdisjoint(used)
+        }
+        found |= level
+    return found
+
+
+def signature(function) -> list[str]:
+    return [normalize_sql(argument) for argument in function.arguments]
+
+
+def drop_sql(item) -> str:
+    if item.itype == 'function':
+        arguments = ", ".join(ARGUMENT_DEFAULT.sub('', argument) for argument in item.arguments)
+        return f"DROP FUNCTION IF EXISTS {item.qualified_name}({arguments});"
+    if item.itype == 'trigger':
+        return f"DROP TRIGGER IF EXISTS {item.name} ON {item.table};"
+    if item.itype == 'schema':
+        return f"DROP SCHEMA IF EXISTS {item.name};"
+    return f"DROP {DROP_KEYWORDS[item.itype]} IF EXISTS {item.qualified_name};"
+
+
+@dataclass
+class Change:
+    """
+    A step of a change plan.  The action is drop, create, replace, alter or storage.  Alter
+    steps have no SQL since they need a migration, storage steps set the storage parameters
+    of a table that differ from the previous declaration.
+    """
+    action: str
+    item: object
+    reason: str = field(default=None)
+    previous: object = field(default=None, repr=False)
+
+    @property
+    def sql(self) -> str | None:
+        if self.action == 'drop':
+            return drop_sql(self.item)
+        if self.action == 'create':
+            return self.item.full_sql()
+        if self.action == 'replace':
+            return self.item.full_sql(exists=True)
+        if self.action == 'storage':
+            previous = self.previous
+            return "\n".join(self.item.storage_sql(previous and previous.reloptions,
+                                                    previous and previous.column_options))
+        return None
+
+
+def storage_changed(old, new) -> bool:
+    """
+    Whether a table declares storage settings that the previous version of it, or None for a
+    new table, doesn't.  Dropping the declaration leaves the settings as they are.
+    """
+    if new.itype != 'table' or (new.storage is None and not new.column_storage):
+        return False
+    if old is None:
+        return True
+    return bool(new.storage_sql(old.reloptions, old.column_options))
+
+
+def diff_databases(old, new) -> list[Change]:
+    """
+    The ordered plan that turns the items of the old Database into the items of the new one.
+
+    Items are matched by type and qualified name and compared by their normalized SQL.
+    Changed tables, domains and schemas are altered, functions and triggers are replaced and
+    other items are dropped and created again along with the items that depend on them.
+    Drops come first in reverse load order, followed by the rest in load order.  Tables
+    whose declared storage parameters changed get a storage step after their other steps.
+    """
+    old_items = {item_key(item): item for item in flatten(old.load_order)}
+    new_items = {item_key(item): item for item in flatten(new.load_order)}
+
+    removed = old_items.keys() - new_items.keys()
+    added = new_items.keys() - old_items.keys()
+    old_sql = {key: item.full_sql() for key, item in old_items.items()}
+    new_sql = {key: item.full_sql() for key, item in new_items.items()}
+    changed = {
+        key for key in old_items.keys() & new_items.keys()
+        if old_sql[key] != new_sql[key] and normalize_sql(old_sql[key]) != normalize_sql(new_sql[key])
+    }
+
+    altered = {key for key in changed if key[0] in ALTERED_TYPES}
+    replaced = {
+        key for key in changed if key[0] in REPLACED_TYPES
+        and not (key[0] == 'function' and signature(old_items[key]) != signature(new_items[key]))
+    }
+    recreated = changed - altered - replaced
+    # what depends on the dropped items now has to go first, what will depend on them is created after
+    rebuilt = set()
+    if recreated or removed:
+        rebuilt = (dependents(old_sql, recreated | removed)
+                   | dependents(new_sql, recreated)) & old_items.keys() & new_items.keys()
+    reasons = {key: 'removed' for key in removed} | {key: 'changed' for key in changed}
+    for key in rebuilt - changed:
+        reasons[key] = 'dependent'
+
+    dropped = removed | recreated | rebuilt
+    plan = [Change('drop', old_items[key], reasons[key])
+            for key in reversed(old_items) if key in dropped]
+    for key, item in new_items.items():
+        if key in added:
+            plan.append(Change('create', item, 'added'))
+        elif key in recreated or key in rebuilt:
+            plan.append(Change('create', item, reasons[key]))
+        elif key in replaced:
+            plan.append(Change('replace', item, 'changed'))
+        elif key in altered:
+            plan.append(Change('alter', item, 'changed'))
+        if storage_changed(old_items.get(key), item):
+            plan.append(Change('storage', item, 'storage', previous=old_items.get(key)))
+    return plan
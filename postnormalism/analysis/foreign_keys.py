@@ -0,0 +1,88 @@
+import re
+from dataclasses import dataclass
+
+from ..utils import parse_indexes
+
+
+REFERENCES = re.compile(r'\bREFERENCES\s+((?:\w+\.)?\w+)', re.IGNORECASE)
+FOREIGN_KEY = re.compile(r'FOREIGN\s+KEY\s*\(([^)]*)\)\s*REFERENCES\s+((?:\w+\.)?\w+)', re.IGNORECASE)
+KEY_CONSTRAINT = re.compile(r'(?:PRIMARY\s+KEY|UNIQUE)\s*\(([^)]*)\)', re.IGNORECASE)
+ALTER_COLUMN = re.compile(
+    r'ADD\s+(?!(?:CONSTRAINT|FOREIGN|PRIMARY|UNIQUE|CHECK|EXCLUDE)\b)(?:COLUMN\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+'
+    r'[^,;]*?\bREFERENCES\s+((?:\w+\.)?\w+)',
+    re.IGNORECASE
+)
+
+
+def _columns(column_list: str) -> list[str]:
+    return [column.strip().strip('"').lower() for column in column_list.split(',')]
+
+
+@dataclass
+class UnindexedForeignKey:
+    """
+    A foreign key without an index whose leading columns cover it.
+    """
+    table: object
+    columns: list[str]
+    references: str
+
+    def index_sql(self) -> str:
+        name = f"{self.table.name}_{'_'.join(self.columns)}_idx"[:63]
+        return (f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {self.table.qualified_name} ({', '.join(self.columns)});")
+
+
+def foreign_keys(table) -> list[tuple[list[str], str]]:
+    """
+    The foreign keys declared in the CREATE TABLE and ALTER statements of a table.
+    """
+    keys = []
+    for column, definition in table.column_definitions.items():
+        match = REFERENCES.search(definition)
+        if match:
+            keys.append(([column], match.group(1).lower()))
+
+    for sql in [*table.constraint_definitions, table.alter or '']:
+        for column_list, references in FOREIGN_KEY.findall(sql):
+            keys.append((_columns(column_list), references.lower()))
+
+    for column, references in ALTER_COLUMN.findall(table.alter or ''):
+        keys.append(([column.lower()], references.lower()))
+    return keys
+
+
+def indexed_columns(table, indexes: list) -> list[list[str]]:
+    """
+    The column lists of the primary keys, unique constraints and indexes of a table.
+    """
+    covered = []
+    for column, definition in table.column_definitions.items():
+        if re.search(r'\b(PRIMARY\s+KEY|UNIQUE)\b', definition, re.IGNORECASE):
+            covered.append([column])
+
+    for sql in [*table.constraint_definitions, table.alter or '']:
+        covered.extend(_columns(column_list) for column_list in KEY_CONSTRAINT.findall(sql))
+
+    for index_table, columns, _ in parse_indexes(table.alter) + indexes:
+        if index_table == table.qualified_name:
+            covered.append(columns)
+    return covered
+
+
+def find_unindexed_foreign_keys(database) -> list[UnindexedForeignKey]:
+    """
+    Find the foreign keys of the registered tables that no index covers.  An index covers a
+    foreign key when its leading columns are the foreign key columns, in any order.
+    """
+    indexes = [
+        (index.table, index.columns, index.unique) for index in database.get_items_by_type("index")
+    ]
+
+    unindexed = []
+    for table in database.get_items_by_type("table"):
+        covered = indexed_columns(table, indexes)
+        for columns, references in foreign_keys(table):
+            if not any(set(index[:len(columns)]) == set(columns) for index in covered):
+                unindexed.append(UnindexedForeignKey(table=table, columns=columns, references=references))
+    return unindexed
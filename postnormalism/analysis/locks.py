@@ -0,0 +1,255 @@
+import re
+from dataclasses import dataclass, field
+
+from ..utils import COMMENTS, parse_indexes, split_top_level
+
+
+LOCK_LEVELS = (
+    'ACCESS SHARE', 'ROW SHARE', 'ROW EXCLUSIVE', 'SHARE UPDATE EXCLUSIVE', 'SHARE', 'SHARE ROW EXCLUSIVE',
+    'EXCLUSIVE', 'ACCESS EXCLUSIVE',
+)
+VOLATILE_DEFAULT = re.compile(
+    r'\bDEFAULT\s+.*\b(?:random|clock_timestamp|timeofday|gen_random_uuid|uuid_generate_v[14]|nextval)\s*\(',
+    re.IGNORECASE | re.DOTALL)
+SERIAL_TYPE = re.compile(r'^\s*(?:COLUMN\s+)?(?:IF\s+NOT\s+EXISTS\s+)?\w+\s+(?:SMALL|BIG)?SERIAL\b', re.IGNORECASE)
+ALTER_TYPE = re.compile(r'^ALTER\s+(?:COLUMN\s+)?(\w+)\s+(?:SET\s+DATA\s+)?TYPE\s+(.+?)\s*(?:\bCOLLATE\b.*)?$',
+                        re.IGNORECASE | re.DOTALL)
+TYPE_NAME = re.compile(r'^([a-z][a-z ]*?)\s*(?:\(\s*([\d\s,]*)\))?$')
+TYPE_ALIASES = {'character varying': 'varchar', 'decimal': 'numeric'}
+ALTER_TABLE = re.compile(r'^ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?((?:\w+\.)?\w+)\s+(.*)$',
+                         re.IGNORECASE | re.DOTALL)
+DROP_INDEX = re.compile(r'^DROP\s+INDEX\s+(CONCURRENTLY\s+)?(?:IF\s+EXISTS\s+)?((?:\w+\.)?\w+)', re.IGNORECASE)
+REINDEX = re.compile(r'^REINDEX\s+(?:\(.*?\)\s*)?(INDEX|TABLE)\s+(CONCURRENTLY\s+)?((?:\w+\.)?\w+)', re.IGNORECASE)
+REWRITE_COMMAND = re.compile(
+    r'^(?:VACUUM\s+(?:\([^)]*\bFULL\b[^)]*\)|FULL(?:\s+(?:FREEZE|VERBOSE|ANALYZE))*)|CLUSTER(?:\s+VERBOSE)?)'
+    r'\s+((?:\w+\.)?\w+)', re.IGNORECASE)
+TABLE_COMMAND = re.compile(r'^(TRUNCATE|DROP\s+TABLE)\s+(?:TABLE\s+)?(?:IF\s+EXISTS\s+)?((?:\w+\.)?\w+)',
+                           re.IGNORECASE)
+REFRESH = re.compile(r'^REFRESH\s+MATERIALIZED\s+VIEW\s+(CONCURRENTLY\s+)?((?:\w+\.)?\w+)', re.IGNORECASE)
+
+
+@dataclass
+class LockRisk:
+    """
+    The lock a planned statement takes on a table and whether it rewrites or scans the table
+    while holding it.  Rewrites and scans take time proportional to the size of the table.
+    """
+    statement: str
+    table: str
+    lock: str
+    source: str = field(default=None)
+    rewrite: bool = field(default=False)
+    scan: bool = field(default=False)
+    suggestion: str = field(default=None)
+    tuples: float = field(default=None)
+    pages: int = field(default=None)
+    flagged: bool = field(default=False)
+
+    @property
+    def blocks_writes(self) -> bool:
+        return LOCK_LEVELS.index(self.lock) >= LOCK_LEVELS.index('SHARE')
+
+    @property
+    def blocks_reads(self) -> bool:
+        return self.lock == 'ACCESS EXCLUSIVE'
+
+    @property
+    def bytes(self) -> int | None:
+        """
+        The bytes rewritten or scanned while the lock is held, estimated from relpages.
+        """
+        if self.pages is None or not (self.rewrite or self.scan):
+            return None
+        return self.pages * 8192
+
+
+def _qualified(table: str) -> str:
+    table = table.lower()
+    return table if '.' in table else f"public.{table}"
+
+
+def _parse_type(declared: str) -> tuple[str, list[int]] | None:
+    match = TYPE_NAME.match(' '.join(declared.lower().split()))
+    if match is None:
+        return None
+    modifiers = [int(value) for value in (match.group(2) or '').replace(' ', '').split(',') if value]
+    return TYPE_ALIASES.get(match.group(1), match.group(1)), modifiers
+
+
+def binary_coercible(old: str, new: str) -> bool:
+    """
+    Whether changing a column from the old to the new type keeps the stored values as they
+    are: varchar to text, widening a varchar and raising the precision of a numeric.  Other
+    and unknown changes rewrite the table.
+    """
+    old_type, new_type = _parse_type(old or ''), _parse_type(new)
+    if old_type is None or new_type is None:
+        return False
+    (old_name, old_modifiers), (new_name, new_modifiers) = old_type, new_type
+    if old_name == 'varchar' and new_name == 'text':
+        return True
+    if old_name == new_name == 'varchar':
+        return not new_modifiers or bool(old_modifiers) and new_modifiers[0] >= old_modifiers[0]
+    if old_name == new_name == 'numeric':
+        if not new_modifiers:
+            return True
+        if not old_modifiers:
+            return False
+        old_scale = old_modifiers[1] if len(old_modifiers) > 1 else 0
+        new_scale = new_modifiers[1] if len(new_modifiers) > 1 else 0
+        return new_scale == old_scale and new_modifiers[0] >= old_modifiers[0]
+    return False
+
+
+def classify_alter(command: str, columns: dict[str, str] = None) -> dict:
+    """
+    Classify one subcommand of an ALTER TABLE, given the current types of the columns of the
+    table by column name.
+    """
+    upper = command.upper()
+    if upper.startswith('ADD') and not re.match(r'ADD\s+(?:CONSTRAINT|PRIMARY|UNIQUE|CHECK|FOREIGN|EXCLUDE)\b', upper):
+        if VOLATILE_DEFAULT.search(command) or SERIAL_TYPE.search(command[3:]) or re.search(r'\bSTORED\b', upper):
+            return dict(lock='ACCESS EXCLUSIVE', rewrite=True,
+                        suggestion="add the column without a default, backfill it in batches and set the default after")
+        return dict(lock='ACCESS EXCLUSIVE')
+
+    match = ALTER_TYPE.match(command.strip())
+    if match:
+        column, new_type = match.group(1).lower(), match.group(2)
+        if not re.search(r'\bUSING\b', new_type, re.IGNORECASE) and \
+                binary_coercible((columns or {}).get(column), new_type):
+            return dict(lock='ACCESS EXCLUSIVE')
+        return dict(lock='ACCESS EXCLUSIVE', rewrite=True,
+                    suggestion="add a new column, backfill it in batches and swap the columns")
+
+    if re.match(r'ALTER\s+(?:COLUMN\s+)?\w+\s+SET\s+NOT\s+NULL', upper):
+        return dict(lock='ACCESS EXCLUSIVE', scan=True,
+                    suggestion="add a CHECK (... IS NOT NULL) NOT VALID constraint and VALIDATE it first")
+
+    if upper.startswith('VALIDATE'):
+        return dict(lock='SHARE UPDATE EXCLUSIVE')
+
+    not_valid = re.search(r'\bNOT\s+VALID\b', upper)
+    if re.search(r'\bFOREIGN\s+KEY\b|\bREFERENCES\b', upper):
+        if not_valid:
+            return dict(lock='SHARE ROW EXCLUSIVE')
+        return dict(lock='SHARE ROW EXCLUSIVE', scan=True,
+                    suggestion="add the foreign key NOT VALID and VALIDATE CONSTRAINT separately")
+
+    if re.search(r'\bCHECK\s*\(', upper):
+        if not_valid:
+            return dict(lock='ACCESS EXCLUSIVE')
+        return dict(lock='ACCESS EXCLUSIVE', scan=True,
+                    suggestion="add the check NOT VALID and VALIDATE CONSTRAINT separately")
+
+    if re.search(r'\b(?:PRIMARY\s+KEY|UNIQUE|EXCLUDE)\b', upper) and not re.search(r'\bUSING\s+INDEX\b', upper):
+        return dict(lock='ACCESS EXCLUSIVE', scan=True,
+                    suggestion="CREATE UNIQUE INDEX CONCURRENTLY and add the constraint USING INDEX")
+
+    if re.match(r'SET\s+(?:TABLESPACE|LOGGED|UNLOGGED|WITHOUT\s+OIDS)\b', upper):
+        return dict(lock='ACCESS EXCLUSIVE', rewrite=True)
+
+    if re.match(r'(?:SET|RESET)\s*\(', upper) or upper.startswith(('SET STATISTICS', 'CLUSTER ON')):
+        return dict(lock='SHARE UPDATE EXCLUSIVE')
+
+    return dict(lock='ACCESS EXCLUSIVE')
+
+
+def classify_statement(statement: str, types: dict[str, dict[str, str]] = None) -> list[tuple[str, dict]]:
+    """
+    The tables a DDL statement locks with the lock level and the risks, as (table, risk)
+    pairs.  Statements that only take weak locks, like CREATE TABLE or DML, give no pairs.
+    Type changes of columns missing from the current types by table and column rewrite the table.
+    """
+    sql = COMMENTS.sub('', statement).strip().rstrip(';').strip()
+    upper = sql.upper()
+
+    match = ALTER_TABLE.match(sql)
+    if match:
+        table = _qualified(match.group(1))
+        columns = (types or {}).get(table)
+        return [(table, classify_alter(command, columns)) for command in split_top_level(match.group(2))]
+
+    if re.match(r'CREATE\s+(?:UNIQUE\s+)?INDEX\b', upper):
+        indexes = parse_indexes(sql)
+        if not indexes:
+            return []
+        if re.match(r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\b', upper):
+            return [(indexes[0][0], dict(lock='SHARE UPDATE EXCLUSIVE'))]
+        return [(indexes[0][0], dict(lock='SHARE', scan=True, suggestion="use CREATE INDEX CONCURRENTLY"))]
+
+    match = DROP_INDEX.match(sql)
+    if match and not match.group(1):
+        return [(_qualified(match.group(2)), dict(lock='ACCESS EXCLUSIVE', suggestion="use DROP INDEX CONCURRENTLY"))]
+
+    match = REINDEX.match(sql)
+    if match and not match.group(2):
+        return [(_qualified(match.group(3)), dict(lock='ACCESS EXCLUSIVE', rewrite=True,
+                                                  suggestion="use REINDEX CONCURRENTLY"))]
+
+    match = REWRITE_COMMAND.match(sql)
+    if match:
+        return [(_qualified(match.group(1)), dict(lock='ACCESS EXCLUSIVE', rewrite=True,
+                                                  suggestion="use pg_repack or a batched copy instead"))]
+
+    match = TABLE_COMMAND.match(sql)
+    if match:
+        return [(_qualified(match.group(2)), dict(lock='ACCESS EXCLUSIVE'))]
+
+    match = REFRESH.match(sql)
+    if match:
+        if match.group(1):
+            return [(_qualified(match.group(2)), dict(lock='EXCLUSIVE'))]
+        return [(_qualified(match.group(2)), dict(lock='ACCESS EXCLUSIVE', rewrite=True,
+                                                  suggestion="add a unique index and REFRESH ... CONCURRENTLY"))]
+    return []
+
+
+def table_sizes(cursor, tables: list[str]) -> dict[str, tuple[float, int, dict[str, str]]]:
+    """
+    The reltuples, relpages and the current column types of the given tables from a single
+    catalog query.
+    """
+    cursor.execute(
+        """
+        SELECT n.nspname || '.' || c.relname, c.reltuples, c.relpages, (
+            SELECT json_object_agg(a.attname, format_type(a.atttypid, a.atttypmod))
+            FROM pg_attribute a
+            WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+        )
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname || '.' || c.relname = ANY(%s)
+        """,
+        (tables,)
+    )
+    return {table: (tuples, pages, columns or {}) for table, tuples, pages, columns in cursor.fetchall()}
+
+
+def analyze_ddl(statements: list[tuple[str, str]], cursor=None, min_pages: int = 1000) -> list[LockRisk]:
+    """
+    Classify the planned (source, statement) pairs by the locks they take and whether they
+    rewrite or scan a table while holding the lock.
+
+    With a cursor the table sizes are fetched in one query and statements that rewrite or
+    scan tables of at least min_pages pages are flagged for an online or concurrent path.
+    Without a cursor every rewrite or scan is flagged.  Column type changes are only left
+    out of the rewrites when the same query finds the current type of the column and the new
+    type is binary coercible from it, without a cursor every type change is a rewrite.
+    """
+    tables = sorted({table for _, statement in statements for table, _ in classify_statement(statement)})
+    sizes = table_sizes(cursor, tables) if cursor is not None and tables else {}
+    types = {table: columns for table, (_, _, columns) in sizes.items()}
+
+    risks = []
+    for source, statement in statements:
+        for table, risk in classify_statement(statement, types):
+            risks.append(LockRisk(statement=statement.strip(), table=table, source=source, **risk))
+
+    for risk in risks:
+        if risk.table in sizes:
+            risk.tuples, risk.pages, _ = sizes[risk.table]
+        # tables that don't exist yet are created by the plan and empty
+        large = cursor is None or (risk.pages or 0) >= min_pages
+        risk.flagged = (risk.rewrite or risk.scan) and large
+    return risks
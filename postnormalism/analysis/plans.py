@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+
+
+@dataclass
+class PlanIssue:
+    """
+    A problem spotted in a query plan.
+    """
+    kind: str
+    detail: str
+
+
+@dataclass
+class PlanReport:
+    """
+    The plan of a View or SQL Function along with its fingerprint and issues.
+    """
+    item: object
+    plan: dict
+    fingerprint: str
+    previous_fingerprint: str = field(default=None)
+    issues: list[PlanIssue] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return self.previous_fingerprint is not None and self.previous_fingerprint != self.fingerprint
+
+
+def walk_plan(node: dict):
+    yield node
+    for child in node.get('Plans', []):
+        yield from walk_plan(child)
+
+
+def fingerprint_plan(plan: dict) -> str:
+    """
+    Hash the shape of a plan, its node types, relations, indexes and join types, ignoring the estimates.
+    """
+    shape = [
+        [node.get(key) for key in ('Node Type', 'Relation Name', 'Index Name', 'Join Type', 'Parent Relationship')]
+        for node in walk_plan(plan)
+    ]
+    return hashlib.sha1(json.dumps(shape).encode()).hexdigest()[:16]
+
+
+def explain_sql(item, samples: dict[str, tuple]) -> tuple[str, tuple] | None:
+    """
+    The EXPLAIN statement for a view or a SQL function, None when the item can't be explained.
+    Functions with arguments need sample arguments keyed by their qualified name.
+    """
+    if item.itype == 'view':
+        return f"SELECT * FROM {item.qualified_name}", ()
+
+    if item.itype == 'function' and item.language == 'sql':
+        arguments = samples.get(item.qualified_name, () if not item.arguments else None)
+        if arguments is None:
+            return None
+        placeholders = ", ".join(["%s"] * len(arguments))
+        return f"SELECT * FROM {item.qualified_name}({placeholders})", tuple(arguments)
+
+    return None
+
+
+def find_issues(plan: dict, relation_pages: dict[str, int], work_mem: int, large_relation_pages: int,
+                nested_loop_rows: int) -> list[PlanIssue]:
+    issues = []
+    for node in walk_plan(plan):
+        node_type = node.get('Node Type')
+        if node_type == 'Seq Scan':
+            relation = node.get('Relation Name')
+            pages = relation_pages.get(relation, 0)
+            if pages >= large_relation_pages:
+                issues.append(PlanIssue('seq_scan', f"Sequential scan on {relation} ({pages} pages)"))
+
+        elif node_type == 'Nested Loop' and len(node.get('Plans', [])) == 2:
+            outer, inner = node['Plans']
+            rows = outer.get('Plan Rows', 0) * inner.get('Plan Rows', 0)
+            if rows >= nested_loop_rows:
+                issues.append(PlanIssue(
+                    'nested_loop',
+                    f"Nested loop over {outer.get('Plan Rows')} x {inner.get('Plan Rows')} estimated rows"
+                ))
+
+        elif node_type in ('Sort', 'Incremental Sort'):
+            if node.get('Sort Space Type') == 'Disk':
+                issues.append(PlanIssue('disk_sort', f"Sort spilled {node.get('Sort Space Used')}kB to disk"))
+            elif 'Sort Space Type' not in node:
+                estimated = node.get('Plan Rows', 0) * node.get('Plan Width', 0)
+                if estimated > work_mem:
+                    issues.append(PlanIssue('disk_sort', f"Sort of ~{estimated} bytes exceeds work_mem"))
+    return issues
+
+
+def load_fingerprints(path: str) -> dict[str, str]:
+    if not path or not os.path.isfile(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_fingerprints(path: str, reports: list[PlanReport]):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({report.item.qualified_name: report.fingerprint for report in reports}, file, indent=2,
+                  sort_keys=True)
+
+
+def explain_items(database, cursor, samples: dict[str, tuple] = None, fingerprint_file: str = None,
+                  analyze: bool = False, large_relation_pages: int = 10000,
+                  nested_loop_rows: int = 1000000) -> list[PlanReport]:
+    """
+    EXPLAIN every registered View and SQL Function and report sequential scans on large
+    relations, nested loops over many rows and sorts that spill to disk.
+
+    With a fingerprint_file the plan fingerprints are compared against the previous run and
+    saved, so plan changes between releases show up as reports with changed set.  ANALYZE
+    runs the queries, only use it against a local database.
+    """
+    samples = samples or {}
+    previous = load_fingerprints(fingerprint_file)
+    options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+
+    cursor.execute("SELECT setting::bigint * 1024 FROM pg_settings WHERE name = 'work_mem'")
+    work_mem = cursor.fetchone()[0]
+
+    plans = []
+    for item in database.get_items_by_type("view") + database.get_items_by_type("function"):
+        statement = explain_sql(item, samples)
+        if statement is None:
+            continue
+        sql, arguments = statement
+        cursor.execute(f"EXPLAIN ({options}) {sql}", arguments)
+        result = cursor.fetchone()[0]
+        if isinstance(result, str):
+            result = json.loads(result)
+        plans.append((item, result[0]['Plan']))
+
+    relations = sorted({
+        node['Relation Name'] for _, plan in plans for node in walk_plan(plan) if 'Relation Name' in node
+    })
+    cursor.execute("SELECT relname, max(relpages) FROM pg_class WHERE relname = ANY(%s) GROUP BY relname",
+                   (relations,))
+    relation_pages = dict(cursor.fetchall())
+
+    reports = []
+    for item, plan in plans:
+        reports.append(PlanReport(
+            item=item,
+            plan=plan,
+            fingerprint=fingerprint_plan(plan),
+            previous_fingerprint=previous.get(item.qualified_name),
+            issues=find_issues(plan, relation_pages, work_mem, large_relation_pages, nested_loop_rows),
+        ))
+
+    if fingerprint_file:
+        save_fingerprints(fingerprint_file, reports)
+    return reports
@@ -0,0 +1,241 @@
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from .alignment import column_type, domain_types
+
+
+ROW_LEVEL = re.compile(r'\bFOR\s+EACH\s+ROW\b', re.IGNORECASE)
+AFTER = re.compile(r'\bAFTER\b', re.IGNORECASE)
+CONSTRAINT_TRIGGER = re.compile(r'^\s*CREATE\s+(?:OR\s+REPLACE\s+)?CONSTRAINT\s+TRIGGER\b', re.IGNORECASE)
+DEFAULTED = re.compile(r'\b(?:DEFAULT|GENERATED)\b', re.IGNORECASE)
+NOT_NULL = re.compile(r'\bNOT\s+NULL\b|\bPRIMARY\s+KEY\b', re.IGNORECASE)
+LENGTH = re.compile(r'\b(?:VARCHAR|CHARACTER\s+VARYING|CHAR|CHARACTER)\s*\(\s*(\d+)\s*\)', re.IGNORECASE)
+SERIAL_TYPES = {'smallserial', 'serial2', 'serial', 'serial4', 'bigserial', 'serial8'}
+EPOCH = datetime(2000, 1, 1)
+
+# type name: the value of the i-th generated row
+VALUES = {
+    **dict.fromkeys(('smallint', 'int2'), lambda i: i % 32768),
+    **dict.fromkeys(('integer', 'int', 'int4', 'bigint', 'int8'), lambda i: i),
+    **dict.fromkeys(('real', 'float4', 'double precision', 'float8', 'float', 'numeric', 'decimal'), lambda i: i / 4),
+    **dict.fromkeys(('text', 'varchar', 'character varying', 'char', 'character', 'bpchar', 'citext', 'name'), str),
+    **dict.fromkeys(('boolean', 'bool'), lambda i: i % 2 == 0),
+    'date': lambda i: (EPOCH + timedelta(days=i % 36500)).date(),
+    **dict.fromkeys(('timestamp', 'timestamp without time zone'), lambda i: EPOCH + timedelta(seconds=i)),
+    **dict.fromkeys(('timestamptz', 'timestamp with time zone'),
+                    lambda i: (EPOCH + timedelta(seconds=i)).replace(tzinfo=timezone.utc)),
+    **dict.fromkeys(('time', 'time without time zone'), lambda i: (EPOCH + timedelta(seconds=i % 86400)).time()),
+    'interval': lambda i: timedelta(seconds=i),
+    'uuid': lambda i: uuid.UUID(int=i),
+    **dict.fromkeys(('json', 'jsonb'), lambda i: f'{{"row": {i}}}'),
+    'bytea': lambda i: str(i).encode(),
+    'inet': lambda i: f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+}
+
+
+@dataclass
+class TriggerOverhead:
+    """
+    The time batched inserts and updates of a table take with one registered trigger enabled
+    and with all of its registered triggers disabled.
+    """
+    trigger: object
+    table: str
+    rows: int
+    insert_seconds: float
+    update_seconds: float
+    baseline_insert_seconds: float
+    baseline_update_seconds: float
+    suggestion: str = field(default=None)
+
+    @property
+    def insert_overhead(self) -> float:
+        """
+        The seconds the trigger adds to every inserted row.
+        """
+        return (self.insert_seconds - self.baseline_insert_seconds) / self.rows
+
+    @property
+    def update_overhead(self) -> float:
+        return (self.update_seconds - self.baseline_update_seconds) / self.rows
+
+    @property
+    def share(self) -> float:
+        """
+        The largest part of the insert or update time spent in the trigger.
+        """
+        return max(
+            (self.insert_seconds - self.baseline_insert_seconds) / self.insert_seconds if self.insert_seconds else 0,
+            (self.update_seconds - self.baseline_update_seconds) / self.update_seconds if self.update_seconds else 0,
+        )
+
+    @property
+    def row_level(self) -> bool:
+        return bool(ROW_LEVEL.search(self.trigger.create))
+
+
+def _truncated(make: Callable, width: int) -> Callable:
+    # the last digits of the row number keep the values apart
+    return lambda i: make(i)[-width:]
+
+
+def generate_rows(table, count: int, samples: dict[str, Callable] = None,
+                  domains: dict[str, str] = None) -> tuple[list[str], list[tuple]]:
+    """
+    The columns and count rows of values matching the declared column types of a table.
+
+    Columns with defaults, serial or generated columns are left to the database.  Samples map
+    qualified column names to a callable returning the value of the i-th row, for columns of
+    types that can't be generated.  Nullable columns of unknown types are left NULL.
+    """
+    samples = samples or {}
+    domains = domains or {}
+    columns, makers = [], []
+    for column, definition in table.column_definitions.items():
+        make = samples.get(f"{table.qualified_name}.{column}")
+        if make is None:
+            type_name = column_type(definition)
+            type_name = domains.get(type_name, type_name)
+            if type_name in SERIAL_TYPES or DEFAULTED.search(definition):
+                continue
+            make = VALUES.get(type_name)
+            if make is None:
+                if NOT_NULL.search(definition):
+                    raise ValueError(f"Can't generate {type_name} values for {table.qualified_name}.{column}, "
+                                     f"pass a sample for it.")
+                continue
+            length = LENGTH.search(definition)
+            if length:
+                make = _truncated(make, int(length.group(1)))
+        columns.append(column)
+        makers.append(make)
+    if not columns:
+        raise ValueError(f"Every column of {table.qualified_name} has a default, pass a sample for one of them.")
+    return columns, [tuple(make(i) for make in makers) for i in range(1, count + 1)]
+
+
+def time_writes(cursor, table, columns: list[str], rows: list[tuple], batch: int = 100) -> tuple[float, float]:
+    """
+    The seconds it takes to insert the rows in batches and then update them in batches of
+    the same size, each including its commit.  Without a single column primary key the
+    rows are updated in one statement.
+    """
+    key = table.primary_key[0] if len(table.primary_key) == 1 else None
+    updated = next((column for column in columns if column not in table.primary_key), columns[0])
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    returning = f" RETURNING {table.quote(key)}" if key else ""
+    inserts = [
+        (f"INSERT INTO {table.quoted_name} ({', '.join(table.quote(column) for column in columns)}) "
+         f"VALUES {', '.join([placeholders] * len(rows[start:start + batch]))}{returning}",
+         [value for row in rows[start:start + batch] for value in row])
+        for start in range(0, len(rows), batch)
+    ]
+
+    keys = []
+    started = time.perf_counter()
+    for sql, parameters in inserts:
+        cursor.execute(sql, parameters)
+        if key:
+            keys.extend(row[0] for row in cursor.fetchall())
+    cursor.connection.commit()
+    inserted = time.perf_counter() - started
+
+    update = f"UPDATE {table.quoted_name} SET {table.quote(updated)} = {table.quote(updated)}"
+    updates = [(f"{update} WHERE {table.quote(key)} = ANY(%s)", (keys[start:start + batch],))
+               for start in range(0, len(keys), batch)] if key else [(update, ())]
+    started = time.perf_counter()
+    for sql, parameters in updates:
+        cursor.execute(sql, parameters)
+    cursor.connection.commit()
+    return inserted, time.perf_counter() - started
+
+
+def drop_foreign_keys(cursor, table):
+    cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+                   (table.quoted_name,))
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE {table.quoted_name} DROP CONSTRAINT {table.quote(name)}")
+    cursor.connection.commit()
+
+
+def suggest(overhead: TriggerOverhead, dominant: float) -> str | None:
+    trigger = overhead.trigger
+    if not overhead.row_level or overhead.share < dominant:
+        return None
+    if CONSTRAINT_TRIGGER.search(trigger.create) or not AFTER.search(trigger.create):
+        return None
+    return (f"{trigger.name} takes {overhead.share:.0%} of the write time on {overhead.table}, rewrite it as an "
+            f"AFTER ... FOR EACH STATEMENT trigger with REFERENCING NEW TABLE (and OLD TABLE for updates) "
+            f"and handle the rows in one set based statement")
+
+
+def measure_triggers(database, cursor, rows: int = 1000, batch: int = 100, samples: dict[str, Callable] = None,
+                     dominant: float = 0.5) -> list[TriggerOverhead]:
+    """
+    Time batched inserts and updates of every registered table with registered triggers,
+    once with all of its triggers disabled and once with each trigger enabled on its own.
+
+    Only run it against a scratch database holding the items of the Database, the tables
+    are truncated and their foreign keys dropped since the generated rows reference nothing.
+    AFTER row level triggers taking at least the dominant share of the write time get a
+    suggestion to move to a statement level trigger with transition tables.
+    """
+    domains = domain_types(database)
+    tables = {table.qualified_name: table for table in database.get_items_by_type("table")}
+    triggers = {}
+    for trigger in database.get_items_by_type("trigger"):
+        if trigger.table in tables:
+            triggers.setdefault(trigger.table, []).append(trigger)
+
+    results = []
+    for name, table_triggers in triggers.items():
+        table = tables[name]
+        columns, generated = generate_rows(table, rows, samples, domains)
+        drop_foreign_keys(cursor, table)
+
+        def run(enabled=None):
+            for trigger in table_triggers:
+                state = 'ENABLE' if trigger is enabled else 'DISABLE'
+                cursor.execute(f"ALTER TABLE {table.quoted_name} {state} TRIGGER {table.quote(trigger.name)}")
+            cursor.execute(f"TRUNCATE TABLE {table.quoted_name} RESTART IDENTITY CASCADE")
+            cursor.connection.commit()
+            return time_writes(cursor, table, columns, generated, batch)
+
+        run()  # warm the caches so the baseline isn't the slowest run
+        baseline = run()
+        for trigger in table_triggers:
+            overhead = TriggerOverhead(trigger, name, rows, *run(trigger), *baseline)
+            overhead.suggestion = suggest(overhead, dominant)
+            results.append(overhead)
+        cursor.execute(f"TRUNCATE TABLE {table.quoted_name} RESTART IDENTITY CASCADE")
+        cursor.connection.commit()
+    return results
+
+
+@contextmanager
+def scratch_database(dsn: str, name: str = 'postnormalism_scratch'):
+    """
+    Create an empty database on the server of the DSN and drop it afterwards, yielding a
+    callable that opens connections to it.  An existing database of the same name is never
+    touched, it is an error instead.
+    """
+    import psycopg  # optional dependency, only needed for DSNs
+    from psycopg.conninfo import make_conninfo
+
+    if not re.fullmatch(r'[a-z_][a-z0-9_]*', name):
+        raise ValueError(f"Invalid scratch database name {name!r}.")
+    with psycopg.connect(dsn, autocommit=True) as admin:
+        try:
+            admin.execute(f"CREATE DATABASE {name}")
+        except psycopg.errors.DuplicateDatabase:
+            raise ValueError(f"Database {name!r} already exists, pass the name of a scratch database "
+                             f"that doesn't exist yet.") from None
+        try:
+            yield lambda: psycopg.connect(make_conninfo(dsn, dbname=name))
+        finally:
+            admin.execute(f"DROP DATABASE {name}")
@@ -0,0 +1,237 @@
+import re
+from dataclasses import dataclass, field
+
+from ..utils import COMMENTS, WRITE_PATTERN
+
+
+VOLATILITY = ('immutable', 'stable', 'volatile')
+PARALLEL = ('safe', 'restricted', 'unsafe')
+
+COMMANDS = re.compile(r'\b(?:TRUNCATE|COPY|CREATE|ALTER|DROP|GRANT|REVOKE|LOCK|NOTIFY|LISTEN)\b', re.IGNORECASE)
+CASTS = re.compile(r'::\s*((?:\w+\.)?[A-Za-z_]\w*(?:\s+(?:precision|varying))?)'
+                   r'|\bCAST\s*\(.*?\bAS\s+((?:\w+\.)?[A-Za-z_]\w*(?:\s+(?:precision|varying))?)',
+                   re.IGNORECASE | re.DOTALL)
+# A type name followed by a string literal, like date 'today', once the strings are emptied
+TYPED_LITERALS = re.compile(r"\b((?:\w+\.)?[A-Za-z_]\w*(?:\s+(?:precision|varying|with(?:out)?\s+time\s+zone))?)\s*''",
+                            re.IGNORECASE)
+RETURN_TYPE = re.compile(r'\bRETURNS\s+(.*?)\s+(?:AS|LANGUAGE)\b', re.IGNORECASE | re.DOTALL)
+DYNAMIC = re.compile(r'\bEXECUTE\b(?!\s+(?:FUNCTION|PROCEDURE)\b)', re.IGNORECASE)
+SUBTRANSACTION = re.compile(r'\bEXCEPTION\s+WHEN\b', re.IGNORECASE)
+TEMP_TABLE = re.compile(r'\bpg_temp\b|\bTEMP(?:ORARY)?\s+TABLE\b', re.IGNORECASE)
+RELATIONS = re.compile(r'\b(?:FROM|JOIN)\s+((?:\w+\.)?[A-Za-z_]\w*)\b(?!\s*\()', re.IGNORECASE)
+STRINGS = re.compile(r"'(?:[^']|'')*'")
+TRIGGER_FUNCTION = re.compile(r'\bRETURNS\s+(?:EVENT_)?TRIGGER\b', re.IGNORECASE)
+CALLS = re.compile(r'\b((?:\w+\.)?[A-Za-z_]\w*)\s*\(')
+STABLE_VALUES = re.compile(r'\b(?:CURRENT_DATE|CURRENT_TIME|CURRENT_TIMESTAMP|LOCALTIME|LOCALTIMESTAMP|'
+                           r'CURRENT_USER|SESSION_USER|CURRENT_ROLE|CURRENT_SCHEMA|CURRENT_CATALOG)\b', re.IGNORECASE)
+
+# Keywords and type names that are followed by a parenthesis without being a function call
+NOT_CALLS = {
+    'if', 'in', 'and', 'or', 'not', 'exists', 'values', 'any', 'all', 'some', 'as', 'case', 'when', 'then', 'else',
+    'select', 'from', 'where', 'on', 'using', 'return', 'returns', 'cast', 'coalesce', 'nullif', 'greatest', 'least',
+    'array', 'row', 'over', 'filter', 'within', 'extract', 'position', 'substring', 'overlay', 'trim', 'numeric',
+    'decimal', 'varchar', 'char', 'character', 'bit', 'varbit', 'time', 'timestamp', 'timestamptz', 'interval',
+    'float', 'loop', 'while', 'elsif', 'raise', 'perform', 'into', 'by', 'with', 'union', 'intersect', 'except',
+    'limit', 'offset', 'is', 'like', 'ilike', 'similar', 'between', 'distinct', 'group', 'order', 'having', 'join',
+    'lateral', 'tuple', 'set', 'window', 'partition',
+}
+IMMUTABLE_BUILTINS = {
+    'abs', 'ceil', 'ceiling', 'floor', 'round', 'trunc', 'sqrt', 'cbrt', 'power', 'pow', 'exp', 'ln', 'log', 'mod',
+    'sign', 'div', 'width_bucket', 'lower', 'upper', 'initcap', 'length', 'char_length', 'character_length',
+    'octet_length', 'bit_length', 'substr', 'btrim', 'ltrim', 'rtrim', 'lpad', 'rpad', 'replace', 'translate',
+    'left', 'right', 'reverse', 'repeat', 'split_part', 'strpos', 'starts_with', 'md5', 'sha224', 'sha256', 'sha384',
+    'sha512', 'encode', 'decode', 'regexp_replace', 'regexp_match', 'regexp_matches', 'regexp_split_to_array',
+    'regexp_split_to_table', 'ascii', 'chr', 'quote_ident', 'quote_literal',
+    'array_length', 'array_append', 'array_prepend', 'array_cat', 'array_position', 'array_remove', 'array_upper',
+    'array_lower', 'cardinality', 'unnest', 'generate_series', 'int4range', 'int8range', 'numrange', 'daterange',
+    'lower_inc', 'upper_inc', 'isempty', 'make_date', 'make_time', 'make_interval', 'jsonb_typeof',
+    'jsonb_array_length', 'jsonb_extract_path', 'jsonb_extract_path_text', 'jsonb_set', 'jsonb_strip_nulls',
+    'num_nonnulls', 'num_nulls', 'gcd', 'lcm', 'factorial',
+}
+STABLE_BUILTINS = {
+    'now', 'current_setting', 'to_char', 'to_date', 'to_timestamp', 'to_number', 'age', 'date_trunc', 'date_part',
+    'format', 'array_to_string', 'string_to_array', 'string_agg', 'array_agg', 'jsonb_agg', 'json_agg', 'count',
+    'sum', 'avg', 'min', 'max', 'bool_and', 'bool_or', 'row_number', 'rank', 'dense_rank', 'lag', 'lead',
+    'statement_timestamp', 'transaction_timestamp', 'has_table_privilege', 'pg_has_role', 'to_json',
+    'json_build_object', 'row_to_json', 'jsonb_object_agg', 'quote_nullable', 'current_schemas', 'make_timestamptz',
+    'concat', 'concat_ws', 'to_jsonb', 'jsonb_build_object', 'jsonb_build_array',
+}
+# Types whose input functions are immutable, casts to others depend on settings like TimeZone or on the catalog
+IMMUTABLE_CASTS = {
+    'smallint', 'int2', 'integer', 'int', 'int4', 'bigint', 'int8', 'numeric', 'decimal', 'real', 'float4',
+    'double precision', 'float8', 'float', 'boolean', 'bool', 'text', 'varchar', 'character varying', 'char',
+    'character', 'bpchar', 'name', 'uuid', 'bytea', 'json', 'jsonb',
+}
+# Keywords that can come right before a string literal without naming its type
+LITERAL_KEYWORDS = {
+    'select', 'return', 'returning', 'then', 'else', 'when', 'and', 'or', 'not', 'in', 'is', 'like', 'ilike',
+    'similar', 'to', 'from', 'by', 'as', 'default', 'raise', 'notice', 'warning', 'info', 'debug', 'log', 'exception',
+    'escape', 'e', 'u', 'b', 'x', 'n', 'using', 'values', 'between', 'distinct', 'all', 'any', 'some', 'into', 'where',
+    'on', 'having', 'limit', 'offset', 'set', 'union', 'except', 'intersect', 'with', 'case', 'end', 'null', 'if',
+    'elsif', 'perform', 'collate',
+}
+# Date and time types, their operators and text output depend on TimeZone, DateStyle and IntervalStyle
+TEMPORAL_TYPES = {'timestamptz', 'timetz', 'date', 'time', 'timestamp', 'interval'}
+# Volatile builtins that are still allowed in parallel workers
+RESTRICTED_BUILTINS = {'random', 'setseed', 'clock_timestamp', 'timeofday', 'gen_random_uuid', 'uuid_generate_v4'}
+UNSAFE_BUILTINS = {'nextval', 'setval', 'currval', 'lastval', 'set_config', 'pg_advisory_lock',
+                   'pg_advisory_xact_lock', 'pg_notify', 'txid_current', 'pg_current_xact_id', 'dblink', 'lo_import'}
+
+
+@dataclass
+class FunctionAdvice:
+    """
+    The volatility and parallel safety a Function declares and the ones its body allows.
+    """
+    function: object
+    volatility: str
+    parallel: str
+    reasons: list[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return (self.volatility, self.parallel) != (self.function.volatility, self.function.parallel)
+
+    def create_sql(self) -> str:
+        """
+        The create statement of the function with the advised declarations.
+        """
+        function = self.function
+        create = function.create.strip().rstrip(';').rstrip()
+        body = function._pattern_body.search(create)
+
+        def without_options(sql: str) -> str:
+            return function._pattern_parallel.sub('', function._pattern_volatility.sub('', sql))
+
+        head = re.sub(r'[ \t]+(?=\n)', '', without_options(create[:body.start()]))
+        head = re.sub(r'(?<=\S)[ \t]{2,}(?=\S)', ' ', head)
+        tail = ' '.join(without_options(create[body.end():]).split())
+        options = f"{self.volatility.upper()} PARALLEL {self.parallel.upper()}"
+        return f"{head}{body.group(0)}{' ' + tail if tail else ''} {options};"
+
+    def rewritten(self):
+        """
+        A copy of the Function item with the advised declarations.
+        """
+        return type(self.function)(create=self.create_sql(), comment=self.function.comment)
+
+
+def _strictest(levels: tuple[str, ...], *values: str) -> str:
+    return max(values, key=levels.index)
+
+
+def _function_names(function) -> list[str]:
+    names = [function.qualified_name]
+    if function.schema == 'public':
+        names.append(function.name)
+    return names
+
+
+def signature_types(function) -> set[str]:
+    """
+    The words of the argument and return types of a function, lowercased.
+    """
+    words = set()
+    for argument in function.arguments:
+        tokens = re.findall(r'[A-Za-z_]\w*', re.split(r'\bDEFAULT\b|:=|=', argument, flags=re.IGNORECASE)[0].lower())
+        words.update(tokens if len(tokens) == 1 else tokens[1:])
+    match = RETURN_TYPE.search(function.options)
+    if match:
+        words.update(re.findall(r'[A-Za-z_]\w*', match.group(1).lower()))
+    return words
+
+
+def infer(function, known: dict[str, tuple[str, str]]) -> tuple[str, str, list[str]] | None:
+    """
+    The volatility and parallel safety the body of a SQL or PL/pgSQL function allows and why,
+    given the volatility and parallel safety of the other functions by name.  None when the
+    body calls something unknown, runs dynamic SQL or casts to a type, or writes a literal of
+    a type, whose input depends on settings.  Functions taking or returning dates and times
+    are at most stable.
+    """
+    if function.language not in ('sql', 'plpgsql') or function.body is None:
+        return None
+    if TRIGGER_FUNCTION.search(function.options):
+        return None
+    body = STRINGS.sub("''", COMMENTS.sub('', function.body))
+    volatility, parallel, reasons = 'immutable', 'safe', []
+
+    if DYNAMIC.search(body) and function.language == 'plpgsql':
+        return None
+    for cast in CASTS.findall(body):
+        type_name = ' '.join((cast[0] or cast[1]).lower().split())
+        if type_name.startswith('pg_catalog.'):
+            type_name = type_name[len('pg_catalog.'):]
+        if type_name not in IMMUTABLE_CASTS:
+            return None
+    for literal in TYPED_LITERALS.findall(body):
+        type_name = ' '.join(literal.lower().split())
+        if type_name.startswith('pg_catalog.'):
+            type_name = type_name[len('pg_catalog.'):]
+        if type_name not in LITERAL_KEYWORDS and type_name not in IMMUTABLE_CASTS:
+            return None
+    if signature_types(function) & TEMPORAL_TYPES:
+        volatility = 'stable'
+        reasons.append("takes or returns dates and times")
+    if WRITE_PATTERN.search(body) or COMMANDS.search(body):
+        volatility, parallel = 'volatile', 'unsafe'
+        reasons.append("writes or runs DDL")
+    if TEMP_TABLE.search(body):
+        parallel = 'unsafe'
+        reasons.append("uses temporary tables")
+    if function.language == 'plpgsql' and SUBTRANSACTION.search(body):
+        parallel = 'unsafe'
+        reasons.append("starts subtransactions with EXCEPTION blocks")
+
+    relations = {relation.lower() for relation in RELATIONS.findall(body)} - NOT_CALLS
+    if relations:
+        volatility = _strictest(VOLATILITY, volatility, 'stable')
+        reasons.append(f"reads {', '.join(sorted(relations))}")
+    if STABLE_VALUES.search(body):
+        volatility = _strictest(VOLATILITY, volatility, 'stable')
+        reasons.append("uses the current time, user or schema")
+
+    for call in sorted({call.lower() for call in CALLS.findall(body)} - NOT_CALLS):
+        name = call.split('.')[-1] if call.startswith('pg_catalog.') else call
+        if name in known:
+            called_volatility, called_parallel = known[name]
+            volatility = _strictest(VOLATILITY, volatility, called_volatility)
+            parallel = _strictest(PARALLEL, parallel, called_parallel)
+            if (called_volatility, called_parallel) != ('immutable', 'safe'):
+                reasons.append(f"calls {name} ({called_volatility}, parallel {called_parallel})")
+        elif name in IMMUTABLE_BUILTINS:
+            continue
+        elif name in STABLE_BUILTINS:
+            volatility = _strictest(VOLATILITY, volatility, 'stable')
+            reasons.append(f"calls {name}")
+        elif name in RESTRICTED_BUILTINS:
+            volatility, parallel = 'volatile', _strictest(PARALLEL, parallel, 'restricted')
+            reasons.append(f"calls {name}")
+        elif name in UNSAFE_BUILTINS:
+            volatility, parallel = 'volatile', 'unsafe'
+            reasons.append(f"calls {name}")
+        else:
+            return None
+    return volatility, parallel, reasons
+
+
+def advise_functions(functions: list) -> list[FunctionAdvice]:
+    """
+    Infer the volatility and parallel safety of SQL and PL/pgSQL functions in load order and
+    return advice for the functions that declare something else.  Functions calling other
+    registered functions use their inferred, or else declared, settings.
+    """
+    known = {}
+    advice = []
+    for function in functions:
+        inferred = infer(function, known)
+        if inferred is None:
+            settings = (function.volatility, function.parallel)
+        else:
+            settings = inferred[:2]
+            function_advice = FunctionAdvice(function, *inferred)
+            if function_advice.changed:
+                advice.append(function_advice)
+        for name in _function_names(function):
+            known[name] = settings
+    return advice
@@ -0,0 +1,79 @@
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Batches:
+    """
+    Settings for running a statement over a table in chunks of keys and the progress made.
+
+    The chunk size adapts to target_seconds per chunk within min_chunk_size and
+    max_chunk_size.  With max_replication_lag set, each chunk waits until the replication
+    lag reported by pg_stat_replication drops below it.
+    """
+    chunk_size: int = 1000
+    target_seconds: float = None
+    min_chunk_size: int = 100
+    max_chunk_size: int = 100000
+    max_replication_lag: float = None
+    lag_poll_seconds: float = 1.0
+    chunks: int = field(default=0, init=False)
+    rows: int = field(default=0, init=False)
+    lag_wait: float = field(default=0.0, init=False)
+
+    def adapt(self, elapsed: float):
+        """
+        Scale the chunk size towards the target latency, at most doubling or halving it.
+        """
+        if not self.target_seconds:
+            return
+        factor = min(2.0, max(0.5, self.target_seconds / max(elapsed, 0.001)))
+        self.chunk_size = min(self.max_chunk_size, max(self.min_chunk_size, int(self.chunk_size * factor)))
+
+
+def replication_lag(cursor) -> float:
+    """
+    The largest replay lag of the connected replicas in seconds.
+    """
+    cursor.execute("SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag)), 0) FROM pg_stat_replication")
+    return float(cursor.fetchone()[0])
+
+
+def wait_for_replicas(cursor, batches: Batches):
+    started = time.monotonic()
+    while replication_lag(cursor) > batches.max_replication_lag:
+        time.sleep(batches.lag_poll_seconds)
+    batches.lag_wait += time.monotonic() - started
+
+
+def run_in_batches(cursor, table: str, key: str, sql: str, batches: Batches = None) -> Batches:
+    """
+    Page through table by key and run sql once per chunk, committing after every chunk.
+
+    The sql receives the first and last key of the chunk as the start and end parameters:
+
+        UPDATE material SET name = lower(name) WHERE id BETWEEN %(start)s AND %(end)s
+    """
+    batches = batches or Batches()
+    last = None
+    while True:
+        if batches.max_replication_lag is not None:
+            wait_for_replicas(cursor, batches)
+
+        where = f"WHERE {key} > %s " if last is not None else ""
+        cursor.execute(
+            f"SELECT MIN({key}), MAX({key}) FROM (SELECT {key} FROM {table} {where}ORDER BY {key} LIMIT %s) AS chunk",
+            (last, batches.chunk_size) if last is not None else (batches.chunk_size,)
+        )
+        start, end = cursor.fetchone()
+        if end is None:
+            return batches
+
+        started = time.monotonic()
+        cursor.execute(sql, {'start': start, 'end': end})
+        batches.rows += max(cursor.rowcount, 0)
+        cursor.connection.commit()
+        batches.adapt(time.monotonic() - started)
+
+        batches.chunks += 1
+        last = end
@@ -1,50 +1,277 @@
+from __future__ import annotations
+
+import random
+import re
+import time
+from dataclasses import dataclass, field
+
 from . import schema
 
 
+LOCK_NOT_AVAILABLE = '55P03'
+
+
+@dataclass
+class OnlineDDL:
+    """
+    Settings for executing DDL online and the time spent waiting on locks while doing so.
+    """
+    lock_timeout: str = '2s'
+    retries: int = 5
+    backoff: float = 0.5
+    max_backoff: float = 30.0
+    lock_wait: float = field(default=0.0, init=False)
+    lock_timeouts: int = field(default=0, init=False)
+
+    def delay(self, attempt: int) -> float:
+        """
+        Full jitter exponential backoff for the given attempt.
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+@dataclass
+class AnalyzeTables:
+    """
+    Settings for running ANALYZE on the tables written by migrations and seeds and the
+    results of doing so.
+
+    The tables are found by parsing the migrations and from the table statistics
+    changes of at least min_changes rows.  ANALYZE runs on up to workers connections and no
+    new ANALYZE starts once budget seconds have passed.
+    """
+    workers: int = 4
+    budget: float = None
+    min_changes: int = 1
+    tables: set[str] = field(default_factory=set)
+    changes: dict[str, int] = field(default_factory=dict, init=False)
+    analyzed: dict[str, float] = field(default_factory=dict, init=False)
+    skipped: list[str] = field(default_factory=list, init=False)
+
+    @property
+    def pending(self) -> list[str]:
+        """
+        The tables still to analyze, the most changed first.
+        """
+        tables = self.tables - self.analyzed.keys() - set(self.skipped)
+        return sorted(tables, key=lambda table: (-self.changes.get(table, 0), table))
+
+
+@dataclass
+class Throwaway:
+    """
+    Settings for bootstrapping a throwaway database, for CI or preview environments, where
+    speed matters more than durability.
+
+    Tables are created UNLOGGED, comments are skipped, synchronous_commit is off and every
+    item is created in a single transaction.  The server is checked first: the name of the
+    database has to match database_pattern, it can't have streaming replicas and with hosts
+    set the server address has to be one of them (None for a Unix socket).
+    """
+    database_pattern: str = r'(?:^|[_-])(?:test|ci|preview|tmp|scratch|throwaway)(?:[_-]|\d|$)'
+    hosts: tuple[str | None, ...] = None
+    unlogged: bool = True
+    skip_comments: bool = True
+
+
+def check_throwaway(cursor, throwaway: Throwaway):
+    """
+    Raise a ValueError unless the connected database looks like a throwaway database.
+    """
+    cursor.execute("SELECT current_database(), host(inet_server_addr()), (SELECT count(*) FROM pg_stat_replication)")
+    database, host, replicas = cursor.fetchone()
+    if not re.search(throwaway.database_pattern, database, re.IGNORECASE):
+        raise ValueError(f"Refusing throwaway create: database '{database}' doesn't match "
+                         f"'{throwaway.database_pattern}'")
+    if replicas:
+        raise ValueError(f"Refusing throwaway create: database '{database}' has {replicas} replicas")
+    if throwaway.hosts is not None and host not in throwaway.hosts:
+        raise ValueError(f"Refusing throwaway create: host '{host}' isn't one of {throwaway.hosts}")
+
+
+def throwaway_script(load_order: list[schema.DatabaseItem | list[schema.DatabaseItem]], throwaway: Throwaway,
+                     exists=False, logged: set[str] = frozenset()) -> str:
+    """
+    A single transaction that creates every item in the load order.  Tables that aren't in
+    logged are UNLOGGED and the ALTER statements of the tables run after all the creates.
+    Indexes are built without CONCURRENTLY, which can't run inside a transaction.
+    """
+    creates = []
+    alters = []
+    for item in _flatten(load_order):
+        parts = item.full_sql(exists=exists).split("\n\n")
+        if item.comment and throwaway.skip_comments:
+            parts = [part for part in parts if part != item.comment.strip()]
+        if isinstance(item, (schema.Index, schema.MaterializedView)):
+            parts = [re.sub(r'(CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?)CONCURRENTLY\s+', r'\1', part,
+                            flags=re.IGNORECASE) for part in parts]
+        if isinstance(item, schema.Table):
+            if item.alter:
+                parts = [part for part in parts if part != item.alter.strip()]
+                alters.append(item.alter.strip())
+            if throwaway.unlogged and item.qualified_name not in logged:
+                parts[0] = re.sub(r'^CREATE\s+TABLE', 'CREATE UNLOGGED TABLE', parts[0], count=1, flags=re.IGNORECASE)
+        creates.append("\n\n".join(parts))
+    return "\n\n".join(["BEGIN;", *creates, *alters, "COMMIT;"])
+
+
+def is_lock_timeout(error: Exception) -> bool:
+    """
+    Check if an error raised by the driver is a lock_timeout (SQLSTATE 55P03).
+    """
+    sqlstate = getattr(error, 'sqlstate', None) or getattr(error, 'pgcode', None)
+    return sqlstate == LOCK_NOT_AVAILABLE
+
+
+def execute_online(cursor, online: OnlineDDL, *statements: str | tuple[str, tuple]):
+    """
+    Execute statements in their own transaction with a short lock_timeout.
+
+    Statements are SQL strings or (sql, params) tuples.  When the lock can't be acquired
+    the transaction is rolled back and retried with jittered backoff.
+    """
+    connection = cursor.connection
+    for attempt in range(online.retries + 1):
+        started = time.monotonic()
+        try:
+            cursor.execute(f"SET lock_timeout = '{online.lock_timeout}';")
+            for statement in statements:
+                if isinstance(statement, tuple):
+                    cursor.execute(*statement)
+                else:
+                    cursor.execute(statement)
+            cursor.execute("RESET lock_timeout;")
+            connection.commit()
+            return
+        except Exception as error:
+            connection.rollback()
+            if not is_lock_timeout(error) or attempt == online.retries:
+                raise
+            online.lock_wait += time.monotonic() - started
+            online.lock_timeouts += 1
+            time.sleep(online.delay(attempt))
+
+
 def create_schema_items_in_transaction(schema_items: list[schema.DatabaseItem], exists=False) -> str:
     """
     Create schema items within a single transaction.
     """
     sql_parts = ["BEGIN;"]
+    alters = []
 
-    # First, create all schema items and add comments
+    # First, create all schema items with their comments and other statements, like the indexes of materialized views
     for item in schema_items:
-        # Get the SQL parts of each item
         full_sql_parts = item.full_sql(exists=exists).split("\n\n")
-        # Append only the CREATE TABLE statements (and comments if any)
-        sql_parts.append(full_sql_parts[0])
-        if item.comment:
-            sql_parts.append(full_sql_parts[1])
+        if isinstance(item, schema.Table) and item.alter:
+            # The ALTER TABLE statements run after every item is created
+            full_sql_parts = [part for part in full_sql_parts if part != item.alter.strip()]
+            alters.append(item.alter.strip())
+        sql_parts.extend(full_sql_parts)
 
     # Then, add the ALTER TABLE statements for tables
-    for item in schema_items:
-        if isinstance(item, schema.Table) and item.alter:
-            # Get the SQL parts of each item
-            full_sql_parts = item.full_sql(exists=exists).split("\n\n")
-            # Append only the ALTER TABLE statements
-            if len(full_sql_parts) > 2:
-                sql_parts.append(full_sql_parts[2])
+    sql_parts.extend(alters)
 
     sql_parts.append("COMMIT;")
 
     return "\n\n".join(sql_parts)
 
 
-def create_items(load_order: list[schema.DatabaseItem | list[schema.DatabaseItem]], cursor, exists=False):
+def create_items(load_order: list[schema.DatabaseItem | list[schema.DatabaseItem]], cursor, exists=False,
+                 online: OnlineDDL = None):
     """
     Create database items in a specified load order.
+
+    In online mode every item or group is executed in its own transaction with a short lock_timeout.
     """
     for item_or_group in load_order:
         if isinstance(item_or_group, list):
             # For related tables or functions, create them within a single transaction
-            transaction_sql = create_schema_items_in_transaction(item_or_group, exists=exists)
-            cursor.execute(transaction_sql)
+            sql = create_schema_items_in_transaction(item_or_group, exists=exists)
         elif isinstance(item_or_group, schema.DatabaseItem):
             # For tables and functions, execute the full_sql
-            cursor.execute(item_or_group.full_sql(exists=exists))
+            sql = item_or_group.full_sql(exists=exists)
         else:
             raise ValueError(f"Unsupported type in load_order: {type(item_or_group)}")
 
+        if online:
+            execute_online(cursor, online, sql)
+        else:
+            cursor.execute(sql)
+
+
+COMPRESSION_METHODS = {'p': 'pglz', 'l': 'lz4', '': 'default'}
+STORAGE_MODES = {'p': 'plain', 'e': 'external', 'm': 'main', 'x': 'extended'}
+
+
+def current_storage(cursor, tables: list[str]) -> tuple[dict[str, dict[str, str]], dict[str, dict[str, dict]]]:
+    """
+    The storage parameters of the tables from pg_class.reloptions, with the ones of their
+    TOAST tables prefixed by toast., and the compression and storage of their columns.
+    Column compression exists from PostgreSQL 14 on, older servers report the default.
+    """
+    cursor.execute(
+        """
+        SELECT n.nspname || '.' || c.relname, c.reloptions, t.reloptions, current_setting('server_version_num')::int
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_class t ON t.oid = c.reltoastrelid
+        WHERE n.nspname || '.' || c.relname = ANY(%s)
+        """,
+        (tables,)
+    )
+    options = {}
+    version = None
+    for table, reloptions, toast_reloptions, version in cursor.fetchall():
+        options[table] = dict(option.split('=', 1) for option in reloptions or [])
+        options[table].update((f"toast.{key}", value) for key, value in (
+            option.split('=', 1) for option in toast_reloptions or []))
+    if version is None:
+        # none of the tables exist yet
+        return options, {}
+
+    compression = 'a.attcompression' if version >= 140000 else 'NULL'
+    cursor.execute(
+        f"""
+        SELECT n.nspname || '.' || c.relname, a.attname, {compression}, a.attstorage
+        FROM pg_attribute a
+        JOIN pg_class c ON c.oid = a.attrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname || '.' || c.relname = ANY(%s) AND a.attnum > 0 AND NOT a.attisdropped
+        """,
+        (tables,)
+    )
+    columns = {}
+    for table, column, compression, storage in cursor.fetchall():
+        columns.setdefault(table, {})[column] = {
+            'compression': COMPRESSION_METHODS.get(compression or '', compression),
+            'storage': STORAGE_MODES.get(storage, storage),
+        }
+    return options, columns
+
+
+def apply_storage(load_order: list[schema.DatabaseItem | list[schema.DatabaseItem]], cursor,
+                  online: OnlineDDL = None) -> list[str]:
+    """
+    Apply the declared storage parameters and column storage of the tables in the load
+    order where they differ from the database and return the statements run.
+    """
+    tables = [
+        item for item in _flatten(load_order)
+        if isinstance(item, schema.Table) and (item.storage is not None or item.column_storage)
+    ]
+    if not tables:
+        return []
+    options, columns = current_storage(cursor, [table.qualified_name for table in tables])
+    statements = []
+    for table in tables:
+        statements.extend(table.storage_sql(options.get(table.qualified_name), columns.get(table.qualified_name)))
+    for statement in statements:
+        if online:
+            execute_online(cursor, online, statement)
+        else:
+            cursor.execute(statement)
+    return statements
+
 
 def create_extensions(extensions: list[str], cursor):
     """
@@ -52,3 +279,63 @@ def create_extensions(extensions: list[str], cursor):
     """
     for extension in extensions:
         cursor.execute(f'CREATE EXTENSION IF NOT EXISTS "{extension}";')
+
+
+def _flatten(load_order: list[schema.DatabaseItem | list[schema.DatabaseItem]]) -> list[schema.DatabaseItem]:
+    items = []
+    for item_or_group in load_order:
+        items.extend(item_or_group if isinstance(item_or_group, list) else [item_or_group])
+    return items
+
+
+def load_seed(table: schema.Table, cursor):
+    """
+    Stream the seed data of a table through COPY.
+
+    With upsert the data is copied into a temporary staging table and merged into the
+    table with INSERT ... ON CONFLICT on the upsert columns.
+    """
+    seed = table.seed
+    columns = seed.columns or table.columns
+    column_list = ", ".join(columns)
+    target = table.qualified_name
+
+    if seed.upsert:
+        target = f"_postnormalism_seed_{table.name}"
+        cursor.execute(f"CREATE TEMP TABLE {target} (LIKE {table.qualified_name} INCLUDING DEFAULTS);")
+
+    with cursor.copy(f"COPY {target} ({column_list}) FROM STDIN{seed.copy_options()}") as copy:
+        if seed.is_csv:
+            for chunk in seed.chunks():
+                copy.write(chunk)
+        else:
+            if seed.types:
+                copy.set_types(seed.types)
+            for row in seed.rows():
+                copy.write_row(row)
+
+    if seed.upsert:
+        updates = [column for column in columns if column not in seed.upsert]
+        conflict = "DO UPDATE SET " + ", ".join(f"{column} = EXCLUDED.{column}" for column in updates) \
+            if updates else "DO NOTHING"
+        cursor.execute(
+            f"INSERT INTO {table.qualified_name} ({column_list}) SELECT {column_list} FROM {target} "
+            f"ON CONFLICT ({', '.join(seed.upsert)}) {conflict};"
+        )
+        cursor.execute(f"DROP TABLE {target};")
+
+
+def create_seeds(load_order: list[schema.DatabaseItem | list[schema.DatabaseItem]], cursor, exists=False) -> list[str]:
+    """
+    Load the seed data of every table in the load order and return the seeded tables.
+
+    In exists mode only seeds that upsert are loaded since the others would insert duplicates.
+    """
+    seeded = []
+    for item in _flatten(load_order):
+        if isinstance(item, schema.Table) and item.seed:
+            if exists and not item.seed.upsert:
+                continue
+            load_seed(item, cursor)
+            seeded.append(item.qualified_name)
+    return seeded
@@ -1,9 +1,33 @@
-from .database_item import DatabaseItem
-from .domain import Domain
-from .schema import Schema
-from .function import Function
-from .table import Table
-from .view import View
-from .trigger import Trigger
-from .migrations import PostnormalismMigrations
-from .database import Database
+import importlib
+
+# Items are imported on first use so that short lived processes only pay for what they touch
+_MODULES = {
+    'DatabaseItem': 'database_item',
+    'Domain': 'domain',
+    'Schema': 'schema',
+    'Function': 'function',
+    'Seed': 'seed',
+    'Table': 'table',
+    'PartitionedTable': 'partitioned_table',
+    'View': 'view',
+    'MaterializedView': 'materialized_view',
+    'Trigger': 'trigger',
+    'Index': 'index',
+    'PostnormalismMigrations': 'migrations',
+    'PostnormalismMigrationCheckpoints': 'migrations',
+    'Database': 'database',
+}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_MODULES[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
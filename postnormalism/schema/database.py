@@ -1,8 +1,25 @@
+import importlib.util
 import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass, field
+from typing import Callable
+from datetime import date
 
-from ..core import create_items, create_extensions
-from . import DatabaseItem, PostnormalismMigrations, Schema, Table
+from .. import analysis
+from ..core import (AnalyzeTables, OnlineDDL, Throwaway, _flatten, apply_storage, check_throwaway, create_items,
+                    create_extensions, create_seeds, current_storage, execute_online, throwaway_script)
+from ..utils import COMMENTS, parse_written_tables, split_statements
+from . import migrations
+from .database_item import DatabaseItem
+from .materialized_view import MaterializedView
+from .partitioned_table import PartitionedTable
+from .schema import Schema
+from .table import Table
+
+TRANSACTION_CONTROL = re.compile(r'^\s*(BEGIN|COMMIT|END|START\s+TRANSACTION)\b', re.IGNORECASE)
 
 
 class SchemaProxy:
@@ -30,7 +47,13 @@ class Database:
     load_order: list[DatabaseItem | list[DatabaseItem]] = field(default_factory=list)
     extensions: list[str] = field(default_factory=list)
     verbose: bool = field(default=False)
+    dsn: str = field(default=None, repr=False)
+    connection_factory: Callable = field(default=None, repr=False)
+    pool: object = field(default=None, repr=False)
+    session_settings: dict[str, str] = field(default_factory=dict)
+    create_settings: dict[str, str] = field(default_factory=dict)
     _schema_contents: dict[str, dict[str, DatabaseItem]] = field(default_factory=dict, init=False)
+    _reset_sql: dict[tuple, str] = field(default_factory=dict, init=False, repr=False)
 
     def __post_init__(self):
         self.items_by_type = {}
@@ -87,13 +110,15 @@ class Database:
             if self.verbose:
                 print(f"Registered schemas: {self._schema_contents.keys()}")
 
-            item_type = item_type.lower()
+            item_type = (item.itype or item_type).lower()
             if item_type not in self.items_by_type:
                 self.items_by_type[item_type] = []
             self.items_by_type[item_type].append(item)
 
     def get_items_by_type(self, item_type: str) -> list:
-        allowed_database_items = ["table", "function", "schema", "view", "trigger", "domain"]
+        allowed_database_items = [
+            "table", "function", "schema", "view", "materialized_view", "trigger", "domain", "index"
+        ]
         item_type = item_type.lower()
         if item_type not in allowed_database_items:
             raise ValueError(f"Invalid item_type: {item_type}")
@@ -122,15 +147,513 @@ class Database:
         return SchemaProxy(self._schema_contents[schema_name])
 
 
-    def create(self, cursor, exists=False):
+    @property
+    def can_connect(self) -> bool:
+        return bool(self.dsn or self.connection_factory or self.pool is not None)
+
+    def connect(self):
+        """
+        Open a new connection with the connection factory or the DSN.
+        """
+        if self.connection_factory:
+            return self.connection_factory()
+        if self.dsn:
+            import psycopg  # optional dependency, only needed for DSNs
+            return psycopg.connect(self.dsn)
+        raise ValueError("Database needs a dsn, connection_factory or pool to open connections.")
+
+    @contextmanager
+    def connection(self, connect: Callable = None):
+        """
+        A connection from the pool, the connect callable, the connection factory or the DSN with
+        the session settings applied.  Commits when the block succeeds and rolls back otherwise.
+        """
+        if connect is None and self.pool is not None:
+            with self.pool.connection() as connection:
+                self.apply_settings(connection.cursor(), self.session_settings)
+                try:
+                    yield connection
+                except BaseException:
+                    connection.rollback()
+                    raise
+                finally:
+                    # pooled connections are shared so put the settings back
+                    self.reset_settings(connection.cursor(), self.session_settings)
+            return
+
+        connection = (connect or self.connect)()
+        try:
+            self.apply_settings(connection.cursor(), self.session_settings)
+            yield connection
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    @staticmethod
+    def apply_settings(cursor, settings: dict[str, str]):
+        for name, value in settings.items():
+            cursor.execute("SELECT set_config(%s, %s, false)", (name, str(value)))
+
+    @staticmethod
+    def reset_settings(cursor, settings: dict[str, str] | list[str]):
+        for name in settings:
+            cursor.execute(f"RESET {name};")
+
+    def restore_settings(self, cursor, settings: dict[str, str]):
+        """
+        Put the settings back to the session settings of the Database, or to the server
+        defaults for the ones it doesn't set.
+        """
+        self.reset_settings(cursor, [name for name in settings if name not in self.session_settings])
+        self.apply_settings(cursor, {name: value for name, value in self.session_settings.items() if name in settings})
+
+    def create(self, cursor=None, exists=False, online: OnlineDDL = None, analyze: AnalyzeTables = None,
+               throwaway: Throwaway = None):
+        """
+        Apply migrations, create extensions and create the items in load order.
+
+        Without a cursor the Database opens one connection and uses it for every phase.  The
+        declared storage parameters that differ from pg_class are applied after the items.  With
+        analyze the tables written by migrations and seeds are analyzed afterwards.  With
+        throwaway the items are created UNLOGGED in one transaction, after checking that
+        the database is a throwaway database.
+        """
+        if cursor is None:
+            with self.connection() as connection:
+                self.create(connection.cursor(), exists=exists, online=online, analyze=analyze, throwaway=throwaway)
+            return
+
+        create_settings = self.create_settings
+        if throwaway:
+            if online:
+                raise ValueError("A throwaway create can't run online.")
+            check_throwaway(cursor, throwaway)
+            create_settings = {**create_settings, 'synchronous_commit': 'off'}
+
+        self.apply_settings(cursor, create_settings)
+        if online:
+            # online execution rolls back the attempts that time out, which would undo uncommitted settings
+            cursor.connection.commit()
         if self.migrations_folder:
             # Check if the migrations table exists in the database and create it if needed
-            if not self.check_table_exists(cursor, PostnormalismMigrations.name):
-                cursor.execute(str(PostnormalismMigrations.create))
-            self.apply_migrations(cursor)  # Apply pending migrations
+            if not self.check_table_exists(cursor, migrations.PostnormalismMigrations.name):
+                cursor.execute(str(migrations.PostnormalismMigrations.create))
+            self.apply_migrations(cursor, online=online, analyze=analyze)  # Apply pending migrations
 
         create_extensions(self.extensions, cursor)
-        create_items(self.load_order, cursor, exists=exists)
+        if throwaway:
+            cursor.execute(throwaway_script(self.load_order, throwaway, exists=exists, logged=self.logged_tables()))
+        else:
+            create_items(self.load_order, cursor, exists=exists, online=online)
+        apply_storage(self.load_order, cursor, online=online)
+        self.maintain_partitions(cursor)
+        seeded = create_seeds(self.load_order, cursor, exists=exists)
+        self.restore_settings(cursor, create_settings)
+        if analyze and seeded:
+            analyze.tables.update(seeded)
+            self.analyze_tables(cursor, analyze)
+
+        if online and self.verbose:
+            print(f"Waited {online.lock_wait:.3f}s on locks ({online.lock_timeouts} lock timeouts).")
+
+    def reset_sql(self, skip_seeded=False, skip: tuple[str, ...] = ()) -> str | None:
+        """
+        The TRUNCATE statement for every registered table, grouped by schema, rendered once
+        per set of skipped tables.  Tables with seed data are skipped with skip_seeded.
+        """
+        key = (skip_seeded, tuple(sorted(skip)))
+        if key not in self._reset_sql:
+            skipped = {name if '.' in name else f"public.{name}" for name in (name.lower() for name in skip)}
+            tables = sorted(
+                (table.schema, table.name) for table in self.get_items_by_type("table")
+                if table.qualified_name not in skipped and not (skip_seeded and table.seed)
+            )
+            self._reset_sql[key] = (
+                f"TRUNCATE TABLE {', '.join(f'{schema}.{name}' for schema, name in tables)} RESTART IDENTITY CASCADE;"
+                if tables else None
+            )
+        return self._reset_sql[key]
+
+    def reset(self, cursor, skip_seeded=False, skip: tuple[str, ...] = ()):
+        """
+        Empty every registered table and restart their sequences with a single TRUNCATE, for
+        resetting the state between tests.  CASCADE also empties tables outside the ones
+        truncated that reference them.
+        """
+        sql = self.reset_sql(skip_seeded=skip_seeded, skip=skip)
+        if sql:
+            cursor.execute(sql)
+
+    def logged_tables(self) -> set[str]:
+        """
+        The tables that can't be UNLOGGED: partitioned tables and the tables that logged
+        tables reference with foreign keys.
+        """
+        from ..analysis.foreign_keys import foreign_keys
+
+        tables = self.get_items_by_type("table")
+        references = {
+            table.qualified_name: {
+                reference if '.' in reference else f"public.{reference}" for _, reference in foreign_keys(table)
+            }
+            for table in tables
+        }
+        logged = set()
+        pending = [table.qualified_name for table in tables if isinstance(table, PartitionedTable)]
+        while pending:
+            table = pending.pop()
+            if table not in logged:
+                logged.add(table)
+                pending.extend(references.get(table, ()))
+        return logged
+
+    @staticmethod
+    def table_modifications(cursor) -> dict[str, int]:
+        """
+        The rows inserted, updated and deleted per table, including the writes of the open
+        transaction and the ones of this connection that aren't flushed to the shared
+        statistics yet.
+
+        pg_stat_user_tables only holds the flushed counts and pg_stat_xact_user_tables the
+        pending ones of this connection, so the sum of both is exact on PostgreSQL 15 and
+        later.  Before 15 the statistics collector applies flushed counts asynchronously and
+        writes committed a moment ago can be missing.
+        """
+        cursor.execute(
+            """
+            DO $$ BEGIN
+                IF current_setting('server_version_num')::int >= 150000 THEN
+                    PERFORM pg_stat_force_next_flush();
+                END IF;
+            END $$
+            """
+        )
+        cursor.execute("SELECT pg_stat_clear_snapshot()")
+        cursor.execute(
+            """
+            SELECT s.schemaname || '.' || s.relname,
+                   s.n_tup_ins + s.n_tup_upd + s.n_tup_del + x.n_tup_ins + x.n_tup_upd + x.n_tup_del
+            FROM pg_stat_user_tables s
+            JOIN pg_stat_xact_user_tables x USING (relid)
+            """
+        )
+        return dict(cursor.fetchall())
+
+    def track_modifications(self, cursor, analyze: AnalyzeTables, before: dict[str, int]):
+        """
+        Add the tables with at least min_changes modifications since before to the tables to analyze.
+        """
+        for table, modifications in self.table_modifications(cursor).items():
+            changes = modifications - before.get(table, 0)
+            if changes >= analyze.min_changes:
+                analyze.changes[table] = analyze.changes.get(table, 0) + changes
+                analyze.tables.add(table)
+
+    def analyze_tables(self, cursor=None, analyze: AnalyzeTables = None, connect=None) -> AnalyzeTables:
+        """
+        ANALYZE the pending tables of analyze, the most changed first, and record the seconds
+        spent on each.
+
+        When the Database can open connections, or with a connect callable, the work of the
+        cursor is committed and the tables are analyzed in parallel, each on its own connection.
+        Otherwise they are analyzed one after another on the cursor.  Tables that would start
+        after the budget are skipped.
+        """
+        analyze = analyze or AnalyzeTables()
+        parallel = connect is not None or self.can_connect
+        if cursor is None and not parallel:
+            raise ValueError("A cursor or a connect callable is required to analyze tables.")
+
+        tables = analyze.pending
+        if not tables:
+            return analyze
+        started = time.monotonic()
+
+        def remaining() -> float | None:
+            return None if analyze.budget is None else analyze.budget - (time.monotonic() - started)
+
+        if parallel:
+            if cursor is not None:
+                # the other connections have to see the written rows
+                cursor.connection.commit()
+            with ThreadPoolExecutor(max_workers=analyze.workers) as executor:
+                results = executor.map(lambda table: self._analyze_on_connection(table, connect, remaining()), tables)
+                for table, seconds in zip(tables, results):
+                    if seconds is None:
+                        analyze.skipped.append(table)
+                    else:
+                        analyze.analyzed[table] = seconds
+        else:
+            for table in tables:
+                if analyze.budget is not None and remaining() <= 0:
+                    analyze.skipped.append(table)
+                    continue
+                table_started = time.monotonic()
+                cursor.execute(f"ANALYZE {table};")
+                analyze.analyzed[table] = time.monotonic() - table_started
+
+        if self.verbose:
+            print(f"Analyzed {len(analyze.analyzed)} tables, skipped {len(analyze.skipped)} over the budget.")
+        return analyze
+
+    def _analyze_on_connection(self, table: str, connect, remaining: float = None) -> float | None:
+        if remaining is not None and remaining <= 0:
+            return None
+        with self.connection(connect) as connection:
+            started = time.monotonic()
+            connection.cursor().execute(f"ANALYZE {table};")
+        return time.monotonic() - started
+
+    @contextmanager
+    def bulk_load(self, cursor, tables: list[str | Table], drop_indexes=False, analyze: AnalyzeTables = None):
+        """
+        Load data into tables without the overhead of their registered triggers and indexes.
+
+        The registered triggers on the tables are disabled, deferrable constraints are set
+        DEFERRED and with drop_indexes the registered non unique indexes are dropped.  After
+        the block the indexes are rebuilt, the triggers enabled and the constraints checked
+        with SET CONSTRAINTS ALL IMMEDIATE.  When the block fails the transaction is rolled
+        back and everything is restored and committed before the error is raised again.
+        With analyze the tables are analyzed after a successful load.
+        """
+        names = {table.qualified_name if isinstance(table, Table) else table.lower() for table in tables}
+        names = {name if '.' in name else f"public.{name}" for name in names}
+        triggers = [trigger for trigger in self.get_items_by_type("trigger") if trigger.table in names]
+        indexes = [
+            index for index in self.get_items_by_type("index")
+            if drop_indexes and index.table in names and not index.unique
+        ]
+
+        restore = [
+            re.sub(r'\s+CONCURRENTLY\b', '', index.full_sql(exists=True), flags=re.IGNORECASE) for index in indexes
+        ] + [f"ALTER TABLE {trigger.table} ENABLE TRIGGER {trigger.name};" for trigger in triggers]
+
+        try:
+            for trigger in triggers:
+                cursor.execute(f"ALTER TABLE {trigger.table} DISABLE TRIGGER {trigger.name};")
+            cursor.execute("SET CONSTRAINTS ALL DEFERRED;")
+            for index in indexes:
+                cursor.execute(f"DROP INDEX IF EXISTS {index.qualified_name};")
+            yield
+        except BaseException:
+            # the rollback undoes the current transaction, restoring covers what the block committed
+            cursor.connection.rollback()
+            for statement in restore:
+                cursor.execute(statement)
+            cursor.connection.commit()
+            raise
+
+        for statement in restore:
+            cursor.execute(statement)
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE;")
+        if self.verbose:
+            print(f"Bulk load restored {len(triggers)} triggers and {len(indexes)} indexes.")
+        if analyze:
+            analyze.tables.update(names)
+            self.analyze_tables(cursor, analyze)
+
+    def plan_refresh(self) -> list[list[MaterializedView]]:
+        """
+        Group the materialized views into refresh levels.  Views in a level only depend on
+        views in earlier levels so every view within a level can be refreshed in parallel.
+        """
+        views = {view.qualified_name: view for view in self.get_items_by_type("materialized_view")}
+        depends_on = {name: view.relations & views.keys() - {name} for name, view in views.items()}
+
+        levels = []
+        refreshed = set()
+        while len(refreshed) < len(views):
+            level = [name for name in views if name not in refreshed and depends_on[name] <= refreshed]
+            if not level:
+                cycle = sorted(set(views) - refreshed)
+                raise ValueError(f"Circular dependency between materialized views: {cycle}")
+            levels.append([views[name] for name in level])
+            refreshed.update(level)
+        return levels
+
+    def refresh_materialized_views(self, cursor=None, connect=None, workers: int = 4,
+                                   concurrently: bool = None) -> dict[str, float]:
+        """
+        Refresh the materialized views in dependency order and return the seconds spent on each.
+
+        When the Database can open connections, or with a connect callable, the views of a level
+        are refreshed in parallel, each on its own connection.  Otherwise they are refreshed one
+        after another on the cursor, whose work is committed before a level moves to other connections.
+        """
+        parallel = connect is not None or self.can_connect
+        if cursor is None and not parallel:
+            raise ValueError("A cursor or a connect callable is required to refresh materialized views.")
+
+        timings = {}
+        for level in self.plan_refresh():
+            if parallel and (len(level) > 1 or cursor is None):
+                if cursor is not None:
+                    # the other connections wait on the locks of the uncommitted refreshes and have to see them
+                    cursor.connection.commit()
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    results = executor.map(lambda view: self._refresh_on_connection(view, connect, concurrently), level)
+                    timings.update(zip((view.qualified_name for view in level), results))
+            else:
+                for view in level:
+                    started = time.monotonic()
+                    cursor.execute(view.refresh_sql(concurrently))
+                    timings[view.qualified_name] = time.monotonic() - started
+
+            if self.verbose:
+                for view in level:
+                    print(f"Refreshed {view.qualified_name} in {timings[view.qualified_name]:.3f}s")
+        return timings
+
+    def _refresh_on_connection(self, view: MaterializedView, connect, concurrently: bool = None) -> float:
+        with self.connection(connect) as connection:
+            started = time.monotonic()
+            connection.cursor().execute(view.refresh_sql(concurrently))
+        return time.monotonic() - started
+
+    def explain_items(self, cursor, samples: dict[str, tuple] = None, fingerprint_file: str = None,
+                      analyze: bool = False, **thresholds) -> list['analysis.PlanReport']:
+        """
+        EXPLAIN the registered views and SQL functions, see postnormalism.analysis.explain_items.
+        """
+        return analysis.explain_items(self, cursor, samples=samples, fingerprint_file=fingerprint_file,
+                                      analyze=analyze, **thresholds)
+
+    def unindexed_foreign_keys(self) -> list['analysis.UnindexedForeignKey']:
+        """
+        The foreign keys of the registered tables that no declared or registered index covers,
+        use index_sql() on them for the CREATE INDEX CONCURRENTLY statements.
+        """
+        return analysis.find_unindexed_foreign_keys(self)
+
+    def function_advice(self) -> list['analysis.FunctionAdvice']:
+        """
+        The registered functions whose body allows a different volatility or parallel safety
+        than they declare, use create_sql() or rewritten() on the advice for the new declaration.
+        """
+        return analysis.advise_functions(self.get_items_by_type("function"))
+
+    def column_layouts(self, varlena_width: int = 16) -> list['analysis.ColumnLayout']:
+        """
+        Estimate the tuple width and alignment padding of every registered table and propose
+        the column order with the least padding.
+        """
+        return analysis.column_layouts(self, varlena_width=varlena_width)
+
+    def diff(self, other: 'Database') -> list['analysis.Change']:
+        """
+        The ordered change plan from this Database to other, without touching a database.
+        """
+        return analysis.diff_databases(self, other)
+
+    def planned_statements(self, cursor=None, exists=False) -> list[tuple[str, str]]:
+        """
+        The (source, statement) pairs that create would run: the pending SQL migrations, or the
+        baseline and every later migration on a fresh database, followed by the items and the
+        declared storage parameters that differ from pg_class.  Without a cursor every migration
+        counts as pending and every storage parameter as unset.  Python migrations can't be planned.
+        """
+        applied = set()
+        if cursor is not None and self.migrations_folder:
+            if self.check_table_exists(cursor, migrations.PostnormalismMigrations.name):
+                applied = set(self.get_applied_migrations(cursor))
+
+        statements = []
+        baseline = self.get_baseline()
+        if not applied and baseline:
+            baseline_path, applied = baseline[0], set(baseline[1])
+            with open(baseline_path, 'r', encoding='utf-8') as file:
+                statements.extend((os.path.basename(baseline_path), sql) for sql in split_statements(file.read()))
+
+        for migration_file in self.get_migration_files():
+            if migration_file.endswith('.sql') and migration_file.split('_')[0] not in applied:
+                script = self.read_migration_script(migration_file)
+                statements.extend((migration_file, sql) for sql in split_statements(script))
+
+        items = _flatten(self.load_order)
+        for item in items:
+            statements.extend((item.qualified_name, sql) for sql in split_statements(item.full_sql(exists=exists)))
+
+        tables = [
+            item for item in items if isinstance(item, Table) and (item.storage is not None or item.column_storage)
+        ]
+        options, columns = {}, {}
+        if cursor is not None and tables:
+            options, columns = current_storage(cursor, [table.qualified_name for table in tables])
+        for table in tables:
+            statements.extend(
+                (table.qualified_name, sql)
+                for sql in table.storage_sql(options.get(table.qualified_name), columns.get(table.qualified_name))
+            )
+        return statements
+
+    def lock_risks(self, cursor=None, exists=False, min_pages: int = 1000) -> list['analysis.LockRisk']:
+        """
+        Classify the planned statements by the locks they take and whether they rewrite or
+        scan a table, see postnormalism.analysis.analyze_ddl.
+        """
+        return analysis.analyze_ddl(self.planned_statements(cursor, exists=exists), cursor, min_pages=min_pages)
+
+    def trigger_overhead(self, dsn: str = None, rows: int = 1000, batch: int = 100,
+                         samples: dict[str, Callable] = None, dominant: float = 0.5,
+                         scratch: str = 'postnormalism_scratch') -> list['analysis.TriggerOverhead']:
+        """
+        Create the Database in a scratch database on the server of the DSN and time the writes
+        to the tables with registered triggers, see postnormalism.analysis.measure_triggers.
+        The scratch database must not exist yet and is dropped afterwards.
+        """
+        with analysis.scratch_database(dsn or self.dsn, scratch) as connect:
+            with self.connection(connect) as connection:
+                cursor = connection.cursor()
+                self.create(cursor)
+                connection.commit()
+                return analysis.measure_triggers(self, cursor, rows=rows, batch=batch, samples=samples,
+                                                 dominant=dominant)
+
+    @staticmethod
+    def get_existing_partitions(cursor, tables: list[Table]) -> dict[str, set[str]]:
+        """
+        Fetch the existing partitions of all the given tables with a single catalog query.
+        """
+        cursor.execute(
+            """
+            SELECT pn.nspname || '.' || parent.relname, child.relname
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_namespace pn ON pn.oid = parent.relnamespace
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE pn.nspname || '.' || parent.relname = ANY(%s)
+            """,
+            ([table.qualified_name for table in tables],)
+        )
+        partitions = {table.qualified_name: set() for table in tables}
+        for parent, child in cursor.fetchall():
+            partitions[parent].add(child)
+        return partitions
+
+    def maintain_partitions(self, cursor, today: date = None, batch_size: int = 100) -> list[str]:
+        """
+        Create missing partitions and detach or drop expired ones for every PartitionedTable.
+
+        The statements are sent in transactions of batch_size statements and returned.
+        """
+        tables = [table for table in self.get_items_by_type("table") if isinstance(table, PartitionedTable)]
+        if not tables:
+            return []
+
+        existing = self.get_existing_partitions(cursor, tables)
+        statements = []
+        for table in tables:
+            statements.extend(table.partition_sql(existing[table.qualified_name], today=today))
+
+        for start in range(0, len(statements), batch_size):
+            cursor.execute("\n".join(["BEGIN;", *statements[start:start + batch_size], "COMMIT;"]))
+
+        if self.verbose:
+            print(f"Executed {len(statements)} partition statements for {len(tables)} tables.")
+        return statements
 
     @staticmethod
     def check_table_exists(cursor, table_name):
@@ -140,9 +663,16 @@ class Database:
         )
         return cursor.fetchone()[0]
 
-    def apply_migrations(self, cursor):
+    def apply_migrations(self, cursor, online: OnlineDDL = None, resumable=False, statement_timeout: str = None,
+                         analyze: AnalyzeTables = None):
         # Retrieve the applied migrations from the database table
         applied_migrations = self.get_applied_migrations(cursor)
+        before = self.table_modifications(cursor) if analyze else None
+
+        # A fresh database starts from the baseline instead of replaying the squashed migrations
+        baseline = self.get_baseline()
+        if not applied_migrations and baseline:
+            applied_migrations = self.apply_baseline(cursor, *baseline, online=online)
 
         # Get the list of migration files in the migrations folder
         migration_files = self.get_migration_files()
@@ -153,13 +683,175 @@ class Database:
             if migration_file.split('_')[0] not in applied_migrations
         ]
 
+        if resumable and pending_migrations:
+            cursor.execute(migrations.PostnormalismMigrationCheckpoints.full_sql(exists=True))
+
         # Apply the pending migrations
         for migration_file in pending_migrations:
+            if statement_timeout:
+                cursor.execute(f"SET statement_timeout = '{statement_timeout}';")
+                if online:
+                    # a lock timeout rolls back the attempt and an uncommitted timeout with it
+                    cursor.connection.commit()
+
+            if migration_file.endswith('.py'):
+                self.apply_python_migration(cursor, migration_file)
+                if statement_timeout:
+                    cursor.execute("RESET statement_timeout;")
+                continue
+
             migration_script = self.read_migration_script(migration_file)
-            cursor.execute(migration_script)
+            if analyze:
+                analyze.tables.update(parse_written_tables(migration_script))
+            if resumable:
+                self.apply_resumable_migration(cursor, migration_file, migration_script, online=online)
+            elif online:
+                # Run the migration and its bookkeeping in one transaction with a short lock_timeout
+                execute_online(cursor, online, migration_script, self.migration_applied_sql(migration_file))
+            else:
+                cursor.execute(migration_script)
+
+                # Update the database table to mark the migration as applied
+                self.mark_migration_as_applied(cursor, migration_file)
+
+            if statement_timeout:
+                cursor.execute("RESET statement_timeout;")
+
+        if analyze and pending_migrations:
+            # Python migrations can't be parsed, their writes show up in the table statistics
+            self.track_modifications(cursor, analyze, before)
+            self.analyze_tables(cursor, analyze)
+
+    def apply_resumable_migration(self, cursor, migration_file, migration_script, online: OnlineDDL = None):
+        """
+        Run a migration statement by statement and commit a checkpoint after each one.  A rerun
+        resumes after the last completed statement, so don't edit a migration that is in progress.
+
+        Transaction control statements in the script are skipped since every statement commits.
+        """
+        migration_id = migration_file.split('_')[0]
+        cursor.execute(
+            "SELECT statement FROM postnormalism_migration_checkpoints WHERE migration_id = %s",
+            (migration_id,)
+        )
+        checkpoint = cursor.fetchone()
+        completed = checkpoint[0] if checkpoint else 0
+        if completed and self.verbose:
+            print(f"Resuming migration {migration_file} after statement {completed}.")
+
+        statements = split_statements(migration_script)
+        for number, statement in enumerate(statements[completed:], start=completed + 1):
+            record = (
+                "INSERT INTO postnormalism_migration_checkpoints (migration_id, statement) VALUES (%s, %s) "
+                "ON CONFLICT (migration_id) DO UPDATE SET statement = EXCLUDED.statement, updated_at = NOW()",
+                (migration_id, number)
+            )
+            if TRANSACTION_CONTROL.match(COMMENTS.sub('', statement)):
+                self._execute_and_commit(cursor, online, record)
+            else:
+                self._execute_and_commit(cursor, online, statement, record)
+
+        self._execute_and_commit(
+            cursor, online,
+            self.migration_applied_sql(migration_file),
+            ("DELETE FROM postnormalism_migration_checkpoints WHERE migration_id = %s", (migration_id,))
+        )
+
+    def apply_python_migration(self, cursor, migration_file):
+        """
+        Run the migrate(cursor) function of a Python migration.  Python migrations manage their
+        own transactions, for example by committing per chunk with postnormalism.batch.
+        """
+        migration_path = os.path.join(self.migrations_folder, migration_file)
+        module_name = f"postnormalism_migration_{migration_file[:-3]}"
+        spec = importlib.util.spec_from_file_location(module_name, migration_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        if not callable(getattr(module, 'migrate', None)):
+            raise ValueError(f"Python migration {migration_file} must define migrate(cursor)")
+
+        module.migrate(cursor)
+        self.mark_migration_as_applied(cursor, migration_file)
+
+    @staticmethod
+    def _execute_and_commit(cursor, online: OnlineDDL, *statements: str | tuple[str, tuple]):
+        if online:
+            execute_online(cursor, online, *statements)
+            return
+        for statement in statements:
+            if isinstance(statement, tuple):
+                cursor.execute(*statement)
+            else:
+                cursor.execute(statement)
+        cursor.connection.commit()
+
+    @property
+    def baseline_folder(self) -> str:
+        return os.path.join(self.migrations_folder, 'baseline')
+
+    def squash_migrations(self, upto: str) -> str:
+        """
+        Collapse the migrations up to and including migration ID upto into a baseline script
+        for fresh databases and return its path.  The migration files are left in place for
+        databases that already applied them.
+        """
+        migration_files = self.get_migration_files()
+        migration_ids = [migration_file.split('_')[0] for migration_file in migration_files]
+        if upto not in migration_ids:
+            raise ValueError(f"Migration '{upto}' not found in {self.migrations_folder}")
+        squashed = migration_files[:migration_ids.index(upto) + 1]
+        python_migrations = [migration_file for migration_file in squashed if migration_file.endswith('.py')]
+        if python_migrations:
+            raise ValueError(f"Python migrations can't be squashed into a baseline: {python_migrations}")
+
+        sql_parts = [f"-- postnormalism baseline: {' '.join(migration_ids[:len(squashed)])}"]
+        for migration_file in squashed:
+            sql_parts.append(f"-- {migration_file}\n{self.read_migration_script(migration_file).strip()}")
+
+        os.makedirs(self.baseline_folder, exist_ok=True)
+        baseline_path = os.path.join(self.baseline_folder, f"{upto}_baseline.sql")
+        with open(baseline_path, 'w', encoding='utf-8') as file:
+            file.write("\n\n".join(sql_parts) + "\n")
+        return baseline_path
+
+    def get_baseline(self) -> tuple[str, list[str]] | None:
+        """
+        The latest baseline script and the migration IDs it covers.
+        """
+        if not self.migrations_folder or not os.path.isdir(self.baseline_folder):
+            return None
+        baselines = sorted(name for name in os.listdir(self.baseline_folder) if name.endswith('_baseline.sql'))
+        if not baselines:
+            return None
+
+        baseline_path = os.path.join(self.baseline_folder, baselines[-1])
+        with open(baseline_path, 'r', encoding='utf-8') as file:
+            header = file.readline()
+        if not header.startswith("-- postnormalism baseline:"):
+            raise ValueError(f"Invalid baseline header in {baseline_path}")
+        return baseline_path, header.split(':', 1)[1].split()
+
+    def apply_baseline(self, cursor, baseline_path: str, migration_ids: list[str],
+                       online: OnlineDDL = None) -> list[str]:
+        """
+        Run the baseline script and record every migration it covers with a single insert.
+        """
+        with open(baseline_path, 'r', encoding='utf-8') as file:
+            baseline_script = file.read()
+        record = (
+            "INSERT INTO postnormalism_migrations (migration_id) SELECT unnest(%s::varchar[])",
+            (migration_ids,)
+        )
+
+        if online:
+            execute_online(cursor, online, baseline_script, record)
+        else:
+            cursor.execute(baseline_script)
+            cursor.execute(*record)
 
-            # Update the database table to mark the migration as applied
-            self.mark_migration_as_applied(cursor, migration_file)
+        if self.verbose:
+            print(f"Applied baseline {os.path.basename(baseline_path)} covering {len(migration_ids)} migrations.")
+        return migration_ids
 
     @staticmethod
     def get_applied_migrations(cursor):
@@ -175,7 +867,7 @@ class Database:
         migration_files = []
         if self.migrations_folder:
             for file_name in os.listdir(self.migrations_folder):
-                if file_name.endswith('.sql'):
+                if file_name.endswith('.sql') or (file_name.endswith('.py') and not file_name.startswith('_')):
                     migration_files.append(file_name)
         return sorted(migration_files)
 
@@ -185,11 +877,12 @@ class Database:
             migration_script = file.read()
         return migration_script
 
+    @staticmethod
+    def migration_applied_sql(migration_file) -> tuple[str, tuple]:
+        migration_id = migration_file.split('_')[0]  # Extract the migration ID from the file name
+        return "INSERT INTO postnormalism_migrations (migration_id) VALUES (%s)", (migration_id,)
+
     @staticmethod
     def mark_migration_as_applied(cursor, migration_file):
         # Update the database table to mark the migration as applied
-        migration_id = migration_file.split('_')[0]  # Extract the migration ID from the file name
-        cursor.execute(
-            "INSERT INTO postnormalism_migrations (migration_id) VALUES (%s)",
-            (migration_id,)
-        )
+        cursor.execute(*Database.migration_applied_sql(migration_file))
@@ -1,35 +1,42 @@
 from dataclasses import dataclass, field
+from typing import ClassVar
 import re
+import sys
 import warnings
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DatabaseItem:
     """
     A base data class for schema items like tables, functions, etc.
+
+    Items are slotted, subclasses must be declared with slots=True as well and call
+    their base class explicitly instead of using super().  The parsing patterns are
+    compiled once per class.
     """
+    _item_type: ClassVar[str] = None
+    _name_pattern: ClassVar[re.Pattern] = None
+    _schema_pattern: ClassVar[re.Pattern] = None
+
     create: str
     comment: str = field(default=None)
-    _item_type: str = field(default=None)
-    _name_pattern: str = field(default=None)
     _name: str = field(init=False, default=None)
-    _schema_pattern: str = field(default=None)
     _schema: str = field(init=False, default=None)
     _database: object = field(default=None, init=False, repr=False)  # Internal use only
 
     def __post_init__(self):
         create = self.create.upper()
 
-        schema_match = re.search(self._schema_pattern, create) if self._schema_pattern else None
+        schema_match = self._schema_pattern.search(create) if self._schema_pattern else None
         object.__setattr__(
             self,
             '_schema',
-            schema_match.group(1).lower() if schema_match else 'public'
+            sys.intern(schema_match.group(1).lower() if schema_match else 'public')
         )
 
-        name_match = re.search(self._name_pattern, create) if self._name_pattern else None
+        name_match = self._name_pattern.search(create) if self._name_pattern else None
         if name_match:
-            object.__setattr__(self, '_name', name_match.group(1).lower())
+            object.__setattr__(self, '_name', sys.intern(name_match.group(1).lower()))
         else:
             raise ValueError("Could not parse the name from the create statement")
 
@@ -52,6 +59,10 @@ class DatabaseItem:
     def schema(self) -> str:
         return self._schema
 
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.schema}.{self.name}"
+
     @property
     def itype(self) -> str:
         return self._item_type
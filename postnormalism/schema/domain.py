@@ -1,31 +1,33 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass
+from typing import ClassVar
 import re
+import sys
 
 from .database_item import DatabaseItem
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Domain(DatabaseItem):
     """
     A data class for PostgreSQL domains.
     """
-    _item_type: str = 'domain'
-    _name_pattern: str = field(default=r'CREATE\s+DOMAIN\s+(?:(\w+)\.)?(".*?"|\w+)')
-    _schema_pattern: str = field(default=r'CREATE\s+DOMAIN\s+(\w+)\.')
+    _item_type: ClassVar[str] = 'domain'
+    _name_pattern: ClassVar[re.Pattern] = re.compile(r'CREATE\s+DOMAIN\s+(?:(\w+)\.)?(".*?"|\w+)', re.IGNORECASE)
+    _schema_pattern: ClassVar[re.Pattern] = re.compile(r'CREATE\s+DOMAIN\s+(\w+)\.', re.IGNORECASE)
 
     def __post_init__(self):
         create_statement = self.create.strip()
 
         # Schema parsing
-        schema_match = re.search(self._schema_pattern, create_statement, re.IGNORECASE)
+        schema_match = self._schema_pattern.search(create_statement)
         schema = schema_match.group(1) if schema_match else 'public'
-        object.__setattr__(self, '_schema', schema)
+        object.__setattr__(self, '_schema', sys.intern(schema))
 
         # Name parsing
-        name_match = re.search(self._name_pattern, create_statement, re.IGNORECASE)
+        name_match = self._name_pattern.search(create_statement)
         if name_match:
             name = name_match.group(2).strip('"')
-            object.__setattr__(self, '_name', name)
+            object.__setattr__(self, '_name', sys.intern(name))
         else:
             raise ValueError("Could not parse the name from the create statement")
 
@@ -1,20 +1,71 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass
+from typing import ClassVar
+import re
 
+from ..utils import split_top_level
 from .database_item import DatabaseItem
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Function(DatabaseItem):
     """
     A data class for functions.
     """
 
-    _item_type: str = 'function'
-    _name_pattern: str = field(default=r'CREATE\s+(?:OR\s+REPLACE\s+)?(?:TEMP\s+)?FUNCTION\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:\w+\.)?(\w+)')
-    _schema_pattern: str = field(default=r'CREATE\s+(?:OR\s+REPLACE\s+)?(?:TEMP\s+)?FUNCTION\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\.')
+    _item_type: ClassVar[str] = 'function'
+    _name_pattern: ClassVar[re.Pattern] = re.compile(
+        r'CREATE\s+(?:OR\s+REPLACE\s+)?(?:TEMP\s+)?FUNCTION\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:\w+\.)?(\w+)')
+    _schema_pattern: ClassVar[re.Pattern] = re.compile(
+        r'CREATE\s+(?:OR\s+REPLACE\s+)?(?:TEMP\s+)?FUNCTION\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\.')
+    _pattern_arguments: ClassVar[re.Pattern] = re.compile(r'FUNCTION\s+[\w.]+\s*\((.*?)\)\s*RETURNS', re.IGNORECASE | re.DOTALL)
+    _pattern_language: ClassVar[re.Pattern] = re.compile(r'\bLANGUAGE\s+\'?(\w+)', re.IGNORECASE)
+    _pattern_body: ClassVar[re.Pattern] = re.compile(
+        r"\bAS\s+(?:(\$(?:[A-Za-z_]\w*)?\$)(.*?)\1|'((?:[^']|'')*)')", re.IGNORECASE | re.DOTALL)
+    _pattern_volatility: ClassVar[re.Pattern] = re.compile(r'\b(IMMUTABLE|STABLE|VOLATILE)\b', re.IGNORECASE)
+    _pattern_parallel: ClassVar[re.Pattern] = re.compile(r'\bPARALLEL\s+(SAFE|RESTRICTED|UNSAFE)\b', re.IGNORECASE)
+
+    @property
+    def arguments(self) -> list[str]:
+        match = self._pattern_arguments.search(self.create)
+        return split_top_level(match.group(1)) if match else []
+
+    @property
+    def language(self) -> str:
+        """
+        The language of the function, taken from the LANGUAGE clause after the body.
+        """
+        matches = self._pattern_language.findall(self.create)
+        return matches[-1].lower() if matches else None
+
+    @property
+    def body(self) -> str:
+        """
+        The dollar or single quoted body of the function.
+        """
+        match = self._pattern_body.search(self.create)
+        if not match:
+            return None
+        return match.group(2) if match.group(1) else match.group(3).replace("''", "'")
+
+    @property
+    def options(self) -> str:
+        """
+        The create statement without the body, where the volatility and parallel options are declared.
+        """
+        return self._pattern_body.sub('AS', self.create, count=1)
+
+    @property
+    def volatility(self) -> str:
+        match = self._pattern_volatility.search(self.options)
+        return match.group(1).lower() if match else 'volatile'
+
+    @property
+    def parallel(self) -> str:
+        match = self._pattern_parallel.search(self.options)
+        return match.group(1).lower() if match else 'unsafe'
 
     def full_sql(self, exists=False) -> str:
-        sql_parts = super().full_sql().split("\n\n")
+        sql_parts = DatabaseItem.full_sql(self).split("\n\n")
 
         if exists:
             sql_parts[0] = sql_parts[0].replace("CREATE FUNCTION", "CREATE OR REPLACE FUNCTION")
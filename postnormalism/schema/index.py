@@ -0,0 +1,49 @@
+import re
+from dataclasses import dataclass
+from typing import ClassVar
+
+from ..utils import parse_indexes
+from .database_item import DatabaseItem
+
+
+@dataclass(frozen=True, slots=True)
+class Index(DatabaseItem):
+    """
+    A data class for indexes.
+    """
+    _item_type: ClassVar[str] = 'index'
+    _name_pattern: ClassVar[re.Pattern] = re.compile(
+        r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(?!ON\b)(\w+)')
+
+    def __post_init__(self):
+        DatabaseItem.__post_init__(self)
+        if not parse_indexes(self.create):
+            raise ValueError("Could not parse the table from the create statement")
+
+    def full_sql(self, exists=False) -> str:
+        sql_parts = DatabaseItem.full_sql(self).split("\n\n")
+
+        if exists and not re.search(r'IF\s+NOT\s+EXISTS', sql_parts[0], re.IGNORECASE):
+            sql_parts[0] = re.sub(r'INDEX\s+(CONCURRENTLY\s+)?', r'INDEX \1IF NOT EXISTS ', sql_parts[0], count=1,
+                                  flags=re.IGNORECASE)
+
+        return "\n\n".join(sql_parts)
+
+    @property
+    def schema(self) -> str:
+        """
+        Indexes live in the schema of their table.
+        """
+        return self.table.split('.')[0]
+
+    @property
+    def table(self) -> str:
+        return parse_indexes(self.create)[0][0]
+
+    @property
+    def columns(self) -> list[str]:
+        return parse_indexes(self.create)[0][1]
+
+    @property
+    def unique(self) -> bool:
+        return parse_indexes(self.create)[0][2]
@@ -0,0 +1,67 @@
+import re
+from dataclasses import dataclass, field
+from typing import ClassVar
+
+from .database_item import DatabaseItem
+
+
+@dataclass(frozen=True, slots=True)
+class MaterializedView(DatabaseItem):
+    """
+    A data class for materialized views.
+
+    The optional index holds the CREATE INDEX statements for the view.  A unique index
+    allows the view to be refreshed with REFRESH MATERIALIZED VIEW CONCURRENTLY.
+    """
+    _item_type: ClassVar[str] = 'materialized_view'
+    _name_pattern: ClassVar[re.Pattern] = re.compile(
+        r'CREATE\s+MATERIALIZED\s+VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:\w+\.)?(\w+)')
+    _schema_pattern: ClassVar[re.Pattern] = re.compile(
+        r'CREATE\s+MATERIALIZED\s+VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\.')
+    _pattern_relations: ClassVar[re.Pattern] = re.compile(r'\b(?:FROM|JOIN)\s+((?:\w+\.)?\w+)', re.IGNORECASE)
+    index: str = field(default=None)
+
+    def full_sql(self, exists=False) -> str:
+        sql_parts = DatabaseItem.full_sql(self).split("\n\n")
+
+        if exists:
+            sql_parts[0] = sql_parts[0].replace("CREATE MATERIALIZED VIEW", "CREATE MATERIALIZED VIEW IF NOT EXISTS")
+
+        if self.index:
+            index = self.index.strip()
+            if exists:
+                index = re.sub(r'CREATE\s+(UNIQUE\s+)?INDEX\s+(?!IF\s+NOT\s+EXISTS)', r'CREATE \1INDEX IF NOT EXISTS ',
+                               index, flags=re.IGNORECASE)
+            sql_parts.append(index)
+
+        return "\n\n".join(sql_parts)
+
+    @property
+    def unique_index(self) -> bool:
+        """
+        True when a unique index is declared, which REFRESH ... CONCURRENTLY requires.
+        """
+        return bool(self.index and re.search(r'CREATE\s+UNIQUE\s+INDEX', self.index, re.IGNORECASE))
+
+    @property
+    def relations(self) -> set[str]:
+        """
+        Schema qualified names of the relations the view selects from.
+        """
+        query = re.split(r'\bAS\b', self.create, maxsplit=1, flags=re.IGNORECASE)[-1]
+        relations = set()
+        for relation in self._pattern_relations.findall(query):
+            relation = relation.lower()
+            relations.add(relation if '.' in relation else f"public.{relation}")
+        return relations
+
+    def refresh_sql(self, concurrently: bool = None) -> str:
+        """
+        The REFRESH statement for the view, concurrent whenever a unique index allows it.
+        """
+        if concurrently is None:
+            concurrently = self.unique_index
+        elif concurrently and not self.unique_index:
+            raise ValueError(f"Materialized view '{self.name}' needs a unique index to refresh concurrently.")
+
+        return f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{self.qualified_name};"
@@ -1,4 +1,4 @@
-from postnormalism.schema import Table
+from .table import Table
 
 create = """
 CREATE TABLE postnormalism_migrations (
@@ -13,4 +13,30 @@ COMMENT ON TABLE postnormalism_migrations IS
   $$ Maintains list of migrations and time applied $$;
 """
 
-PostnormalismMigrations = Table(create=create, comment=comment)
+create_checkpoints = """
+CREATE TABLE postnormalism_migration_checkpoints (
+    migration_id VARCHAR(255) PRIMARY KEY,
+    statement INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+"""
+
+comment_checkpoints = """
+COMMENT ON TABLE postnormalism_migration_checkpoints IS
+  $$ Number of statements completed by migrations that are in progress $$;
+"""
+
+# The tables are parsed on first use, processes that never migrate don't build them
+_TABLES = {
+    'PostnormalismMigrations': (create, comment),
+    'PostnormalismMigrationCheckpoints': (create_checkpoints, comment_checkpoints),
+}
+
+
+def __getattr__(name: str) -> Table:
+    if name not in _TABLES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    table_create, table_comment = _TABLES[name]
+    table = Table(create=table_create, comment=table_comment)
+    globals()[name] = table
+    return table
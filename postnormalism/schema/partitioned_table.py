@@ -0,0 +1,136 @@
+import re
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import ClassVar
+
+from .table import Table
+
+
+def _truncate(day: date, interval: str) -> date:
+    if interval == 'day':
+        return day
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    if interval == 'year':
+        return day.replace(month=1, day=1)
+    raise ValueError(f"Unsupported partition interval: {interval}")
+
+
+def _advance(day: date, interval: str, steps: int = 1) -> date:
+    if interval == 'day':
+        return day + timedelta(days=steps)
+    if interval == 'week':
+        return day + timedelta(weeks=steps)
+    months = day.year * 12 + day.month - 1 + (steps if interval == 'month' else steps * 12)
+    return day.replace(year=months // 12, month=months % 12 + 1)
+
+
+@dataclass(frozen=True, slots=True)
+class PartitionedTable(Table):
+    """
+    A data class for tables declared with PARTITION BY.
+
+    Range partitioned tables get one partition per interval from the current period through
+    premake intervals ahead, and partitions older than retention intervals are detached or
+    dropped.  List partitioned tables get a partition for each entry in values and hash
+    partitioned tables get modulus partitions.
+    """
+    _pattern_partition: ClassVar[re.Pattern] = re.compile(
+        r"PARTITION\s+BY\s+(RANGE|LIST|HASH)\s*\(\s*(.+?)\s*\)\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+
+    interval: str = field(default=None)
+    premake: int = field(default=7)
+    retention: int = field(default=None)
+    retention_action: str = field(default='detach')
+    values: dict[str, list] = field(default=None)
+    modulus: int = field(default=None)
+
+    def __post_init__(self):
+        Table.__post_init__(self)
+        if not self._pattern_partition.search(self.create.strip()):
+            raise ValueError(f"Could not parse PARTITION BY from the create statement of '{self.name}'")
+        if self.strategy == 'range' and self.interval is None:
+            raise ValueError(f"Range partitioned table '{self.name}' needs an interval")
+        if self.strategy == 'list' and not self.values:
+            raise ValueError(f"List partitioned table '{self.name}' needs values")
+        if self.strategy == 'hash' and not self.modulus:
+            raise ValueError(f"Hash partitioned table '{self.name}' needs a modulus")
+        if self.retention_action not in ('detach', 'drop'):
+            raise ValueError(f"Invalid retention_action: {self.retention_action}")
+
+    @property
+    def strategy(self) -> str:
+        match = self._pattern_partition.search(self.create.strip())
+        return match.group(1).lower()
+
+    @property
+    def partition_key(self) -> str:
+        match = self._pattern_partition.search(self.create.strip())
+        return match.group(2)
+
+    def partition_name(self, suffix: str) -> str:
+        return f"{self.name}_p{suffix}"
+
+    def _range_suffix(self, start: date) -> str:
+        return start.strftime('%Y' if self.interval == 'year' else '%Y%m' if self.interval == 'month' else '%Y%m%d')
+
+    def _expected_partitions(self, today: date) -> dict[str, str]:
+        """
+        Map each partition that should exist to its FOR VALUES clause.
+        """
+        if self.strategy == 'hash':
+            return {
+                self.partition_name(str(remainder)): f"FOR VALUES WITH (MODULUS {self.modulus}, REMAINDER {remainder})"
+                for remainder in range(self.modulus)
+            }
+
+        if self.strategy == 'list':
+            return {
+                self.partition_name(suffix): "FOR VALUES IN ({})".format(
+                    ", ".join("'{}'".format(str(value).replace("'", "''")) for value in values))
+                for suffix, values in self.values.items()
+            }
+
+        partitions = {}
+        start = _truncate(today, self.interval)
+        for _ in range(self.premake + 1):
+            end = _advance(start, self.interval)
+            partitions[self.partition_name(self._range_suffix(start))] = \
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            start = end
+        return partitions
+
+    def _expired_partitions(self, existing: set[str], today: date) -> list[str]:
+        if self.strategy != 'range' or self.retention is None:
+            return []
+
+        cutoff = self._range_suffix(_advance(_truncate(today, self.interval), self.interval, -self.retention))
+        pattern = re.compile(rf"^{re.escape(self.name)}_p(\d+)$")
+        expired = []
+        for partition in sorted(existing):
+            match = pattern.match(partition)
+            if match and match.group(1) < cutoff:
+                expired.append(partition)
+        return expired
+
+    def partition_sql(self, existing: set[str], today: date = None) -> list[str]:
+        """
+        The statements that bring the partitions in line with the declaration, given the
+        names of the partitions that already exist.
+        """
+        today = today or date.today()
+        statements = []
+        for partition, bounds in self._expected_partitions(today).items():
+            if partition not in existing:
+                statements.append(
+                    f"CREATE TABLE IF NOT EXISTS {self.schema}.{partition} PARTITION OF {self.qualified_name} {bounds};"
+                )
+
+        for partition in self._expired_partitions(existing, today):
+            if self.retention_action == 'drop':
+                statements.append(f"DROP TABLE IF EXISTS {self.schema}.{partition};")
+            else:
+                statements.append(f"ALTER TABLE {self.qualified_name} DETACH PARTITION {self.schema}.{partition};")
+        return statements
@@ -1,15 +1,17 @@
 from dataclasses import dataclass, field
+from typing import ClassVar
+import re
 
 from .database_item import DatabaseItem
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Schema(DatabaseItem):
     """
     A data class for schema.
     """
-    _item_type: str = 'schema'
-    _name_pattern: str = field(default=r'CREATE\s+SCHEMA\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)')
+    _item_type: ClassVar[str] = 'schema'
+    _name_pattern: ClassVar[re.Pattern] = re.compile(r'CREATE\s+SCHEMA\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)')
     alter: str = field(default=None)
     _items: dict[str, DatabaseItem] = field(default_factory=dict, init=False)
 
@@ -22,7 +24,7 @@ class Schema(DatabaseItem):
         raise AttributeError(f"Schema object has no attribute '{name}'")
 
     def full_sql(self, exists=False) -> str:
-        sql_parts = [super().full_sql().strip()]
+        sql_parts = [DatabaseItem.full_sql(self).strip()]
 
         if exists:
             sql_parts[0] = sql_parts[0].replace("CREATE SCHEMA", "CREATE SCHEMA IF NOT EXISTS")
@@ -0,0 +1,47 @@
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+
+@dataclass(frozen=True)
+class Seed:
+    """
+    A data class for reference data loaded into a Table through COPY.
+
+    The source is a path to a CSV file, an iterable of rows or a callable returning an
+    iterable of rows.  Use a callable for generators so the data can be loaded more than once.
+    """
+    source: str | Iterable | Callable[[], Iterable]
+    columns: list[str] = field(default=None)
+    format: str = field(default='text')
+    header: bool = field(default=True)
+    chunk_size: int = field(default=65536)
+    upsert: list[str] = field(default=None)
+    types: list[str] = field(default=None)
+
+    def __post_init__(self):
+        if self.format not in ('text', 'binary'):
+            raise ValueError(f"Invalid seed format: {self.format}")
+        if self.format == 'binary' and not self.types:
+            raise ValueError("Binary seeds need the column types")
+
+    @property
+    def is_csv(self) -> bool:
+        return isinstance(self.source, str)
+
+    def rows(self) -> Iterable:
+        return self.source() if callable(self.source) else self.source
+
+    def chunks(self):
+        """
+        Read the CSV file in blocks of chunk_size characters.
+        """
+        with open(self.source, 'r', encoding='utf-8', newline='') as file:
+            while chunk := file.read(self.chunk_size):
+                yield chunk
+
+    def copy_options(self) -> str:
+        if self.is_csv:
+            return f" (FORMAT csv{', HEADER true' if self.header else ''})"
+        if self.format == 'binary':
+            return " (FORMAT binary)"
+        return ""
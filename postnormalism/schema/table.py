@@ -1,29 +1,41 @@
 import re
+import sys
 from dataclasses import dataclass, field
+from typing import ClassVar
 
+from ..utils import split_top_level
 from .database_item import DatabaseItem
+from .seed import Seed
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Table(DatabaseItem):
     """
     A data class for tables.
     """
-    _item_type: str = 'table'
-    _name_pattern: str = field(
-        default=r'CREATE\s+(?:OR\s+REPLACE\s+)?(?:TEMP\s+)?(?:TABLE)\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:\w+\.)?(\w+)')
-    _schema_pattern: str = field(default=r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\.\w+')
-    _pattern_create: str = field(default=r"^\s*(\w+)\s+(?:[\w\(\)]+).*?(?:,|$)")
-    _pattern_alter: str = field(default=r"ADD COLUMN\s+(\w+)\s+[\w\(\)]+")
-    _pattern_inherits: str = field(default=r"INHERITS\s*\((\w+)\)")
+    _item_type: ClassVar[str] = 'table'
+    _name_pattern: ClassVar[re.Pattern] = re.compile(
+        r'CREATE\s+(?:OR\s+REPLACE\s+)?(?:TEMP\s+)?(?:TABLE)\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:\w+\.)?(\w+)')
+    _schema_pattern: ClassVar[re.Pattern] = re.compile(r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\.\w+')
+    _pattern_create: ClassVar[re.Pattern] = re.compile(r"^\s*(\w+)\s+(?:[\w\(\)]+).*?(?:,|$)")
+    _pattern_constraint: ClassVar[re.Pattern] = re.compile(
+        r"^\s*(\w+)\s+.*(?:UNIQUE|CHECK|PRIMARY KEY)\s*\(.*\)", re.IGNORECASE)
+    _pattern_alter: ClassVar[re.Pattern] = re.compile(r"ADD COLUMN\s+(\w+)\s+[\w\(\)]+", re.IGNORECASE)
+    _pattern_inherits: ClassVar[re.Pattern] = re.compile(r"INHERITS\s*\((\w+)\)", re.IGNORECASE)
+    _constraint_keywords: ClassVar[tuple[str, ...]] = (
+        "CONSTRAINT", "PRIMARY KEY", "UNIQUE", "CHECK", "FOREIGN KEY", "EXCLUDE", "LIKE")
 
     alter: str = field(default=None)
+    seed: Seed = field(default=None, repr=False)
+    storage: dict[str, object] = field(default=None)
+    column_storage: dict[str, dict[str, str]] = field(default=None)
     inherits: bool = field(default=False, init=False)
     _columns: list[str] = field(default=None, init=False, repr=False)
+    _fragments: dict[str, str] = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self):
-        super().__post_init__()
-        inherit_match = re.search(self._pattern_inherits, self.create, re.IGNORECASE)
+        DatabaseItem.__post_init__(self)
+        inherit_match = self._pattern_inherits.search(self.create)
         if inherit_match:
             object.__setattr__(self, 'inherits', True)
         self._initialize_columns()
@@ -34,47 +46,249 @@ class Table(DatabaseItem):
             self._initialize_columns()
         return self._columns
 
+    def definitions_span(self) -> tuple[int, int] | None:
+        """
+        The positions of the parentheses around the definitions in the CREATE TABLE.
+        """
+        create = self.create
+        start = create.find('(', self._name_pattern.search(create.upper()).end())
+        if start == -1:
+            return None
+        depth = 0
+        for end in range(start, len(create)):
+            if create[end] == '(':
+                depth += 1
+            elif create[end] == ')':
+                depth -= 1
+                if depth == 0:
+                    break
+        return start, end
+
+    @property
+    def definitions(self) -> list[str]:
+        """
+        The column and constraint definitions between the parentheses of the CREATE TABLE.
+        """
+        span = self.definitions_span()
+        if span is None:
+            return []
+        body = "\n".join(line.split('--')[0] for line in self.create[span[0] + 1:span[1]].splitlines())
+        return split_top_level(body)
+
+    @property
+    def column_definitions(self) -> dict[str, str]:
+        """
+        Map each column declared in the CREATE TABLE to its definition.
+        """
+        return {
+            definition.split()[0].strip('"').lower(): definition
+            for definition in self.definitions
+            if not definition.upper().startswith(self._constraint_keywords)
+        }
+
+    @property
+    def constraint_definitions(self) -> list[str]:
+        return [
+            definition for definition in self.definitions
+            if definition.upper().startswith(self._constraint_keywords)
+        ]
+
+    @staticmethod
+    def quote(identifier: str) -> str:
+        return '"' + identifier.replace('"', '""') + '"'
+
+    def _fragment(self, key: str, build) -> str:
+        """
+        Build a SQL fragment once and reuse it, the fragments are cleared when the columns change.
+        """
+        if self._fragments is None:
+            object.__setattr__(self, '_fragments', {})
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            fragment = self._fragments[key] = build()
+        return fragment
+
+    @staticmethod
+    def fold(identifier: str) -> str:
+        """
+        The name PostgreSQL stores for an identifier: folded to lower case unless quoted.
+        """
+        identifier = identifier.strip()
+        if len(identifier) > 1 and identifier.startswith('"') and identifier.endswith('"'):
+            return identifier[1:-1].replace('""', '"')
+        return identifier.lower()
+
+    @property
+    def column_names(self) -> list[str]:
+        """
+        The columns of the table, inherited ones first, with their names folded the way
+        PostgreSQL stores them.
+        """
+        return self._fragment('column_names', self._build_column_names)
+
+    def _build_column_names(self) -> list[str]:
+        names = []
+        if self.inherits and self.database:
+            parent = self._get_parent_table(self._pattern_inherits.search(self.create).group(1).lower())
+            names.extend(parent.column_names if parent else [])
+        names.extend(
+            self.fold(definition.split()[0]) for definition in self.definitions
+            if not definition.upper().startswith(self._constraint_keywords)
+        )
+        names.extend(column.lower() for column in self._pattern_alter.findall(self.alter or ''))
+        return list(dict.fromkeys(names))
+
+    @property
+    def primary_key(self) -> list[str]:
+        """
+        The folded names of the columns of the primary key declared inline or as a table constraint.
+        """
+        for definition in self.definitions:
+            if definition.upper().startswith(self._constraint_keywords):
+                continue
+            if re.search(r'\bPRIMARY\s+KEY\b', definition, re.IGNORECASE):
+                return [self.fold(definition.split()[0])]
+        for sql in [*self.constraint_definitions, self.alter or '']:
+            match = re.search(r'\bPRIMARY\s+KEY\s*\(([^)]*)\)', sql, re.IGNORECASE)
+            if match:
+                return [self.fold(column) for column in match.group(1).split(',')]
+        return []
+
+    @property
+    def quoted_name(self) -> str:
+        return self._fragment('quoted_name', lambda: f"{self.quote(self.schema)}.{self.quote(self.name)}")
+
+    @property
+    def column_list(self) -> str:
+        return self._fragment('column_list', lambda: ", ".join(self.quote(column) for column in self.column_names))
+
+    @property
+    def select_sql(self) -> str:
+        return self._fragment('select_sql', lambda: f"SELECT {self.column_list} FROM {self.quoted_name}")
+
+    @property
+    def insert_sql(self) -> str:
+        """
+        INSERT INTO the table with a %s placeholder for every column.
+        """
+        return self._fragment('insert_sql', lambda: (
+            f"INSERT INTO {self.quoted_name} ({self.column_list}) VALUES ({', '.join(['%s'] * len(self.column_names))})"
+        ))
+
+    @property
+    def upsert_sql(self) -> str:
+        """
+        The INSERT with an ON CONFLICT on the primary key that updates the other columns.
+        """
+        return self._fragment('upsert_sql', self._build_upsert_sql)
+
+    def _build_upsert_sql(self) -> str:
+        key = self.primary_key
+        if not key:
+            raise ValueError(f"Table '{self.name}' has no primary key to upsert on")
+        updates = [column for column in self.column_names if column not in key]
+        conflict = "DO UPDATE SET " + ", ".join(
+            f"{self.quote(column)} = EXCLUDED.{self.quote(column)}" for column in updates
+        ) if updates else "DO NOTHING"
+        return f"{self.insert_sql} ON CONFLICT ({', '.join(self.quote(column) for column in key)}) {conflict}"
+
+    @property
+    def copy_sql(self) -> str:
+        return self._fragment('copy_sql', lambda: f"COPY {self.quoted_name} ({self.column_list}) FROM STDIN")
+
+    @property
+    def reloptions(self) -> dict[str, str] | None:
+        """
+        The declared storage parameters spelled the way pg_class.reloptions stores them.
+        """
+        if self.storage is None:
+            return None
+        return {key.lower(): _option_value(value) for key, value in self.storage.items()}
+
+    @property
+    def column_options(self) -> dict[str, dict[str, str]]:
+        """
+        The declared column storage settings, lowercased like the ones read from pg_attribute.
+        """
+        return {
+            column.lower(): {setting.lower(): str(value).lower() for setting, value in settings.items()}
+            for column, settings in (self.column_storage or {}).items()
+        }
+
+    def storage_sql(self, current: dict[str, str] = None,
+                    current_columns: dict[str, dict[str, str]] = None) -> list[str]:
+        """
+        The ALTER TABLE statements that apply the declared storage parameters and column storage
+        settings that differ from the current ones.  Without current ones every declared setting
+        is applied.
+
+        A Table that declares storage owns its storage parameters, the other current parameters
+        are reset.  Column settings that aren't declared are left alone.
+        """
+        current = current or {}
+        current_columns = current_columns or {}
+        statements = []
+
+        declared = self.reloptions
+        if declared is not None:
+            changes = [f"{key} = {value}" for key, value in declared.items()
+                       if key not in current or not _same_option(current[key], value)]
+            resets = [key for key in current if key not in declared]
+            actions = []
+            if changes:
+                actions.append(f"SET ({', '.join(changes)})")
+            if resets:
+                actions.append(f"RESET ({', '.join(resets)})")
+            if actions:
+                statements.append(f"ALTER TABLE {self.qualified_name} {', '.join(actions)};")
+
+        actions = []
+        for column, settings in (self.column_storage or {}).items():
+            for setting, value in settings.items():
+                if str(value).lower() != current_columns.get(column.lower(), {}).get(setting.lower()):
+                    actions.append(f"ALTER COLUMN {column} SET {setting.upper()} {str(value).upper()}")
+        if actions:
+            statements.append(f"ALTER TABLE {self.qualified_name} {', '.join(actions)};")
+        return statements
+
     def _initialize_columns(self):
+        object.__setattr__(self, '_fragments', None)
         self._extract_columns()
         if self.inherits:
             self._extract_inherited_columns()
 
     def _extract_columns(self):
         columns = []
-        in_table_definition = False
+        # only the definitions, clauses after them like PARTITION BY or WITH aren't columns
+        span = self.definitions_span()
+        body = self.create[span[0] + 1:span[1]] if span else ''
 
-        for line in self.create.splitlines():
-            if "CREATE TABLE" in line.upper():
-                in_table_definition = True
-                continue
+        for line in body.splitlines():
+            parts = line.split(',')
+            for part in parts:
+                part = part.strip()
 
-            if in_table_definition:
-                parts = line.split(',')
-                for part in parts:
-                    part = part.strip()
-
-                    if part.upper().startswith(("UNIQUE", "CHECK", "PRIMARY KEY", "FOREIGN")):
-                        continue
-                    match = re.match(self._pattern_create, part)
-                    if match:
-                        columns.append(match.group(1))
-                    else:
-                        # Handle cases where constraints are included with column definitions
-                        column_and_constraint = re.match(r"^\s*(\w+)\s+.*(?:UNIQUE|CHECK|PRIMARY KEY)\s*\(.*\)", part,
-                                                         re.IGNORECASE)
-                        if column_and_constraint:
-                            columns.append(column_and_constraint.group(1))
+                if part.upper().startswith(("UNIQUE", "CHECK", "PRIMARY KEY", "FOREIGN")):
+                    continue
+                match = self._pattern_create.match(part)
+                if match:
+                    columns.append(match.group(1))
+                else:
+                    # Handle cases where constraints are included with column definitions
+                    column_and_constraint = self._pattern_constraint.match(part)
+                    if column_and_constraint:
+                        columns.append(column_and_constraint.group(1))
 
         if self.alter:
             for line in self.alter.splitlines():
-                match = re.search(self._pattern_alter, line.strip(), re.IGNORECASE)
+                match = self._pattern_alter.search(line.strip())
                 if match:
                     columns.append(match.group(1))
-        columns = list(dict.fromkeys(columns))
+        columns = [sys.intern(column) for column in dict.fromkeys(columns)]
         object.__setattr__(self, '_columns', columns)
 
     def _extract_inherited_columns(self):
-        inherit_match = re.search(self._pattern_inherits, self.create, re.IGNORECASE)
+        inherit_match = self._pattern_inherits.search(self.create)
         if inherit_match and self.database:
             parent_table_name = inherit_match.group(1).lower()
             parent_table = self._get_parent_table(parent_table_name)
@@ -104,3 +318,16 @@ class Table(DatabaseItem):
             sql_parts.append(self.alter.strip())
 
         return "\n\n".join(sql_parts)
+
+
+def _option_value(value) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value).lower()
+
+
+def _same_option(current: str, declared: str) -> bool:
+    try:
+        return float(current) == float(declared)
+    except ValueError:
+        return current.lower() == declared
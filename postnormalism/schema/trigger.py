@@ -1,19 +1,21 @@
 import re
-from dataclasses import dataclass, field
+from dataclasses import dataclass
+from typing import ClassVar
 
 from .database_item import DatabaseItem
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Trigger(DatabaseItem):
     """
     A data class for database triggers.
     """
-    _item_type: str = 'trigger'
-    _name_pattern: str = field(default=r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:CONSTRAINT\s+)?TRIGGER\s+(\w+)")
+    _item_type: ClassVar[str] = 'trigger'
+    _name_pattern: ClassVar[re.Pattern] = re.compile(r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:CONSTRAINT\s+)?TRIGGER\s+(\w+)")
+    _pattern_table: ClassVar[re.Pattern] = re.compile(r'\bON\s+((?:\w+\.)?\w+)', re.IGNORECASE)
 
     def full_sql(self, exists=False) -> str:
-        sql_parts = super().full_sql().split("\n\n")
+        sql_parts = DatabaseItem.full_sql(self).split("\n\n")
 
         if exists:
             sql_parts[0] = sql_parts[0].replace("CREATE TRIGGER", "CREATE OR REPLACE TRIGGER")
@@ -30,3 +32,11 @@ class Trigger(DatabaseItem):
         if match:
             return match.group(1).lower()
         return 'public'
+
+    @property
+    def table(self) -> str:
+        """
+        The qualified name of the table or view the trigger is on.
+        """
+        table = self._pattern_table.search(self.create).group(1).lower()
+        return table if '.' in table else f"public.{table}"
@@ -1,19 +1,21 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass
+from typing import ClassVar
+import re
 
 from .database_item import DatabaseItem
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class View(DatabaseItem):
     """
     A data class for database views.
     """
-    _item_type: str = 'view'
-    _name_pattern: str = field(default=r'CREATE\s+VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:\w+\.)?(\w+)')
-    _schema_pattern: str = field(default=r'CREATE\s+VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\.')
+    _item_type: ClassVar[str] = 'view'
+    _name_pattern: ClassVar[re.Pattern] = re.compile(r'CREATE\s+VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:\w+\.)?(\w+)')
+    _schema_pattern: ClassVar[re.Pattern] = re.compile(r'CREATE\s+VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\.')
 
     def full_sql(self, exists=False) -> str:
-        sql_parts = super().full_sql().split("\n\n")
+        sql_parts = DatabaseItem.full_sql(self).split("\n\n")
 
         if exists:
             sql_parts[0] = sql_parts[0].replace("CREATE VIEW", "CREATE OR REPLACE VIEW")
@@ -1,22 +1,209 @@
+import fnmatch
 import os
+import re
+from typing import Iterator
 
 
-def generate_project_structure(root: str, exclude_dirs: set = None, indent: str = "|   ") -> str:
-    if exclude_dirs is None:
-        exclude_dirs = {'.idea', '__pycache__', '.git', 'build', 'dist', 'postnormalism.egg-info'}
+DEFAULT_EXCLUDES = {'.idea', '__pycache__', '.git', 'build', 'dist', 'postnormalism.egg-info'}
+IGNORE_FILES = ('.gitignore', '.gptignore')
+
+
+def read_ignore_patterns(root: str, ignore_files: tuple[str, ...] = IGNORE_FILES) -> list[str]:
+    """
+    Read the patterns from the ignore files in root.  Negated patterns are not supported and skipped.
+    """
+    patterns = []
+    for ignore_file in ignore_files:
+        path = os.path.join(root, ignore_file)
+        if not os.path.isfile(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if line and not line.startswith(('#', '!')):
+                    patterns.append(line)
+    return patterns
+
 
-    def walk(path: str, level: int = 0) -> str:
-        output = ""
-        for entry in sorted(os.listdir(path)):
-            if entry in exclude_dirs:
+def is_ignored(relative_path: str, is_dir: bool, patterns: list[str]) -> bool:
+    """
+    Match a path relative to the root against gitignore style patterns.
+    """
+    name = relative_path.rsplit('/', 1)[-1]
+    for pattern in patterns:
+        if pattern.endswith('/'):
+            if not is_dir:
                 continue
+            pattern = pattern.rstrip('/')
+        if '/' in pattern:
+            if fnmatch.fnmatchcase(relative_path, pattern.lstrip('/')):
+                return True
+        elif fnmatch.fnmatchcase(name, pattern):
+            return True
+    return False
+
+
+def walk_project_structure(root: str, exclude_dirs: set = None, indent: str = "|   ", max_depth: int = None,
+                           ignore_files: tuple[str, ...] = IGNORE_FILES) -> Iterator[str]:
+    """
+    Yield the lines of the project tree so it can be streamed, for example with file.writelines.
+
+    Directories below max_depth are summarized with the number of files they contain.
+    """
+    if exclude_dirs is None:
+        exclude_dirs = DEFAULT_EXCLUDES
+    patterns = read_ignore_patterns(root, ignore_files)
+
+    def entries(path: str, relative: str) -> list[tuple[str, str, bool]]:
+        with os.scandir(path) as scan:
+            found = []
+            for entry in scan:
+                entry_relative = f"{relative}{entry.name}"
+                is_dir = entry.is_dir()
+                if entry.name in exclude_dirs or is_ignored(entry_relative, is_dir, patterns):
+                    continue
+                found.append((entry.name, entry_relative, is_dir))
+        return sorted(found)
+
+    def count_files(path: str, relative: str) -> int:
+        return sum(
+            count_files(os.path.join(path, name), f"{entry_relative}/") if is_dir else 1
+            for name, entry_relative, is_dir in entries(path, relative)
+        )
+
+    def walk(path: str, relative: str, level: int) -> Iterator[str]:
+        for name, entry_relative, is_dir in entries(path, relative):
+            entry_path = os.path.join(path, name)
+            if not is_dir:
+                yield f"{indent * level}|-- {name}\n"
+            elif max_depth is not None and level + 1 >= max_depth:
+                yield f"{indent * level}|-- {name}/ ({count_files(entry_path, f'{entry_relative}/')} files)\n"
+            else:
+                yield f"{indent * level}|-- {name}/\n"
+                yield from walk(entry_path, f"{entry_relative}/", level + 1)
+
+    yield from walk(root, "", 0)
+
+
+def generate_project_structure(root: str, exclude_dirs: set = None, indent: str = "|   ", max_depth: int = None,
+                               ignore_files: tuple[str, ...] = IGNORE_FILES) -> str:
+    return "".join(walk_project_structure(root, exclude_dirs, indent, max_depth, ignore_files))
 
-            entry_path = os.path.join(path, entry)
-            if os.path.isdir(entry_path):
-                output += f"{indent * level}|-- {entry}/\n"
-                output += walk(entry_path, level + 1)
+
+DOLLAR_QUOTE = re.compile(r'\$(?:[A-Za-z_]\w*)?\$')
+COMMENTS = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+
+
+def _has_code(statement: str) -> bool:
+    return COMMENTS.sub('', statement).strip() not in ('', ';')
+
+
+def split_top_level(text: str, separator: str = ',') -> list[str]:
+    """
+    Split text on the separator outside of parentheses and quotes.
+    """
+    parts = []
+    depth = 0
+    quote = None
+    start = 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+    parts.append(text[start:].strip())
+    return [part for part in parts if part]
+
+
+def split_statements(sql: str) -> list[str]:
+    """
+    Split a SQL script into statements on the semicolons outside of quotes, dollar quotes and comments.
+    """
+    statements = []
+    start = 0
+    i = 0
+    length = len(sql)
+    while i < length:
+        char = sql[i]
+        if char in ("'", '"'):
+            i = sql.find(char, i + 1)
+            while i != -1 and sql.startswith(char * 2, i):
+                i = sql.find(char, i + 2)
+            i = length if i == -1 else i + 1
+        elif sql.startswith('--', i):
+            i = sql.find('\n', i)
+            i = length if i == -1 else i + 1
+        elif sql.startswith('/*', i):
+            i = sql.find('*/', i + 2)
+            i = length if i == -1 else i + 2
+        elif char == '$':
+            match = DOLLAR_QUOTE.match(sql, i)
+            if match:
+                i = sql.find(match.group(0), i + len(match.group(0)))
+                i = length if i == -1 else i + len(match.group(0))
             else:
-                output += f"{indent * level}|-- {entry}\n"
-        return output
+                i += 1
+        elif char == ';':
+            statements.append(sql[start:i + 1].strip())
+            start = i = i + 1
+        else:
+            i += 1
+
+    statements.append(sql[start:].strip())
+    return [statement for statement in statements if _has_code(statement)]
+
+
+INDEX_PATTERN = re.compile(
+    r'CREATE\s+(UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(?:\w+\s+)?'
+    r'ON\s+(?:ONLY\s+)?((?:\w+\.)?\w+)\s*(?:USING\s+\w+\s*)?\((.*?)\)\s*(?:INCLUDE|WHERE|WITH|TABLESPACE|;|$)',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def parse_indexes(sql: str) -> list[tuple[str, list[str], bool]]:
+    """
+    Find the CREATE INDEX statements in sql and return the qualified table, the leading plain
+    columns and whether the index is unique for each.  Columns stop at the first expression.
+    """
+    indexes = []
+    for unique, table, definition in INDEX_PATTERN.findall(sql or ''):
+        table = table.lower()
+        columns = []
+        for column in split_top_level(definition):
+            match = re.match(r'^"?(\w+)"?(?:\s+(?:ASC|DESC|NULLS\s+\w+|\w+_ops))*$', column, re.IGNORECASE)
+            if not match:
+                break
+            columns.append(match.group(1).lower())
+        indexes.append((table if '.' in table else f"public.{table}", columns, bool(unique)))
+    return indexes
+
+
+DOLLAR_QUOTED = re.compile(r'(\$(?:[A-Za-z_]\w*)?\$).*?\1', re.DOTALL)
+WRITE_PATTERN = re.compile(
+    r'\b(?:INSERT\s+INTO|UPDATE(?:\s+ONLY)?|DELETE\s+FROM(?:\s+ONLY)?|MERGE\s+INTO)\s+'
+    r'(?!(?:ON|OF|SET|SKIP|NOWAIT)\b)((?:\w+\.)?\w+)'
+    r'|\bCOPY\s+((?:\w+\.)?\w+)\s*(?:\([^)]*\)\s*)?FROM\b',
+    re.IGNORECASE
+)
+
 
-    return walk(root)
+def parse_written_tables(sql: str) -> set[str]:
+    """
+    The qualified names of the tables that INSERT, UPDATE, DELETE, MERGE and COPY ... FROM
+    statements in sql write to.  Function bodies are skipped since creating a function
+    doesn't run it.
+    """
+    sql = DOLLAR_QUOTED.sub('', COMMENTS.sub('', sql or ''))
+    tables = set()
+    for table in (written or copied for written, copied in WRITE_PATTERN.findall(sql)):
+        table = table.lower()
+        tables.add(table if '.' in table else f"public.{table}")
+    return tables
@@ -0,0 +1,204 @@
+import importlib
+import os
+import sys
+import time
+from typing import Callable
+
+from .analysis.diff import Change, diff_databases
+
+
+# Items that can be applied again without a migration
+HOT_TYPES = {'function', 'view', 'materialized_view', 'trigger', 'index'}
+
+
+def _reload(module):
+    # compiled from the source, a bytecode cache written within a second of an edit can look current
+    with open(module.__file__, 'rb') as file:
+        code = compile(file.read(), module.__file__, 'exec')
+    exec(code, module.__dict__)
+    return module
+
+
+def changed_modules(changed: set[str]) -> list:
+    """
+    The loaded modules whose source files changed, the ones imported last first so that
+    modules are reloaded before the modules importing them.
+    """
+    changed = {os.path.realpath(path) for path in changed}
+    modules = [
+        module for module in list(sys.modules.values())
+        if getattr(module, '__file__', None) and os.path.realpath(module.__file__) in changed
+    ]
+    return modules[::-1]
+
+
+def load_database(target: str | Callable, changed: set[str] = frozenset()):
+    """
+    A Database from a callable or from a 'module:attribute' reference.  The loaded modules
+    of the changed files are reloaded first, then the module of the reference, so that
+    edits to the modules it imports items from are picked up.
+    """
+    importlib.invalidate_caches()
+    if callable(target):
+        for module in changed_modules(changed):
+            _reload(module)
+        return target()
+    module_name, _, attribute = target.partition(':')
+    module = sys.modules.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+    else:
+        for changed_module in changed_modules(changed):
+            if changed_module is not module:
+                _reload(changed_module)
+        module = _reload(module)
+    return getattr(module, attribute or 'database')
+
+
+def source_paths(target: str | Callable) -> list[str]:
+    """
+    The file of the module a 'module:attribute' reference points to.
+    """
+    if callable(target):
+        return []
+    module = sys.modules.get(target.partition(':')[0])
+    return [module.__file__] if module and getattr(module, '__file__', None) else []
+
+
+def snapshot(paths: list[str]) -> dict[str, int]:
+    """
+    The modification times of the files at or below paths.
+    """
+    times = {}
+    pending = list(paths)
+    while pending:
+        path = pending.pop()
+        if os.path.isdir(path):
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False) and entry.name != '__pycache__':
+                        pending.append(entry.path)
+                    elif entry.is_file():
+                        times[entry.path] = entry.stat().st_mtime_ns
+        elif os.path.isfile(path):
+            times[path] = os.stat(path).st_mtime_ns
+    return times
+
+
+def wait_for_changes(paths: list[str], interval: float = 0.1, previous: dict[str, int] = None,
+                     timeout: float = None) -> tuple[set[str], dict[str, int]]:
+    """
+    Block until a file at or below paths changes and return the changed files along with the
+    new snapshot.  Uses inotify when inotify_simple is installed and polls every interval
+    seconds otherwise.  After timeout seconds without changes no files are returned.
+    """
+    previous = snapshot(paths) if previous is None else previous
+    try:
+        import inotify_simple  # optional dependency, only used for watching
+    except ImportError:
+        inotify_simple = None
+
+    started = time.monotonic()
+    with _Inotify(inotify_simple, paths) if inotify_simple else _Polling() as waiter:
+        while timeout is None or time.monotonic() - started < timeout:
+            waiter.wait(interval)
+            current = snapshot(paths)
+            changed = {path for path in current.keys() | previous.keys() if current.get(path) != previous.get(path)}
+            if changed:
+                return changed, current
+    return set(), previous
+
+
+class _Polling:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def wait(self, interval: float):
+        time.sleep(interval)
+
+
+class _Inotify:
+    def __init__(self, inotify_simple, paths: list[str]):
+        self.inotify = inotify_simple.INotify()
+        flags = inotify_simple.flags
+        mask = flags.MODIFY | flags.CLOSE_WRITE | flags.CREATE | flags.DELETE | flags.MOVED_TO
+        for path in paths:
+            directory = path if os.path.isdir(path) else os.path.dirname(path) or '.'
+            self.inotify.add_watch(directory, mask)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.inotify.close()
+        return False
+
+    def wait(self, interval: float):
+        self.inotify.read(timeout=int(interval * 1000))
+
+
+def hot_apply(cursor, old, new, verbose=False) -> list[Change]:
+    """
+    Apply the changed functions, views, triggers and indexes between the old and new
+    Database, the views that depend on them and the storage parameters of tables, in one
+    transaction.  Other changes to tables, domains and schemas need a migration and are skipped.
+    """
+    changes = diff_databases(old, new)
+    applied = [change for change in changes if change.item.itype in HOT_TYPES or change.action == 'storage']
+    if verbose:
+        for change in changes:
+            if change.item.itype not in HOT_TYPES and change.action != 'storage':
+                print(f"Skipped {change.action} of {change.item.qualified_name}, write a migration for it.")
+    if not applied:
+        return []
+
+    try:
+        cursor.execute("\n\n".join(change.sql for change in applied))
+        cursor.connection.commit()
+    except Exception:
+        cursor.connection.rollback()
+        raise
+    return applied
+
+
+def watch(target: str | Callable, cursor=None, paths: list[str] = None, interval: float = 0.1,
+          iterations: int = None, verbose=True):
+    """
+    Watch the source files of a Database and hot apply the changed functions and views, and
+    the views depending on them, over the cursor or one connection of the Database.
+
+    The target is a callable returning the Database or a 'module:attribute' reference that
+    is reloaded on every change, after the changed modules it imports items from.  Pass the
+    folder of those modules as paths to watch them too.  The Database is assumed to be
+    applied when watching starts.  Failed changes are rolled back and retried after the next
+    edit.
+    """
+    current = load_database(target)
+    if cursor is None:
+        with current.connection() as connection:
+            return watch(target, connection.cursor(), paths, interval, iterations, verbose)
+    paths = paths or source_paths(target)
+    if not paths:
+        raise ValueError("Nothing to watch, pass the paths of the source files.")
+
+    files = snapshot(paths)
+    rounds = 0
+    while iterations is None or rounds < iterations:
+        changed, files = wait_for_changes(paths, interval, files)
+        rounds += 1
+        started = time.monotonic()
+        try:
+            new = load_database(target, changed)
+            applied = hot_apply(cursor, current, new, verbose=verbose)
+        except Exception as error:
+            if verbose:
+                print(f"Could not apply {', '.join(sorted(changed))}: {error}")
+            continue
+        current = new
+        if verbose and applied:
+            names = ", ".join(f"{change.action} {change.item.qualified_name}" for change in applied)
+            print(f"Applied {names} in {(time.monotonic() - started) * 1000:.0f}ms")
+    return current
@@ -0,0 +1,64 @@
+import unittest
+from postnormalism.analysis.alignment import column_type, measure
+from postnormalism.schema import Database, Domain, Table
+
+
+class TestAlignment(unittest.TestCase):
+
+    def setUp(self):
+        self.table = Table(create="""
+        CREATE TABLE event (
+            flag BOOLEAN NOT NULL,
+            id BIGSERIAL PRIMARY KEY,
+            kind SMALLINT,
+            name VARCHAR(20) NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            amount INT,
+            UNIQUE (name)
+        );
+        """)
+
+    def test_column_type(self):
+        self.assertEqual(column_type("created_at TIMESTAMP WITH TIME ZONE DEFAULT now()"), "timestamp with time zone")
+        self.assertEqual(column_type("price NUMERIC(10, 2) NOT NULL"), "numeric")
+        self.assertEqual(column_type("tags TEXT[]"), "text[]")
+
+    def test_measure(self):
+        # bool, 7 bytes padding, bigint
+        self.assertEqual(measure([(1, 1), (8, 8)], 16), (40, 7))
+        self.assertEqual(measure([(8, 8), (1, 1)], 16), (40, 0))
+
+    def test_column_layout_proposes_order(self):
+        layout = Database(load_order=[self.table]).column_layouts()[0]
+
+        self.assertEqual((layout.width, layout.padding), (80, 13))
+        self.assertEqual(layout.proposed_columns, ["id", "created_at", "amount", "kind", "flag", "name"])
+        self.assertEqual((layout.proposed_width, layout.proposed_padding), (64, 0))
+        self.assertEqual(layout.savings, 16)
+
+    def test_create_sql(self):
+        layout = Database(load_order=[self.table]).column_layouts()[0]
+        self.assertEqual(layout.create_sql(), (
+            "CREATE TABLE event (\n"
+            "    id BIGSERIAL PRIMARY KEY,\n"
+            "    created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),\n"
+            "    amount INT,\n"
+            "    kind SMALLINT,\n"
+            "    flag BOOLEAN NOT NULL,\n"
+            "    name VARCHAR(20) NOT NULL,\n"
+            "    UNIQUE (name)\n"
+            ");"
+        ))
+
+    def test_domains_resolve_to_base_types(self):
+        db = Database(load_order=[
+            Domain(create="CREATE DOMAIN positive_int AS BIGINT CHECK (VALUE > 0);"),
+            Table(create="CREATE TABLE counter (active BOOLEAN, total positive_int);"),
+        ])
+        layout = db.column_layouts()[0]
+        self.assertEqual(layout.padding, 7)
+        self.assertEqual(layout.proposed_columns, ["total", "active"])
+
+
+if __name__ == '__main__':
+    unittest.main()
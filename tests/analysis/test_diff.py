@@ -0,0 +1,108 @@
+import time
+import unittest
+from postnormalism.analysis.diff import normalize_sql
+from postnormalism.schema import Database, Function, Index, Schema, Table, Trigger, View
+
+
+def release(price_view: str, touch_body: str = "BEGIN NEW.updated_at = now(); RETURN NEW; END;",
+            extra: list = None) -> Database:
+    return Database(load_order=[
+        Schema(create="CREATE SCHEMA shop;"),
+        Table(create="CREATE TABLE shop.product (id INT PRIMARY KEY, price NUMERIC, updated_at TIMESTAMPTZ);"),
+        Function(create=f"""
+        CREATE FUNCTION shop.touch() RETURNS TRIGGER AS $$ {touch_body} $$ LANGUAGE plpgsql;
+        """),
+        Trigger(create="CREATE TRIGGER touch BEFORE UPDATE ON shop.product FOR EACH ROW EXECUTE FUNCTION shop.touch();"),
+        View(create=f"CREATE VIEW shop.priced AS {price_view};"),
+        View(create="CREATE VIEW shop.expensive AS SELECT id FROM shop.priced WHERE price > 100;"),
+        *(extra or []),
+    ])
+
+
+class TestDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.old = release("SELECT id, price FROM shop.product")
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql("CREATE  VIEW x AS\n  SELECT 'A  b' -- note\nFROM T;"),
+            "create view x as select 'A  b' from t"
+        )
+        self.assertEqual(normalize_sql("SELECT $$ Keep  Me $$"), "select $$ Keep  Me $$")
+
+    def test_identical_databases(self):
+        reformatted = release("SELECT id,\n       price\n  FROM shop.product  -- all products")
+        self.assertEqual(self.old.diff(reformatted), [])
+
+    def test_changed_view_recreates_dependents(self):
+        new = release("SELECT id, price * 1.2 AS price FROM shop.product")
+        plan = [(change.action, change.item.qualified_name, change.reason) for change in self.old.diff(new)]
+        self.assertEqual(plan, [
+            ('drop', 'shop.expensive', 'dependent'),
+            ('drop', 'shop.priced', 'changed'),
+            ('create', 'shop.priced', 'changed'),
+            ('create', 'shop.expensive', 'dependent'),
+        ])
+        self.assertEqual(self.old.diff(new)[0].sql, "DROP VIEW IF EXISTS shop.expensive;")
+
+    def test_replaced_and_altered_items(self):
+        new = release("SELECT id, price FROM shop.product", touch_body="BEGIN NEW.updated_at = clock_timestamp(); RETURN NEW; END;",
+                      extra=[Index(create="CREATE INDEX product_price_idx ON shop.product (price);")])
+        plan = self.old.diff(new)
+        self.assertEqual([(change.action, change.item.qualified_name) for change in plan], [
+            ('replace', 'shop.touch'),
+            ('create', 'shop.product_price_idx'),
+        ])
+        self.assertIn("CREATE OR REPLACE FUNCTION", plan[0].sql)
+
+        changed_table = Database(load_order=[Table(create="CREATE TABLE product (id BIGINT PRIMARY KEY);")])
+        original_table = Database(load_order=[Table(create="CREATE TABLE product (id INT PRIMARY KEY);")])
+        change = original_table.diff(changed_table)[0]
+        self.assertEqual((change.action, change.sql), ('alter', None))
+
+    def test_storage_changes(self):
+        def storage_release(**storage):
+            return Database(load_order=[Table(create="CREATE TABLE event (id INT, body TEXT);", **storage)])
+
+        plan = storage_release().diff(storage_release(storage={'fillfactor': 70}))
+        self.assertEqual([(change.action, change.sql) for change in plan],
+                         [('storage', "ALTER TABLE public.event SET (fillfactor = 70);")])
+
+        plan = storage_release(storage={'fillfactor': 70}).diff(
+            storage_release(storage={'fillfactor': 70}, column_storage={'body': {'compression': 'lz4'}}))
+        self.assertEqual([change.sql for change in plan],
+                         ["ALTER TABLE public.event ALTER COLUMN body SET COMPRESSION LZ4;"])
+        self.assertEqual(storage_release(storage={'fillfactor': 70}).diff(storage_release(storage={'fillfactor': 70})),
+                         [])
+
+        plan = Database(load_order=[]).diff(storage_release(storage={'fillfactor': 70}))
+        self.assertEqual([change.action for change in plan], ['create', 'storage'])
+
+    def test_removed_items_are_dropped_in_reverse_load_order(self):
+        plan = self.old.diff(Database(load_order=[]))
+        self.assertEqual([change.sql for change in plan], [
+            "DROP VIEW IF EXISTS shop.expensive;",
+            "DROP VIEW IF EXISTS shop.priced;",
+            "DROP TRIGGER IF EXISTS touch ON shop.product;",
+            "DROP FUNCTION IF EXISTS shop.touch();",
+            "DROP TABLE IF EXISTS shop.product;",
+            "DROP SCHEMA IF EXISTS shop;",
+        ])
+
+    def test_large_diff(self):
+        def build(changed):
+            tables = [Table(create=f"CREATE TABLE t{i} (id INT PRIMARY KEY);") for i in range(5000)]
+            views = [View(create=f"CREATE VIEW v{i} AS SELECT id FROM t{i}{' WHERE id > 0' if i in changed else ''};")
+                     for i in range(5000)]
+            return Database(load_order=tables + views)
+
+        old, new = build(set()), build({1, 2, 3})
+        started = time.monotonic()
+        plan = old.diff(new)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(len(plan), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from postnormalism.schema import Database, Index, Table
+
+
+class TestForeignKeys(unittest.TestCase):
+
+    def setUp(self):
+        self.team = Table(create="""
+        CREATE TABLE team (
+            id UUID PRIMARY KEY,
+            name TEXT NOT NULL
+        );
+        """)
+        self.player = Table(create="""
+        CREATE TABLE player (
+            id UUID PRIMARY KEY,
+            team UUID REFERENCES team(id),
+            mentor UUID REFERENCES player(id),
+            name TEXT
+        );
+        """, alter="""
+        ALTER TABLE player ADD COLUMN sponsor UUID REFERENCES team;
+        CREATE INDEX player_mentor_idx ON player (mentor, name);
+        """)
+        self.membership = Table(create="""
+        CREATE TABLE membership (
+            player UUID NOT NULL,
+            team UUID NOT NULL,
+            PRIMARY KEY (team, player),
+            FOREIGN KEY (player) REFERENCES player(id),
+            FOREIGN KEY (team, player) REFERENCES roster(team, player)
+        );
+        """)
+
+    def test_unindexed_foreign_keys(self):
+        db = Database(load_order=[self.team, self.player, self.membership])
+
+        unindexed = [(key.table.name, key.columns, key.references) for key in db.unindexed_foreign_keys()]
+
+        self.assertEqual(unindexed, [
+            ("player", ["team"], "team"),
+            ("player", ["sponsor"], "team"),
+            ("membership", ["player"], "player"),
+        ])
+
+    def test_registered_indexes_cover_foreign_keys(self):
+        db = Database(load_order=[
+            self.team, self.player, self.membership,
+            Index(create="CREATE INDEX player_team_idx ON player (team);"),
+            Index(create="CREATE INDEX membership_player_idx ON public.membership (player, team);"),
+        ])
+
+        unindexed = [(key.table.name, key.columns) for key in db.unindexed_foreign_keys()]
+
+        self.assertEqual(unindexed, [("player", ["sponsor"])])
+
+    def test_foreign_key_constraints_added_by_alter(self):
+        table = Table(create="""
+        CREATE TABLE transfer (
+            id UUID PRIMARY KEY,
+            source UUID,
+            target UUID
+        );
+        """, alter="""
+        ALTER TABLE transfer ADD CONSTRAINT transfer_source_fk FOREIGN KEY (source) REFERENCES team (id);
+        ALTER TABLE transfer ADD FOREIGN KEY (target) REFERENCES team (id);
+        """)
+        db = Database(load_order=[self.team, table])
+
+        unindexed = [(key.columns, key.references) for key in db.unindexed_foreign_keys()]
+
+        self.assertEqual(unindexed, [(["source"], "team"), (["target"], "team")])
+
+    def test_index_sql(self):
+        db = Database(load_order=[self.team, self.player])
+        self.assertEqual(
+            db.unindexed_foreign_keys()[0].index_sql(),
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS player_team_idx ON public.player (team);"
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
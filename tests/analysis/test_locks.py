@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from postnormalism.analysis.locks import analyze_ddl, classify_statement
+from postnormalism.schema import Database, Table
+
+
+class TestLocks(unittest.TestCase):
+
+    def classify(self, statement, types=None):
+        return [(table, risk['lock'], risk.get('rewrite', False), risk.get('scan', False))
+                for table, risk in classify_statement(statement, types)]
+
+    def test_classify_alter_table(self):
+        self.assertEqual(self.classify("ALTER TABLE item ADD COLUMN note TEXT DEFAULT 'none';"),
+                         [('public.item', 'ACCESS EXCLUSIVE', False, False)])
+        self.assertEqual(self.classify("ALTER TABLE item ADD COLUMN token UUID DEFAULT gen_random_uuid();"),
+                         [('public.item', 'ACCESS EXCLUSIVE', True, False)])
+        self.assertEqual(self.classify("ALTER TABLE shop.item ALTER COLUMN price TYPE NUMERIC(12, 2)"),
+                         [('shop.item', 'ACCESS EXCLUSIVE', True, False)])
+        self.assertEqual(self.classify("ALTER TABLE item ALTER COLUMN name TYPE TEXT"),
+                         [('public.item', 'ACCESS EXCLUSIVE', True, False)])
+        self.assertEqual(self.classify(
+            "ALTER TABLE item ALTER COLUMN name SET NOT NULL, "
+            "ADD CONSTRAINT item_owner_fk FOREIGN KEY (owner_id) REFERENCES owner (id) NOT VALID"
+        ), [('public.item', 'ACCESS EXCLUSIVE', False, True), ('public.item', 'SHARE ROW EXCLUSIVE', False, False)])
+
+    def test_classify_type_changes(self):
+        types = {'public.item': {'name': 'VARCHAR(32)', 'code': 'character varying', 'price': 'NUMERIC(10, 2)',
+                                 'amount': 'numeric', 'count': 'INT'}}
+        rewrites = {
+            "name TYPE TEXT": False,
+            "name TYPE VARCHAR(64)": False,
+            "name SET DATA TYPE character varying": False,
+            "name TYPE VARCHAR(16)": True,
+            "name TYPE TEXT USING trim(name)": True,
+            "code TYPE TEXT": False,
+            "code TYPE VARCHAR(64)": True,
+            "price TYPE NUMERIC(12, 2)": False,
+            "price TYPE DECIMAL": False,
+            "price TYPE NUMERIC(12, 4)": True,
+            "price TYPE NUMERIC(8, 2)": True,
+            "amount TYPE NUMERIC(12, 2)": True,
+            "count TYPE TEXT": True,
+            "count TYPE BIGINT": True,
+            "missing TYPE TEXT": True,
+        }
+        for change, rewrite in rewrites.items():
+            with self.subTest(change):
+                self.assertEqual(self.classify(f"ALTER TABLE item ALTER COLUMN {change}", types),
+                                 [('public.item', 'ACCESS EXCLUSIVE', rewrite, False)])
+
+    def test_classify_other_statements(self):
+        self.assertEqual(self.classify("CREATE INDEX item_name_idx ON item (name);"),
+                         [('public.item', 'SHARE', False, True)])
+        self.assertEqual(self.classify("CREATE INDEX CONCURRENTLY item_name_idx ON item (name);"),
+                         [('public.item', 'SHARE UPDATE EXCLUSIVE', False, False)])
+        self.assertEqual(self.classify("VACUUM FULL VERBOSE item;"), [('public.item', 'ACCESS EXCLUSIVE', True, False)])
+        self.assertEqual(self.classify("CREATE TABLE item (id INT);"), [])
+        self.assertEqual(self.classify("UPDATE item SET name = lower(name);"), [])
+
+    def test_analyze_ddl_flags_large_tables(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [
+            ('public.item', 2000000.0, 50000, {'price': 'integer'}),
+            ('public.tag', 10.0, 1, None),
+        ]
+        risks = analyze_ddl([
+            ('001_item.sql', "ALTER TABLE item ALTER COLUMN price TYPE BIGINT;"),
+            ('002_tag.sql', "CREATE INDEX tag_name_idx ON tag (name);"),
+            ('003_item.sql', "ALTER TABLE item DROP COLUMN legacy;"),
+        ], cursor)
+
+        self.assertEqual(cursor.execute.call_count, 1)
+        self.assertEqual(cursor.execute.call_args[0][1], (['public.item', 'public.tag'],))
+        self.assertEqual([(risk.source, risk.flagged) for risk in risks],
+                         [('001_item.sql', True), ('002_tag.sql', False), ('003_item.sql', False)])
+        self.assertEqual(risks[0].bytes, 50000 * 8192)
+        self.assertTrue(risks[2].blocks_reads)
+
+    def test_database_lock_risks(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, '001_backfill.sql'), 'w') as file:
+                file.write("ALTER TABLE item ADD COLUMN id BIGSERIAL;\nUPDATE item SET name = '';")
+            db = Database(migrations_folder=folder, load_order=[
+                Table(create="CREATE TABLE item (name TEXT);",
+                      alter="ALTER TABLE item ADD CONSTRAINT item_name_check CHECK (name <> '');"),
+            ])
+            risks = db.lock_risks()
+
+        self.assertEqual([(risk.source, risk.rewrite, risk.scan, risk.flagged) for risk in risks], [
+            ('001_backfill.sql', True, False, True),
+            ('public.item', False, True, True),
+        ])
+
+    def test_database_lock_risks_read_live_column_types(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, '001_types.sql'), 'w') as file:
+                file.write("ALTER TABLE item ALTER COLUMN amount TYPE BIGINT, ALTER COLUMN name TYPE TEXT;")
+            # the table already declares the target types of the migration
+            db = Database(migrations_folder=folder, load_order=[
+                Table(create="CREATE TABLE item (amount BIGINT, name TEXT NOT NULL);"),
+            ])
+            cursor = MagicMock()
+            cursor.fetchone.return_value = (False,)
+            cursor.fetchall.return_value = [
+                ('public.item', 1e6, 5000, {'amount': 'integer', 'name': 'character varying(32)'}),
+            ]
+
+            self.assertEqual([risk.rewrite for risk in db.lock_risks()[:2]], [True, True])
+            risks = db.lock_risks(cursor)
+
+        self.assertEqual([(risk.rewrite, risk.flagged) for risk in risks[:2]], [(True, True), (False, False)])
+        self.assertIn("format_type(a.atttypid, a.atttypmod)", cursor.execute.call_args[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
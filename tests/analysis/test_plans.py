@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from postnormalism.analysis.plans import explain_sql, fingerprint_plan
+from postnormalism.schema import Database, Function, Table, View
+
+
+SEQ_SCAN_PLAN = {
+    "Node Type": "Sort", "Plan Rows": 100000, "Plan Width": 120,
+    "Plans": [{"Node Type": "Seq Scan", "Relation Name": "material", "Plan Rows": 100000, "Plan Width": 120}]
+}
+
+INDEX_PLAN = {
+    "Node Type": "Nested Loop", "Plan Rows": 10,
+    "Plans": [
+        {"Node Type": "Index Scan", "Relation Name": "material", "Index Name": "material_pkey", "Plan Rows": 1},
+        {"Node Type": "Index Scan", "Relation Name": "player", "Index Name": "player_pkey", "Plan Rows": 10},
+    ]
+}
+
+
+class TestPlans(unittest.TestCase):
+
+    def setUp(self):
+        self.view = View(create="CREATE VIEW material_list AS SELECT * FROM material ORDER BY name;")
+        self.lookup = Function(create="""
+        CREATE FUNCTION material_by_name(material_name TEXT) RETURNS SETOF material AS $$
+            SELECT * FROM material WHERE name = material_name
+        $$ LANGUAGE sql;
+        """)
+        self.plpgsql = Function(create="""
+        CREATE FUNCTION answer() RETURNS INTEGER AS $$ BEGIN RETURN 42; END; $$ LANGUAGE plpgsql;
+        """)
+        self.db = Database(load_order=[
+            Table(create="CREATE TABLE material (id INT, name TEXT);"), self.view, self.lookup, self.plpgsql
+        ])
+
+    def test_explain_sql(self):
+        self.assertEqual(explain_sql(self.view, {}), ("SELECT * FROM public.material_list", ()))
+        self.assertIsNone(explain_sql(self.lookup, {}))
+        self.assertEqual(
+            explain_sql(self.lookup, {"public.material_by_name": ("steel",)}),
+            ("SELECT * FROM public.material_by_name(%s)", ("steel",))
+        )
+        self.assertIsNone(explain_sql(self.plpgsql, {}))
+
+    def test_fingerprint_ignores_estimates(self):
+        estimated = dict(INDEX_PLAN, **{"Plan Rows": 99999})
+        self.assertEqual(fingerprint_plan(INDEX_PLAN), fingerprint_plan(estimated))
+        self.assertNotEqual(fingerprint_plan(INDEX_PLAN), fingerprint_plan(SEQ_SCAN_PLAN))
+
+    def test_explain_items_flags_issues_and_plan_changes(self):
+        with tempfile.TemporaryDirectory() as folder:
+            fingerprint_file = os.path.join(folder, "plans.json")
+            cursor = MagicMock()
+            cursor.fetchone.side_effect = [(4096 * 1024,), ([{"Plan": INDEX_PLAN}],), ([{"Plan": INDEX_PLAN}],)]
+            cursor.fetchall.return_value = [("material", 50000), ("player", 10)]
+            first = self.db.explain_items(cursor, samples={"public.material_by_name": ("steel",)},
+                                          fingerprint_file=fingerprint_file)
+
+            cursor.fetchone.side_effect = [(4096 * 1024,), ([{"Plan": SEQ_SCAN_PLAN}],), ([{"Plan": INDEX_PLAN}],)]
+            second = self.db.explain_items(cursor, samples={"public.material_by_name": ("steel",)},
+                                           fingerprint_file=fingerprint_file)
+
+        self.assertEqual([report.issues for report in first], [[], []])
+        self.assertEqual([report.changed for report in second], [True, False])
+        self.assertEqual(
+            [issue.kind for issue in second[0].issues],
+            ["disk_sort", "seq_scan"]
+        )
+        cursor.execute.assert_any_call("EXPLAIN (FORMAT JSON) SELECT * FROM public.material_by_name(%s)", ("steel",))
+
+    def test_nested_loop_blowup(self):
+        plan = {
+            "Node Type": "Nested Loop",
+            "Plans": [{"Node Type": "Seq Scan", "Plan Rows": 5000}, {"Node Type": "Seq Scan", "Plan Rows": 5000}]
+        }
+        cursor = MagicMock()
+        cursor.fetchone.side_effect = [(4096 * 1024,), ([{"Plan": plan}],)]
+        cursor.fetchall.return_value = []
+
+        reports = self.db.explain_items(cursor)
+
+        self.assertEqual([issue.kind for issue in reports[0].issues], ["nested_loop"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import uuid
+from unittest.mock import MagicMock
+from postnormalism.analysis.triggers import TriggerOverhead, generate_rows, measure_triggers, suggest
+from postnormalism.schema import Database, Function, Table, Trigger
+
+
+ITEM = Table(create="""
+CREATE TABLE item (
+    id BIGSERIAL PRIMARY KEY,
+    code VARCHAR(3) NOT NULL,
+    token UUID NOT NULL,
+    price NUMERIC(12, 2),
+    active BOOLEAN,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    owner_id INTEGER REFERENCES owner (id),
+    status item_status
+);
+""")
+TOUCH = Function(create="""
+CREATE FUNCTION touch() RETURNS TRIGGER AS $$ BEGIN RETURN NEW; END; $$ LANGUAGE plpgsql;
+""")
+AUDIT = Trigger(create="CREATE TRIGGER item_audit AFTER INSERT OR UPDATE ON item FOR EACH ROW EXECUTE FUNCTION touch();")
+STAMP = Trigger(create="CREATE TRIGGER item_stamp BEFORE UPDATE ON item FOR EACH ROW EXECUTE FUNCTION touch();")
+
+
+class TestTriggerOverhead(unittest.TestCase):
+
+    def test_generate_rows(self):
+        columns, rows = generate_rows(ITEM, 1000)
+        self.assertEqual(columns, ['code', 'token', 'price', 'active', 'owner_id'])
+        self.assertEqual(len(rows), 1000)
+        self.assertEqual(rows[999], ('000', uuid.UUID(int=1000), 250.0, True, 1000))
+
+    def test_generate_rows_needs_samples_for_unknown_types(self):
+        table = Table(create="""
+        CREATE TABLE tagged (
+            id INTEGER,
+            status item_status NOT NULL
+        );
+        """)
+        with self.assertRaisesRegex(ValueError, "public.tagged.status"):
+            generate_rows(table, 10)
+        columns, rows = generate_rows(table, 2, samples={'public.tagged.status': lambda i: 'new'},
+                                      domains={'item_status': 'text'})
+        self.assertEqual(rows, [(1, 'new'), (2, 'new')])
+
+    def test_measure_triggers(self):
+        cursor = MagicMock()
+
+        def fetchall():
+            sql = cursor.execute.call_args[0][0]
+            return [(i,) for i in range(1, 6)] if sql.startswith('INSERT') else []
+
+        cursor.fetchall.side_effect = fetchall
+        database = Database(load_order=[ITEM, TOUCH, AUDIT, STAMP])
+        results = measure_triggers(database, cursor, rows=10, batch=5)
+
+        self.assertEqual([result.trigger for result in results], [AUDIT, STAMP])
+        statements = [call[0][0] for call in cursor.execute.call_args_list]
+        self.assertIn('ALTER TABLE "public"."item" ENABLE TRIGGER "item_audit"', statements)
+        self.assertIn('ALTER TABLE "public"."item" DISABLE TRIGGER "item_stamp"', statements)
+        inserts = [sql for sql in statements if sql.startswith('INSERT')]
+        # a warm up, the baseline and one run per trigger in batches of 5
+        self.assertEqual(len(inserts), 8)
+        self.assertTrue(inserts[0].endswith('RETURNING "id"'))
+        self.assertIn('UPDATE "public"."item" SET "code" = "code" WHERE "id" = ANY(%s)', statements)
+
+    def test_suggestion(self):
+        overhead = TriggerOverhead(AUDIT, 'public.item', 1000, 3.0, 4.0, 1.0, 1.0)
+        self.assertAlmostEqual(overhead.insert_overhead, 0.002)
+        self.assertAlmostEqual(overhead.share, 0.75)
+        self.assertIn("FOR EACH STATEMENT", suggest(overhead, 0.5))
+        self.assertIsNone(suggest(overhead, 0.8))
+        self.assertIsNone(suggest(TriggerOverhead(STAMP, 'public.item', 1000, 3.0, 4.0, 1.0, 1.0), 0.5))
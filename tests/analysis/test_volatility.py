@@ -0,0 +1,111 @@
+import unittest
+from postnormalism.analysis.volatility import advise_functions
+from postnormalism.schema import Database, Function
+
+
+class TestVolatility(unittest.TestCase):
+
+    def advise(self, *creates):
+        return {advice.function.name: advice for advice in advise_functions([Function(create=c) for c in creates])}
+
+    def test_pure_sql_function_is_immutable(self):
+        advice = self.advise("CREATE FUNCTION slug(name TEXT) RETURNS TEXT AS $$ SELECT lower(trim(name)) $$ LANGUAGE sql;")
+        self.assertEqual((advice['slug'].volatility, advice['slug'].parallel), ('immutable', 'safe'))
+        self.assertEqual(
+            advice['slug'].create_sql(),
+            "CREATE FUNCTION slug(name TEXT) RETURNS TEXT AS $$ SELECT lower(trim(name)) $$ LANGUAGE sql "
+            "IMMUTABLE PARALLEL SAFE;"
+        )
+        self.assertEqual(advice['slug'].rewritten().volatility, 'immutable')
+
+    def test_reading_tables_is_stable(self):
+        advice = self.advise("""
+        CREATE FUNCTION price(item_id INT) RETURNS NUMERIC LANGUAGE sql VOLATILE AS $$
+            SELECT price FROM item WHERE id = item_id AND valid_from <= now()
+        $$;
+        """)
+        self.assertEqual((advice['price'].volatility, advice['price'].parallel), ('stable', 'safe'))
+        self.assertIn("reads item", advice['price'].reasons)
+        self.assertNotIn("VOLATILE", advice['price'].create_sql())
+        self.assertTrue(advice['price'].create_sql().endswith("$$ STABLE PARALLEL SAFE;"))
+
+    def test_writes_and_volatile_calls(self):
+        advice = self.advise(
+            "CREATE FUNCTION log_it() RETURNS VOID AS $$ INSERT INTO log VALUES (now()) $$ LANGUAGE sql;",
+            "CREATE FUNCTION token() RETURNS UUID AS $$ SELECT gen_random_uuid() $$ LANGUAGE sql;",
+        )
+        self.assertEqual(list(advice), ['token'])
+        self.assertEqual((advice['token'].volatility, advice['token'].parallel), ('volatile', 'restricted'))
+
+    def test_writes_to_schema_qualified_tables(self):
+        advice = self.advise(
+            "CREATE FUNCTION bump() RETURNS VOID AS $$ UPDATE app.counters SET n = n + 1 $$ LANGUAGE sql;",
+            "CREATE FUNCTION purge() RETURNS VOID AS $$ DELETE FROM ONLY app.log $$ LANGUAGE sql STABLE;",
+        )
+        self.assertNotIn('bump', advice)
+        self.assertEqual((advice['purge'].volatility, advice['purge'].parallel), ('volatile', 'unsafe'))
+
+    def test_stable_builtins(self):
+        advice = self.advise(
+            "CREATE FUNCTION label(a TEXT, ts TIMESTAMPTZ) RETURNS TEXT AS $$ SELECT concat(a, ts) $$ LANGUAGE sql;",
+            "CREATE FUNCTION doc(a INT) RETURNS JSONB AS $$ SELECT jsonb_build_object('a', a) $$ LANGUAGE sql;",
+        )
+        self.assertEqual(advice['label'].volatility, 'stable')
+        self.assertEqual(advice['doc'].volatility, 'stable')
+
+    def test_casts(self):
+        advice = self.advise(
+            "CREATE FUNCTION at(x TEXT) RETURNS TIMESTAMPTZ AS $$ SELECT x::timestamptz $$ LANGUAGE sql;",
+            "CREATE FUNCTION day(x TEXT) RETURNS DATE AS $$ SELECT CAST(x AS date) $$ LANGUAGE sql;",
+            "CREATE FUNCTION num(x TEXT) RETURNS INT AS $$ SELECT x::int + CAST(x AS numeric)::int $$ LANGUAGE sql;",
+        )
+        self.assertEqual(list(advice), ['num'])
+        self.assertEqual(advice['num'].volatility, 'immutable')
+
+    def test_dates_and_times(self):
+        advice = self.advise(
+            "CREATE FUNCTION today() RETURNS TEXT AS $$ SELECT date 'today' || '' $$ LANGUAGE sql;",
+            "CREATE FUNCTION tomorrow(t TIMESTAMPTZ) RETURNS TIMESTAMPTZ AS $$ SELECT t + interval '1 day' $$ "
+            "LANGUAGE sql;",
+            "CREATE FUNCTION stamp(t TIMESTAMPTZ) RETURNS TEXT AS $$ SELECT t || '' $$ LANGUAGE sql;",
+            "CREATE FUNCTION named(date TEXT) RETURNS TEXT AS $$ SELECT 'on ' || date $$ LANGUAGE sql;",
+        )
+        self.assertNotIn('today', advice)
+        self.assertNotIn('tomorrow', advice)
+        self.assertEqual((advice['stamp'].volatility, advice['stamp'].parallel), ('stable', 'safe'))
+        self.assertIn("takes or returns dates and times", advice['stamp'].reasons)
+        self.assertEqual(advice['named'].volatility, 'immutable')
+
+    def test_declared_settings_that_are_too_strict(self):
+        advice = self.advise(
+            "CREATE FUNCTION total() RETURNS BIGINT AS $$ SELECT count(*) FROM item $$ LANGUAGE sql "
+            "IMMUTABLE PARALLEL SAFE;"
+        )
+        self.assertEqual(advice['total'].volatility, 'stable')
+
+    def test_unknown_calls_and_other_languages_are_left_alone(self):
+        advice = self.advise(
+            "CREATE FUNCTION a() RETURNS INT AS $$ SELECT mystery() $$ LANGUAGE sql;",
+            "CREATE FUNCTION b() RETURNS INT AS $$ return 1 $$ LANGUAGE plpython3u;",
+            "CREATE FUNCTION c() RETURNS TRIGGER AS $$ BEGIN RETURN NEW; END; $$ LANGUAGE plpgsql;",
+        )
+        self.assertEqual(advice, {})
+
+    def test_calls_to_registered_functions(self):
+        db = Database(load_order=[
+            Function(create="CREATE FUNCTION double(x INT) RETURNS INT AS $$ SELECT x * 2 $$ LANGUAGE sql;"),
+            Function(create="""
+            CREATE FUNCTION quadruple(x INT) RETURNS INT AS $$
+            BEGIN
+                RETURN double(double(x));
+            END;
+            $$ LANGUAGE plpgsql;
+            """),
+        ])
+        advice = db.function_advice()
+        self.assertEqual([(a.function.name, a.volatility, a.parallel) for a in advice],
+                         [('double', 'immutable', 'safe'), ('quadruple', 'immutable', 'safe')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -106,3 +106,15 @@ class TestFunction(unittest.TestCase):
         function = Function(create=create_statement)
         self.assertEqual(function.schema, 'public')
         self.assertEqual(function.name, 'function_name')
+
+    def test_function_arguments_and_language(self):
+        create_statement = """
+        CREATE FUNCTION api.price(amount NUMERIC(10, 2), rate INT DEFAULT 1)
+        RETURNS NUMERIC AS $$
+            SELECT amount * rate
+        $$ LANGUAGE sql;
+        """
+        function = Function(create=create_statement)
+        self.assertEqual(function.arguments, ['amount NUMERIC(10, 2)', 'rate INT DEFAULT 1'])
+        self.assertEqual(function.language, 'sql')
+        self.assertEqual(Function(create=self.create_function).arguments, [])
@@ -0,0 +1,34 @@
+import unittest
+from postnormalism.schema import Index
+
+
+class TestIndex(unittest.TestCase):
+
+    def test_index_parsing(self):
+        index = Index(create="CREATE UNIQUE INDEX material_name_idx ON api.material (lower(name));")
+        self.assertEqual(index.name, 'material_name_idx')
+        self.assertEqual(index.schema, 'api')
+        self.assertEqual(index.table, 'api.material')
+        self.assertEqual(index.columns, [])
+        self.assertTrue(index.unique)
+
+    def test_index_columns(self):
+        index = Index(create="CREATE INDEX CONCURRENTLY player_team_idx ON player USING btree (team, joined_at DESC);")
+        self.assertEqual(index.schema, 'public')
+        self.assertEqual(index.columns, ['team', 'joined_at'])
+        self.assertFalse(index.unique)
+
+    def test_index_full_sql_with_exists(self):
+        index = Index(create="CREATE INDEX CONCURRENTLY player_team_idx ON player (team);")
+        self.assertEqual(
+            index.full_sql(exists=True),
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS player_team_idx ON player (team);"
+        )
+
+    def test_unnamed_index(self):
+        with self.assertRaises(ValueError):
+            Index(create="CREATE INDEX ON player (team);")
+
+
+if __name__ == '__main__':
+    unittest.main()
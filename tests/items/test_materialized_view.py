@@ -0,0 +1,55 @@
+import unittest
+from postnormalism.schema import MaterializedView
+
+
+class TestMaterializedView(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.create = """
+        CREATE MATERIALIZED VIEW reporting.daily_sales AS
+        SELECT s.day, sum(s.amount) AS total
+        FROM sales s JOIN reporting.stores st ON st.id = s.store
+        GROUP BY s.day;
+        """
+        self.index = """
+        CREATE UNIQUE INDEX daily_sales_day ON reporting.daily_sales (day);
+        """
+
+    def test_materialized_view_name_and_schema(self):
+        view = MaterializedView(create=self.create)
+        self.assertEqual(view.schema, 'reporting')
+        self.assertEqual(view.name, 'daily_sales')
+        self.assertEqual(view.itype, 'materialized_view')
+
+    def test_materialized_view_full_sql_with_index(self):
+        view = MaterializedView(create=self.create, index=self.index)
+        self.assertEqual(view.full_sql(), f"{self.create.strip()}\n\n{self.index.strip()}")
+
+    def test_materialized_view_full_sql_with_exists(self):
+        view = MaterializedView(create=self.create, index=self.index)
+        output_sql = view.full_sql(exists=True)
+        self.assertIn("CREATE MATERIALIZED VIEW IF NOT EXISTS", output_sql)
+        self.assertIn("CREATE UNIQUE INDEX IF NOT EXISTS daily_sales_day", output_sql)
+
+    def test_materialized_view_relations(self):
+        view = MaterializedView(create=self.create)
+        self.assertEqual(view.relations, {"public.sales", "reporting.stores"})
+
+    def test_refresh_sql(self):
+        self.assertEqual(
+            MaterializedView(create=self.create).refresh_sql(),
+            "REFRESH MATERIALIZED VIEW reporting.daily_sales;"
+        )
+        self.assertEqual(
+            MaterializedView(create=self.create, index=self.index).refresh_sql(),
+            "REFRESH MATERIALIZED VIEW CONCURRENTLY reporting.daily_sales;"
+        )
+
+    def test_refresh_concurrently_requires_unique_index(self):
+        view = MaterializedView(create=self.create)
+        with self.assertRaises(ValueError):
+            view.refresh_sql(concurrently=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
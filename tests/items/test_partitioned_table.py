@@ -0,0 +1,93 @@
+import unittest
+from datetime import date
+from unittest.mock import MagicMock
+from postnormalism.schema import Database, PartitionedTable
+
+
+class TestPartitionedTable(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.create = """
+        CREATE TABLE events.page_view (
+            id BIGSERIAL,
+            viewed_at TIMESTAMPTZ NOT NULL,
+            path TEXT
+        ) PARTITION BY RANGE (viewed_at);
+        """
+
+    def test_partitioned_table_parsing(self):
+        table = PartitionedTable(create=self.create, interval='day')
+        self.assertEqual(table.name, 'page_view')
+        self.assertEqual(table.schema, 'events')
+        self.assertEqual(table.strategy, 'range')
+        self.assertEqual(table.partition_key, 'viewed_at')
+        self.assertEqual(table.columns, ['id', 'viewed_at', 'path'])
+
+    def test_partition_by_on_its_own_line(self):
+        table = PartitionedTable(create="""
+        CREATE TABLE events.page_view (
+            id BIGSERIAL,
+            created_at DATE NOT NULL
+        )
+        PARTITION BY RANGE (created_at);
+        """, interval='month')
+        self.assertEqual(table.columns, ['id', 'created_at'])
+        self.assertEqual(table.column_list, '"id", "created_at"')
+
+    def test_missing_partition_by(self):
+        with self.assertRaises(ValueError):
+            PartitionedTable(create="CREATE TABLE plain (id INT);", interval='day')
+
+    def test_range_requires_interval(self):
+        with self.assertRaises(ValueError):
+            PartitionedTable(create=self.create)
+
+    def test_range_partitions_created_ahead(self):
+        table = PartitionedTable(create=self.create, interval='month', premake=1)
+        statements = table.partition_sql({'page_view_p202401'}, today=date(2024, 1, 15))
+        self.assertEqual(statements, [
+            "CREATE TABLE IF NOT EXISTS events.page_view_p202402 PARTITION OF events.page_view "
+            "FOR VALUES FROM ('2024-02-01') TO ('2024-03-01');"
+        ])
+
+    def test_expired_partitions(self):
+        existing = {'page_view_p20240101', 'page_view_p20240108', 'page_view_p20240110'}
+        detach = PartitionedTable(create=self.create, interval='day', premake=0, retention=2)
+        self.assertEqual(detach.partition_sql(existing, today=date(2024, 1, 10)), [
+            "ALTER TABLE events.page_view DETACH PARTITION events.page_view_p20240101;",
+        ])
+
+        drop = PartitionedTable(create=self.create, interval='day', premake=0, retention=2, retention_action='drop')
+        self.assertEqual(drop.partition_sql(existing, today=date(2024, 1, 10)), [
+            "DROP TABLE IF EXISTS events.page_view_p20240101;",
+        ])
+
+    def test_list_and_hash_partitions(self):
+        by_region = PartitionedTable(
+            create="CREATE TABLE account (id INT, region TEXT) PARTITION BY LIST (region);",
+            values={'eu': ['DE', 'FR'], 'us': ['US']}
+        )
+        self.assertEqual(by_region.partition_sql({'account_peu'}), [
+            "CREATE TABLE IF NOT EXISTS public.account_pus PARTITION OF public.account FOR VALUES IN ('US');"
+        ])
+
+        by_hash = PartitionedTable(create="CREATE TABLE session (id UUID) PARTITION BY HASH (id);", modulus=2)
+        self.assertEqual(len(by_hash.partition_sql(set())), 2)
+        self.assertIn("FOR VALUES WITH (MODULUS 2, REMAINDER 1)", by_hash.partition_sql(set())[1])
+
+    def test_database_maintain_partitions_batches(self):
+        table = PartitionedTable(create="CREATE TABLE page_view (viewed_at DATE) PARTITION BY RANGE (viewed_at);",
+                                 interval='day', premake=4)
+        db = Database(load_order=[table])
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [('public.page_view', 'page_view_p20240101')]
+
+        statements = db.maintain_partitions(cursor, today=date(2024, 1, 1), batch_size=3)
+
+        self.assertEqual(len(statements), 4)
+        self.assertEqual(cursor.execute.call_count, 3)  # one catalog query and two batches
+        self.assertEqual(cursor.execute.call_args_list[0].args[1], (['public.page_view'],))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -274,3 +274,105 @@ class TestTable(unittest.TestCase):
 
         self.assertEqual(table.columns, expected_columns)
 
+    def test_table_is_slotted(self):
+        """Test that tables don't carry a __dict__ or per instance copies of the parsing patterns."""
+        create_table = """
+        CREATE TABLE example (
+            id SERIAL PRIMARY KEY
+        );
+        """
+        first = Table(create=create_table)
+        second = Table(create=create_table.replace("example", "other"))
+
+        self.assertFalse(hasattr(first, '__dict__'))
+        self.assertIs(first._name_pattern, second._name_pattern)
+        self.assertIs(first.schema, second.schema)
+
+    def test_column_and_constraint_definitions(self):
+        create_table = """
+        CREATE TABLE order_items (
+            order_id UUID NOT NULL, -- the order (see orders)
+            price NUMERIC(10, 2) NOT NULL,
+            PRIMARY KEY (order_id, price),
+            CONSTRAINT positive CHECK (price > 0)
+        );
+        """
+        table = Table(create=create_table)
+        self.assertEqual(table.column_definitions, {
+            "order_id": "order_id UUID NOT NULL",
+            "price": "price NUMERIC(10, 2) NOT NULL",
+        })
+        self.assertEqual(table.constraint_definitions, [
+            "PRIMARY KEY (order_id, price)", "CONSTRAINT positive CHECK (price > 0)"
+        ])
+
+    def test_sql_fragments(self):
+        """Test that the SQL fragments quote identifiers and are built only once."""
+        create_table = """
+        CREATE TABLE shop.item (
+            id INT PRIMARY KEY,
+            name TEXT,
+            price NUMERIC(10, 2)
+        );
+        """
+        table = Table(create=create_table)
+        self.assertEqual(table.quoted_name, '"shop"."item"')
+        self.assertEqual(table.column_list, '"id", "name", "price"')
+        self.assertEqual(table.insert_sql, 'INSERT INTO "shop"."item" ("id", "name", "price") VALUES (%s, %s, %s)')
+        self.assertEqual(table.upsert_sql, (
+            'INSERT INTO "shop"."item" ("id", "name", "price") VALUES (%s, %s, %s) '
+            'ON CONFLICT ("id") DO UPDATE SET "name" = EXCLUDED."name", "price" = EXCLUDED."price"'
+        ))
+        self.assertEqual(table.copy_sql, 'COPY "shop"."item" ("id", "name", "price") FROM STDIN')
+        self.assertIs(table.insert_sql, table.insert_sql)
+        self.assertEqual(table, Table(create=create_table))
+
+    def test_storage_sql(self):
+        """Test that only the storage settings that differ from the current ones are set."""
+        table = Table(create="""
+        CREATE TABLE event (
+            id BIGINT PRIMARY KEY,
+            body TEXT
+        );
+        """, storage={'fillfactor': 80, 'autovacuum_vacuum_scale_factor': 0.05, 'toast.autovacuum_enabled': False},
+            column_storage={'body': {'compression': 'lz4', 'storage': 'external'}})
+        self.assertEqual(table.storage_sql(), [
+            "ALTER TABLE public.event SET (fillfactor = 80, autovacuum_vacuum_scale_factor = 0.05, "
+            "toast.autovacuum_enabled = false);",
+            "ALTER TABLE public.event ALTER COLUMN body SET COMPRESSION LZ4, ALTER COLUMN body SET STORAGE EXTERNAL;",
+        ])
+        self.assertEqual(table.storage_sql(
+            {'fillfactor': '80', 'autovacuum_vacuum_scale_factor': '0.050', 'toast.autovacuum_enabled': 'false',
+             'parallel_workers': '4'},
+            {'body': {'compression': 'lz4', 'storage': 'extended'}},
+        ), [
+            "ALTER TABLE public.event RESET (parallel_workers);",
+            "ALTER TABLE public.event ALTER COLUMN body SET STORAGE EXTERNAL;",
+        ])
+        self.assertEqual(Table(create="CREATE TABLE log (id INT);").storage_sql({'fillfactor': '50'}), [])
+
+    def test_sql_fragments_fold_mixed_case_columns(self):
+        """Test that unquoted names are folded to lower case and quoted ones keep their case."""
+        table = Table(create="""
+        CREATE TABLE Account (
+            Id SERIAL PRIMARY KEY,
+            UserName TEXT,
+            "DisplayName" TEXT
+        );
+        """, alter="ALTER TABLE account ADD COLUMN LastSeen TIMESTAMPTZ;")
+        self.assertEqual(table.column_names, ['id', 'username', 'DisplayName', 'lastseen'])
+        self.assertEqual(table.primary_key, ['id'])
+        self.assertEqual(table.upsert_sql, (
+            'INSERT INTO "public"."account" ("id", "username", "DisplayName", "lastseen") VALUES (%s, %s, %s, %s) '
+            'ON CONFLICT ("id") DO UPDATE SET "username" = EXCLUDED."username", '
+            '"DisplayName" = EXCLUDED."DisplayName", "lastseen" = EXCLUDED."lastseen"'
+        ))
+
+    def test_upsert_needs_primary_key(self):
+        table = Table(create="""
+        CREATE TABLE log (
+            message TEXT
+        );
+        """)
+        with self.assertRaises(ValueError):
+            table.upsert_sql
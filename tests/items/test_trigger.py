@@ -14,6 +14,7 @@ class TestTrigger(unittest.TestCase):
         trigger = Trigger(create=create_statement)
         self.assertEqual(trigger.schema, 'api')
         self.assertEqual(trigger.name, 'trigger_name')
+        self.assertEqual(trigger.table, 'api.table_name')
 
     def test_trigger_without_schema(self):
         create_statement = """
@@ -25,6 +26,7 @@ class TestTrigger(unittest.TestCase):
         trigger = Trigger(create=create_statement)
         self.assertEqual(trigger.schema, 'public')
         self.assertEqual(trigger.name, 'trigger_name')
+        self.assertEqual(trigger.table, 'public.table_name')
 
 
 if __name__ == '__main__':
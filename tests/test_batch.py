@@ -0,0 +1,50 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from postnormalism.batch import Batches, run_in_batches
+
+
+class TestBatches(unittest.TestCase):
+
+    def cursor(self, rows):
+        cursor = MagicMock()
+        cursor.rowcount = 10
+        cursor.fetchone.side_effect = rows
+        return cursor
+
+    def test_run_in_batches_pages_through_keys(self):
+        cursor = self.cursor([(1, 10), (11, 20), (None, None)])
+        sql = "UPDATE material SET name = lower(name) WHERE id BETWEEN %(start)s AND %(end)s"
+
+        batches = run_in_batches(cursor, "material", "id", sql, Batches(chunk_size=10))
+
+        executed = [call.args for call in cursor.execute.call_args_list]
+        self.assertEqual(executed[0], (
+            "SELECT MIN(id), MAX(id) FROM (SELECT id FROM material ORDER BY id LIMIT %s) AS chunk", (10,)))
+        self.assertEqual(executed[1], (sql, {'start': 1, 'end': 10}))
+        self.assertEqual(executed[2], (
+            "SELECT MIN(id), MAX(id) FROM (SELECT id FROM material WHERE id > %s ORDER BY id LIMIT %s) AS chunk",
+            (10, 10)))
+        self.assertEqual(executed[3], (sql, {'start': 11, 'end': 20}))
+        self.assertEqual(cursor.connection.commit.call_count, 2)
+        self.assertEqual((batches.chunks, batches.rows), (2, 20))
+
+    def test_chunk_size_adapts_to_target_latency(self):
+        batches = Batches(chunk_size=1000, target_seconds=0.5, max_chunk_size=1500)
+        batches.adapt(0.1)
+        self.assertEqual(batches.chunk_size, 1500)
+        batches.adapt(2.0)
+        self.assertEqual(batches.chunk_size, 750)
+
+    @patch('postnormalism.batch.time.sleep')
+    def test_waits_for_replication_lag(self, sleep):
+        cursor = self.cursor([(5.0,), (0.5,), (1, 10), (0.1,), (None, None)])
+
+        batches = run_in_batches(cursor, "material", "id", "UPDATE material SET name = name",
+                                 Batches(max_replication_lag=1.0))
+
+        sleep.assert_called_once_with(1.0)
+        self.assertEqual(batches.chunks, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,15 @@
+import os
+import tempfile
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from postnormalism import schema
-from postnormalism.core import create_items
+from postnormalism.core import (OnlineDDL, Throwaway, apply_storage, check_throwaway, create_items, create_seeds,
+                                create_schema_items_in_transaction, current_storage, execute_online,
+                                throwaway_script)
+
+
+class LockNotAvailable(Exception):
+    sqlstate = '55P03'
 
 
 def create_example_items():
@@ -57,6 +65,232 @@ class TestCore(unittest.TestCase):
         # Assert that cursor.execute was not called
         cursor.execute.assert_not_called()
 
+    def test_grouped_items_keep_every_statement(self):
+        table = schema.Table(create="CREATE TABLE unit (id INT);", alter="ALTER TABLE unit ADD COLUMN name TEXT;")
+        view = schema.MaterializedView(
+            create="CREATE MATERIALIZED VIEW unit_count AS SELECT count(*) AS units FROM unit;",
+            comment="COMMENT ON MATERIALIZED VIEW unit_count IS 'Units';",
+            index="CREATE UNIQUE INDEX unit_count_idx ON unit_count (units);",
+        )
+
+        self.assertEqual(create_schema_items_in_transaction([table, view]), "\n\n".join([
+            "BEGIN;",
+            "CREATE TABLE unit (id INT);",
+            "CREATE MATERIALIZED VIEW unit_count AS SELECT count(*) AS units FROM unit;",
+            "COMMENT ON MATERIALIZED VIEW unit_count IS 'Units';",
+            "CREATE UNIQUE INDEX unit_count_idx ON unit_count (units);",
+            "ALTER TABLE unit ADD COLUMN name TEXT;",
+            "COMMIT;",
+        ]))
+
+    def test_online_mode_commits_each_item(self):
+        """Test that online mode sets a lock_timeout and commits every item separately."""
+        load_order = create_example_items()
+        cursor = MagicMock()
+
+        create_items(load_order, cursor, online=OnlineDDL(lock_timeout='1s'))
+
+        cursor.execute.assert_any_call("SET lock_timeout = '1s';")
+        for item in load_order:
+            cursor.execute.assert_any_call(item.full_sql())
+        self.assertEqual(cursor.connection.commit.call_count, len(load_order))
+
+    @patch('postnormalism.core.time.sleep')
+    def test_online_mode_retries_lock_timeouts(self, sleep):
+        """Test that a lock timeout is rolled back and retried with backoff."""
+        cursor = MagicMock()
+        cursor.execute.side_effect = [None, LockNotAvailable(), None, None, None]
+        online = OnlineDDL(retries=2)
+
+        execute_online(cursor, online, "ALTER TABLE example ADD COLUMN email TEXT;")
+
+        cursor.connection.rollback.assert_called_once()
+        cursor.connection.commit.assert_called_once()
+        sleep.assert_called_once()
+        self.assertEqual(online.lock_timeouts, 1)
+        self.assertGreaterEqual(online.lock_wait, 0)
+
+    @patch('postnormalism.core.time.sleep')
+    def test_online_mode_gives_up(self, sleep):
+        """Test that the lock timeout is raised once the retries are exhausted."""
+        def execute(sql, *args):
+            if sql.startswith("ALTER"):
+                raise LockNotAvailable()
+
+        cursor = MagicMock()
+        cursor.execute.side_effect = execute
+
+        with self.assertRaises(LockNotAvailable):
+            execute_online(cursor, OnlineDDL(retries=1), "ALTER TABLE example ADD COLUMN email TEXT;")
+        self.assertEqual(cursor.connection.rollback.call_count, 2)
+
+    def test_online_mode_does_not_retry_other_errors(self):
+        """Test that errors other than lock timeouts are raised immediately."""
+        cursor = MagicMock()
+        cursor.execute.side_effect = [None, RuntimeError("syntax error")]
+
+        with self.assertRaises(RuntimeError):
+            execute_online(cursor, OnlineDDL(), "ALTER TABLE example ADD COLUMN;")
+        cursor.connection.rollback.assert_called_once()
+
+    def test_apply_storage_reconciles_with_the_catalog(self):
+        table = schema.Table(create="CREATE TABLE event (id INT, body TEXT);", storage={'fillfactor': 70},
+                             column_storage={'body': {'compression': 'lz4'}})
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [
+            [('public.event', ['fillfactor=70'], ['autovacuum_enabled=false'], 160000)],
+            [('public.event', 'id', '', 'p'), ('public.event', 'body', 'p', 'x')],
+        ]
+        statements = apply_storage([table, create_example_items()[1]], cursor)
+        self.assertEqual(statements, [
+            "ALTER TABLE public.event RESET (toast.autovacuum_enabled);",
+            "ALTER TABLE public.event ALTER COLUMN body SET COMPRESSION LZ4;",
+        ])
+        self.assertEqual(cursor.execute.call_args_list[-1][0][0], statements[-1])
+
+    def test_current_storage_before_column_compression(self):
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [[('public.event', None, None, 130000)], [('public.event', 'body', None, 'x')]]
+
+        options, columns = current_storage(cursor, ['public.event'])
+
+        self.assertEqual(options, {'public.event': {}})
+        self.assertEqual(columns, {'public.event': {'body': {'compression': 'default', 'storage': 'extended'}}})
+        self.assertNotIn("attcompression", cursor.execute.call_args[0][0])
+
+        cursor = MagicMock()
+        cursor.fetchall.return_value = []
+        self.assertEqual(current_storage(cursor, ['public.event']), ({}, {}))
+        cursor.execute.assert_called_once()
+
+    def test_apply_storage_without_declarations(self):
+        cursor = MagicMock()
+        self.assertEqual(apply_storage(create_example_items(), cursor), [])
+        cursor.execute.assert_not_called()
+
+
+class TestThrowaway(unittest.TestCase):
+    def test_throwaway_script(self):
+        tables = [
+            schema.Table(
+                create="CREATE TABLE unit (id INT PRIMARY KEY);",
+                comment="COMMENT ON TABLE unit IS 'Units';",
+                alter="ALTER TABLE unit ADD COLUMN name TEXT;",
+            ),
+            schema.Table(create="CREATE TABLE event (id INT) PARTITION BY RANGE (id);"),
+        ]
+
+        script = throwaway_script([tables], Throwaway(), logged={"public.event"})
+
+        self.assertEqual(script, "\n\n".join([
+            "BEGIN;",
+            "CREATE UNLOGGED TABLE unit (id INT PRIMARY KEY);",
+            "CREATE TABLE event (id INT) PARTITION BY RANGE (id);",
+            "ALTER TABLE unit ADD COLUMN name TEXT;",
+            "COMMIT;",
+        ]))
+
+    def test_throwaway_script_builds_indexes_in_the_transaction(self):
+        items = [
+            schema.MaterializedView(
+                create="CREATE MATERIALIZED VIEW unit_count AS SELECT count(*) AS units FROM unit;",
+                index="CREATE UNIQUE INDEX CONCURRENTLY unit_count_idx ON unit_count (units);",
+            ),
+            schema.Index(create="CREATE INDEX CONCURRENTLY unit_name_idx ON unit (name);"),
+        ]
+
+        script = throwaway_script(items, Throwaway(), exists=True)
+
+        self.assertNotIn("CONCURRENTLY", script)
+        self.assertIn("CREATE UNIQUE INDEX IF NOT EXISTS unit_count_idx ON unit_count (units);", script)
+        self.assertIn("CREATE INDEX IF NOT EXISTS unit_name_idx ON unit (name);", script)
+
+    def test_check_throwaway(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = ("app_test", None, 0)
+        check_throwaway(cursor, Throwaway())
+
+        for row in [("app", None, 0), ("app_test", None, 2)]:
+            cursor.fetchone.return_value = row
+            with self.assertRaises(ValueError):
+                check_throwaway(cursor, Throwaway())
+
+        cursor.fetchone.return_value = ("ci_42", "10.0.0.5", 0)
+        with self.assertRaises(ValueError):
+            check_throwaway(cursor, Throwaway(hosts=("127.0.0.1", None)))
+
+
+class TestSeeds(unittest.TestCase):
+    create_table = """
+    CREATE TABLE lookup.country (
+        code CHAR(2) PRIMARY KEY,
+        name TEXT NOT NULL
+    );
+    """
+
+    def test_seed_rows_are_copied(self):
+        """Test that rows from a generator are streamed through COPY."""
+        table = schema.Table(
+            create=self.create_table,
+            seed=schema.Seed(source=lambda: ((code, code.lower()) for code in ("US", "DE")))
+        )
+        cursor = MagicMock()
+        copy = cursor.copy.return_value.__enter__.return_value
+
+        create_seeds([table], cursor)
+
+        cursor.copy.assert_called_once_with("COPY lookup.country (code, name) FROM STDIN")
+        self.assertEqual([call.args[0] for call in copy.write_row.call_args_list], [("US", "us"), ("DE", "de")])
+
+    def test_seed_csv_is_copied_in_chunks(self):
+        """Test that a CSV seed is read and written in chunks."""
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "country.csv")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("code,name\nUS,United States\nDE,Germany\n")
+
+            table = schema.Table(create=self.create_table, seed=schema.Seed(source=path, chunk_size=10))
+            cursor = MagicMock()
+            copy = cursor.copy.return_value.__enter__.return_value
+            create_seeds([table], cursor)
+
+        cursor.copy.assert_called_once_with("COPY lookup.country (code, name) FROM STDIN (FORMAT csv, HEADER true)")
+        self.assertEqual(copy.write.call_count, 4)
+
+    def test_seed_upsert_through_staging_table(self):
+        """Test that upsert seeds are copied into a staging table and merged."""
+        table = schema.Table(
+            create=self.create_table,
+            seed=schema.Seed(source=[("US", "United States")], upsert=["code"], format="binary", types=["bpchar", "text"])
+        )
+        cursor = MagicMock()
+        copy = cursor.copy.return_value.__enter__.return_value
+
+        create_seeds([[table]], cursor, exists=True)
+
+        cursor.copy.assert_called_once_with("COPY _postnormalism_seed_country (code, name) FROM STDIN (FORMAT binary)")
+        copy.set_types.assert_called_once_with(["bpchar", "text"])
+        executed = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertEqual(executed, [
+            "CREATE TEMP TABLE _postnormalism_seed_country (LIKE lookup.country INCLUDING DEFAULTS);",
+            "INSERT INTO lookup.country (code, name) SELECT code, name FROM _postnormalism_seed_country "
+            "ON CONFLICT (code) DO UPDATE SET name = EXCLUDED.name;",
+            "DROP TABLE _postnormalism_seed_country;",
+        ])
+
+    def test_plain_seeds_skipped_in_exists_mode(self):
+        """Test that seeds without upsert are not loaded again in exists mode."""
+        table = schema.Table(create=self.create_table, seed=schema.Seed(source=[("US", "United States")]))
+        cursor = MagicMock()
+
+        create_seeds([table], cursor, exists=True)
+
+        cursor.copy.assert_not_called()
+
+    def test_binary_seed_requires_types(self):
+        with self.assertRaises(ValueError):
+            schema.Seed(source=[], format="binary")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,14 @@
+import os
+import tempfile
 import unittest
-from postnormalism.schema import Database, Table, Function, Schema, View
+from unittest.mock import MagicMock
+from postnormalism.schema import (Database, Table, Function, Schema, View, MaterializedView, Trigger, Index,
+                                  PartitionedTable, Seed)
+from postnormalism.core import AnalyzeTables, OnlineDDL, Throwaway
+
+
+class LockNotAvailable(Exception):
+    sqlstate = '55P03'
 
 
 class TestDatabase(unittest.TestCase):
@@ -76,5 +85,450 @@ class TestDatabase(unittest.TestCase):
             _ = self.db.example_schema.non_existent_view
 
 
+class TestMaterializedViewRefresh(unittest.TestCase):
+    def setUp(self):
+        self.sales = Table(create="CREATE TABLE sales (day DATE, region TEXT, amount NUMERIC);")
+        self.daily = MaterializedView(
+            create="CREATE MATERIALIZED VIEW daily AS SELECT day, sum(amount) AS total FROM sales GROUP BY day;",
+            index="CREATE UNIQUE INDEX daily_day ON daily (day);"
+        )
+        self.regional = MaterializedView(
+            create="CREATE MATERIALIZED VIEW regional AS SELECT region, sum(amount) AS total FROM sales GROUP BY 1;"
+        )
+        self.weekly = MaterializedView(
+            create="CREATE MATERIALIZED VIEW weekly AS SELECT date_trunc('week', day), sum(total) FROM daily GROUP BY 1;"
+        )
+        self.db = Database(load_order=[self.sales, self.weekly, self.daily, self.regional])
+
+    def test_get_items_by_type(self):
+        self.assertEqual(
+            [view.name for view in self.db.get_items_by_type("materialized_view")],
+            ["weekly", "daily", "regional"]
+        )
+
+    def test_plan_refresh_orders_by_dependency(self):
+        levels = [[view.name for view in level] for level in self.db.plan_refresh()]
+        self.assertEqual(levels, [["daily", "regional"], ["weekly"]])
+
+    def test_plan_refresh_detects_cycles(self):
+        first = MaterializedView(create="CREATE MATERIALIZED VIEW first AS SELECT * FROM second;")
+        second = MaterializedView(create="CREATE MATERIALIZED VIEW second AS SELECT * FROM first;")
+        with self.assertRaises(ValueError):
+            Database(load_order=[first, second]).plan_refresh()
+
+    def test_refresh_on_cursor(self):
+        cursor = MagicMock()
+        timings = self.db.refresh_materialized_views(cursor)
+
+        executed = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertEqual(executed, [
+            "REFRESH MATERIALIZED VIEW CONCURRENTLY public.daily;",
+            "REFRESH MATERIALIZED VIEW public.regional;",
+            "REFRESH MATERIALIZED VIEW public.weekly;",
+        ])
+        self.assertEqual(set(timings), {"public.daily", "public.regional", "public.weekly"})
+
+    def test_refresh_in_parallel_across_connections(self):
+        connections = []
+
+        def connect():
+            connections.append(MagicMock())
+            return connections[-1]
+
+        timings = self.db.refresh_materialized_views(connect=connect, workers=2)
+
+        self.assertEqual(len(connections), 3)
+        for connection in connections:
+            connection.commit.assert_called_once()
+            connection.close.assert_called_once()
+        self.assertEqual(set(timings), {"public.daily", "public.regional", "public.weekly"})
+
+
+    def test_refresh_commits_the_cursor_before_parallel_levels(self):
+        summary = MaterializedView(create="CREATE MATERIALIZED VIEW summary AS SELECT sum(total) FROM weekly;")
+        counts = MaterializedView(create="CREATE MATERIALIZED VIEW counts AS SELECT count(*) FROM weekly;")
+        db = Database(load_order=[self.sales, self.weekly, self.daily, self.regional, summary, counts])
+        cursor = MagicMock()
+        commits_at_connect = []
+
+        def connect():
+            commits_at_connect.append(cursor.connection.commit.call_count)
+            return MagicMock()
+
+        db.refresh_materialized_views(cursor, connect=connect, workers=2)
+
+        # daily and regional, then weekly on the cursor, then summary and counts after committing weekly
+        self.assertEqual(commits_at_connect, [1, 1, 2, 2])
+        self.assertEqual([call.args[0] for call in cursor.execute.call_args_list],
+                         ["REFRESH MATERIALIZED VIEW public.weekly;"])
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        for migration_file, script in [
+            ("0001_create_material.sql", "CREATE TABLE material (id INT);"),
+            ("0002_add_name.sql", "ALTER TABLE material ADD COLUMN name TEXT;"),
+            ("0003_add_description.sql", "ALTER TABLE material ADD COLUMN description TEXT;"),
+        ]:
+            with open(os.path.join(self.folder.name, migration_file), "w", encoding="utf-8") as file:
+                file.write(script)
+        self.db = Database(migrations_folder=self.folder.name)
+
+    def executed(self, cursor):
+        return [call.args for call in cursor.execute.call_args_list]
+
+    def test_apply_migrations(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [("0001",)]
+
+        self.db.apply_migrations(cursor)
+
+        self.assertEqual(self.executed(cursor)[1:], [
+            ("ALTER TABLE material ADD COLUMN name TEXT;",),
+            ("INSERT INTO postnormalism_migrations (migration_id) VALUES (%s)", ("0002",)),
+            ("ALTER TABLE material ADD COLUMN description TEXT;",),
+            ("INSERT INTO postnormalism_migrations (migration_id) VALUES (%s)", ("0003",)),
+        ])
+
+    def test_squash_migrations(self):
+        baseline_path = self.db.squash_migrations("0002")
+
+        self.assertEqual(os.path.basename(baseline_path), "0002_baseline.sql")
+        self.assertEqual(self.db.get_baseline(), (baseline_path, ["0001", "0002"]))
+        self.assertNotIn("baseline", self.db.get_migration_files())
+
+        with self.assertRaises(ValueError):
+            self.db.squash_migrations("0009")
+
+    def test_fresh_database_applies_baseline(self):
+        baseline_path = self.db.squash_migrations("0002")
+        with open(baseline_path, encoding="utf-8") as file:
+            baseline_script = file.read()
+        cursor = MagicMock()
+        cursor.fetchall.return_value = []
+
+        self.db.apply_migrations(cursor)
+
+        self.assertEqual(self.executed(cursor)[1:], [
+            (baseline_script,),
+            ("INSERT INTO postnormalism_migrations (migration_id) SELECT unnest(%s::varchar[])", (["0001", "0002"],)),
+            ("ALTER TABLE material ADD COLUMN description TEXT;",),
+            ("INSERT INTO postnormalism_migrations (migration_id) VALUES (%s)", ("0003",)),
+        ])
+
+    def test_existing_database_ignores_baseline(self):
+        self.db.squash_migrations("0002")
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [("0001",)]
+
+        self.db.apply_migrations(cursor)
+
+        self.assertEqual(self.executed(cursor)[1][0], "ALTER TABLE material ADD COLUMN name TEXT;")
+
+    def test_statement_timeout_per_migration(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [("0001",), ("0002",)]
+
+        self.db.apply_migrations(cursor, statement_timeout="5min")
+
+        self.assertEqual(self.executed(cursor)[1:], [
+            ("SET statement_timeout = '5min';",),
+            ("ALTER TABLE material ADD COLUMN description TEXT;",),
+            ("INSERT INTO postnormalism_migrations (migration_id) VALUES (%s)", ("0003",)),
+            ("RESET statement_timeout;",),
+        ])
+
+    def test_online_statement_timeout_survives_lock_timeouts(self):
+        calls = MagicMock()
+        cursor = calls.cursor
+        cursor.fetchall.return_value = [("0001",), ("0002",)]
+
+        def execute(sql, *args):
+            if sql.startswith("ALTER") and not calls.cursor.connection.rollback.called:
+                raise LockNotAvailable()
+        cursor.execute.side_effect = execute
+
+        self.db.apply_migrations(cursor, online=OnlineDDL(backoff=0), statement_timeout="5min")
+
+        steps = [(name, args[0]) if args else name for name, args, _ in calls.mock_calls if name != "cursor.fetchall"]
+        self.assertEqual(steps[1:5], [
+            ("cursor.execute", "SET statement_timeout = '5min';"),
+            "cursor.connection.commit",
+            ("cursor.execute", "SET lock_timeout = '2s';"),
+            ("cursor.execute", "ALTER TABLE material ADD COLUMN description TEXT;"),
+        ])
+        self.assertEqual(steps[5], "cursor.connection.rollback")
+        self.assertEqual(steps[-1], ("cursor.execute", "RESET statement_timeout;"))
+
+    def test_resumable_migration_resumes_after_checkpoint(self):
+        with open(os.path.join(self.folder.name, "0004_backfill.sql"), "w", encoding="utf-8") as file:
+            file.write("BEGIN;\nUPDATE material SET name = 'a';\nUPDATE material SET description = 'b';\nCOMMIT;\n")
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [("0001",), ("0002",), ("0003",)]
+        cursor.fetchone.return_value = (2,)
+
+        self.db.apply_migrations(cursor, resumable=True)
+
+        executed = self.executed(cursor)
+        self.assertIn("CREATE TABLE IF NOT EXISTS postnormalism_migration_checkpoints", executed[1][0])
+        statements = [args[0] for args in executed[3:]]
+        self.assertNotIn("UPDATE material SET name = 'a';", statements)
+        self.assertIn("UPDATE material SET description = 'b';", statements)
+        self.assertNotIn("COMMIT;", statements)
+        self.assertEqual(executed[-2], ("INSERT INTO postnormalism_migrations (migration_id) VALUES (%s)", ("0004",)))
+        self.assertEqual(executed[-1][1], ("0004",))
+        # the remaining statement, the skipped COMMIT and the completion each commit
+        self.assertEqual(cursor.connection.commit.call_count, 3)
+
+    def test_python_migration(self):
+        with open(os.path.join(self.folder.name, "0004_backfill.py"), "w", encoding="utf-8") as file:
+            file.write("def migrate(cursor):\n    cursor.execute('UPDATE material SET name = id::text')\n")
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [("0001",), ("0002",), ("0003",)]
+
+        self.db.apply_migrations(cursor)
+
+        self.assertEqual(self.executed(cursor)[1:], [
+            ("UPDATE material SET name = id::text",),
+            ("INSERT INTO postnormalism_migrations (migration_id) VALUES (%s)", ("0004",)),
+        ])
+
+    def test_apply_migrations_analyzes_written_tables(self):
+        with open(os.path.join(self.folder.name, "0004_backfill.sql"), "w", encoding="utf-8") as file:
+            file.write("UPDATE material SET name = id::text;")
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [
+            [("0001",), ("0002",), ("0003",)],
+            [("public.material", 10), ("public.tag", 0)],
+            [("public.material", 10), ("public.tag", 5)],
+        ]
+        analyze = AnalyzeTables()
+
+        self.db.apply_migrations(cursor, analyze=analyze)
+
+        self.assertEqual(self.executed(cursor)[-2:], [("ANALYZE public.tag;",), ("ANALYZE public.material;",)])
+        self.assertEqual(analyze.changes, {"public.tag": 5})
+        self.assertEqual(set(analyze.analyzed), {"public.material", "public.tag"})
+
+    def test_table_modifications_include_pending_writes(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [("public.material", 15)]
+
+        self.assertEqual(Database.table_modifications(cursor), {"public.material": 15})
+        statements = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertIn("pg_stat_force_next_flush()", statements[0])
+        self.assertEqual(statements[1], "SELECT pg_stat_clear_snapshot()")
+        self.assertIn("JOIN pg_stat_xact_user_tables", statements[2])
+
+    def test_python_migration_requires_migrate(self):
+        with open(os.path.join(self.folder.name, "0004_backfill.py"), "w", encoding="utf-8") as file:
+            file.write("VALUE = 1\n")
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [("0001",), ("0002",), ("0003",)]
+
+        with self.assertRaises(ValueError):
+            self.db.apply_migrations(cursor)
+
+
+class TestBulkLoad(unittest.TestCase):
+    def setUp(self):
+        self.db = Database(load_order=[
+            Table(create="CREATE TABLE material (id INT PRIMARY KEY, name TEXT);"),
+            Trigger(create="CREATE TRIGGER touch BEFORE UPDATE ON material FOR EACH ROW EXECUTE FUNCTION touch();"),
+            Index(create="CREATE INDEX CONCURRENTLY material_name_idx ON material (name);"),
+            Index(create="CREATE UNIQUE INDEX material_lower_name_idx ON material (lower(name));"),
+        ])
+
+    def executed(self, cursor):
+        return [call.args[0] for call in cursor.execute.call_args_list]
+
+    def test_bulk_load_restores_after_the_block(self):
+        cursor = MagicMock()
+
+        with self.db.bulk_load(cursor, ["material"], drop_indexes=True):
+            cursor.execute("COPY material FROM STDIN;")
+
+        self.assertEqual(self.executed(cursor), [
+            "ALTER TABLE public.material DISABLE TRIGGER touch;",
+            "SET CONSTRAINTS ALL DEFERRED;",
+            "DROP INDEX IF EXISTS public.material_name_idx;",
+            "COPY material FROM STDIN;",
+            "CREATE INDEX IF NOT EXISTS material_name_idx ON material (name);",
+            "ALTER TABLE public.material ENABLE TRIGGER touch;",
+            "SET CONSTRAINTS ALL IMMEDIATE;",
+        ])
+
+    def test_bulk_load_restores_on_error(self):
+        cursor = MagicMock()
+
+        with self.assertRaises(RuntimeError):
+            with self.db.bulk_load(cursor, [self.db.material]):
+                raise RuntimeError("bad row")
+
+        cursor.connection.rollback.assert_called_once()
+        cursor.connection.commit.assert_called_once()
+        self.assertEqual(self.executed(cursor)[-1], "ALTER TABLE public.material ENABLE TRIGGER touch;")
+
+
+class TestReset(unittest.TestCase):
+    def setUp(self):
+        self.db = Database(load_order=[
+            Schema(create="CREATE SCHEMA shop;"),
+            Table(create="CREATE TABLE shop.order (id SERIAL PRIMARY KEY);"),
+            Table(create="CREATE TABLE unit (id SERIAL PRIMARY KEY);", seed=Seed([(1,)])),
+            Table(create="CREATE TABLE material (id SERIAL PRIMARY KEY);"),
+        ])
+
+    def test_reset_truncates_every_table_at_once(self):
+        cursor = MagicMock()
+
+        self.db.reset(cursor)
+
+        cursor.execute.assert_called_once_with(
+            "TRUNCATE TABLE public.material, public.unit, shop.order RESTART IDENTITY CASCADE;"
+        )
+
+    def test_reset_skips_tables(self):
+        self.assertEqual(self.db.reset_sql(skip_seeded=True),
+                         "TRUNCATE TABLE public.material, shop.order RESTART IDENTITY CASCADE;")
+        self.assertEqual(self.db.reset_sql(skip=("material", "unit", "shop.order")), None)
+        self.assertIs(self.db.reset_sql(skip_seeded=True), self.db.reset_sql(skip_seeded=True))
+
+
+class TestConnections(unittest.TestCase):
+    def setUp(self):
+        self.table = Table(create="CREATE TABLE material (id INT);")
+
+    def test_create_opens_one_connection(self):
+        connection = MagicMock()
+        connect = MagicMock(return_value=connection)
+        db = Database(
+            load_order=[self.table],
+            connection_factory=connect,
+            session_settings={"work_mem": "256MB"},
+            create_settings={"synchronous_commit": "off"},
+        )
+
+        db.create()
+
+        connect.assert_called_once()
+        cursor = connection.cursor.return_value
+        executed = [call.args for call in cursor.execute.call_args_list]
+        self.assertEqual(executed, [
+            ("SELECT set_config(%s, %s, false)", ("work_mem", "256MB")),
+            ("SELECT set_config(%s, %s, false)", ("synchronous_commit", "off")),
+            (self.table.full_sql(),),
+            ("RESET synchronous_commit;",),
+        ])
+        connection.commit.assert_called_once()
+        connection.close.assert_called_once()
+
+    def test_create_restores_session_settings(self):
+        connection = MagicMock()
+        db = Database(
+            load_order=[self.table],
+            connection_factory=lambda: connection,
+            session_settings={"work_mem": "256MB"},
+            create_settings={"work_mem": "1GB", "synchronous_commit": "off"},
+        )
+
+        db.create(online=OnlineDDL())
+
+        cursor = connection.cursor.return_value
+        executed = [call.args for call in cursor.execute.call_args_list]
+        self.assertEqual(executed[:3], [
+            ("SELECT set_config(%s, %s, false)", ("work_mem", "256MB")),
+            ("SELECT set_config(%s, %s, false)", ("work_mem", "1GB")),
+            ("SELECT set_config(%s, %s, false)", ("synchronous_commit", "off")),
+        ])
+        self.assertEqual(executed[-2:], [
+            ("RESET synchronous_commit;",),
+            ("SELECT set_config(%s, %s, false)", ("work_mem", "256MB")),
+        ])
+        # the settings are committed before the first online attempt can roll them back
+        self.assertEqual([name for name, _, _ in cursor.mock_calls][3], "connection.commit")
+
+    def test_throwaway_create(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = ("preview_pr42", None, 0)
+        parent = Table(create="CREATE TABLE unit (id INT PRIMARY KEY);")
+        events = PartitionedTable(
+            create="CREATE TABLE event (unit_id INT REFERENCES unit (id), day DATE) PARTITION BY LIST (unit_id);",
+            values={"1": [1]},
+        )
+        db = Database(load_order=[self.table, parent, events])
+
+        self.assertEqual(db.logged_tables(), {"public.event", "public.unit"})
+        db.create(cursor, throwaway=Throwaway())
+
+        executed = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertEqual(executed[1], "SELECT set_config(%s, %s, false)")
+        self.assertEqual(cursor.execute.call_args_list[1].args[1], ("synchronous_commit", "off"))
+        self.assertIn("CREATE UNLOGGED TABLE material", executed[2])
+        self.assertIn("\n\nCREATE TABLE unit", executed[2])
+        self.assertEqual(executed[-1], "RESET synchronous_commit;")
+
+    def test_throwaway_create_refuses_other_databases(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = ("production", "10.0.0.5", 1)
+
+        with self.assertRaises(ValueError):
+            Database(load_order=[self.table]).create(cursor, throwaway=Throwaway())
+        self.assertEqual(cursor.execute.call_count, 1)
+
+    def test_connection_rolls_back_on_error(self):
+        connection = MagicMock()
+        db = Database(connection_factory=lambda: connection)
+
+        with self.assertRaises(RuntimeError):
+            with db.connection():
+                raise RuntimeError("boom")
+
+        connection.rollback.assert_called_once()
+        connection.commit.assert_not_called()
+        connection.close.assert_called_once()
+
+    def test_pool_connections_reset_settings(self):
+        pool = MagicMock()
+        connection = pool.connection.return_value.__enter__.return_value
+        db = Database(pool=pool, session_settings={"work_mem": "64MB"})
+
+        with db.connection() as pooled:
+            self.assertIs(pooled, connection)
+
+        connection.cursor.return_value.execute.assert_called_with("RESET work_mem;")
+
+    def test_connect_requires_a_source(self):
+        with self.assertRaises(ValueError):
+            Database().connect()
+
+    def test_refresh_uses_database_connections(self):
+        views = [
+            MaterializedView(create=f"CREATE MATERIALIZED VIEW view_{i} AS SELECT 1;") for i in range(3)
+        ]
+        connect = MagicMock()
+        db = Database(load_order=views, connection_factory=connect)
+
+        db.refresh_materialized_views()
+
+        self.assertEqual(connect.call_count, 3)
+
+    def test_analyze_tables_in_parallel_within_budget(self):
+        connect = MagicMock()
+        db = Database(connection_factory=connect)
+        cursor = MagicMock()
+
+        analyze = db.analyze_tables(cursor, AnalyzeTables(tables={"public.a", "public.b"}))
+
+        cursor.connection.commit.assert_called_once()
+        self.assertEqual(connect.call_count, 2)
+        self.assertEqual(set(analyze.analyzed), {"public.a", "public.b"})
+
+        skipped = db.analyze_tables(cursor, AnalyzeTables(tables={"public.c"}, budget=0))
+        self.assertEqual(skipped.skipped, ["public.c"])
+        self.assertEqual(connect.call_count, 2)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+import unittest
+
+
+def imported_modules(code: str) -> list[str]:
+    script = f"import sys\n{code}\nprint(' '.join(sorted(m for m in sys.modules if m.startswith('postnormalism'))))"
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_schema_package_imports_nothing(self):
+        self.assertEqual(imported_modules("import postnormalism.schema"), ['postnormalism', 'postnormalism.schema'])
+
+    def test_items_import_only_their_modules(self):
+        modules = imported_modules("from postnormalism.schema import View")
+        self.assertIn('postnormalism.schema.view', modules)
+        self.assertNotIn('postnormalism.schema.table', modules)
+        self.assertNotIn('postnormalism.schema.database', modules)
+
+    def test_database_doesnt_build_migration_tables_or_load_analysis(self):
+        modules = imported_modules(
+            "from postnormalism.schema import Database, migrations\n"
+            "assert 'PostnormalismMigrations' not in vars(migrations)"
+        )
+        self.assertIn('postnormalism.schema.database', modules)
+        self.assertFalse([module for module in modules if module.startswith('postnormalism.analysis.')])
+
+    def test_core_imports_no_items_or_analyses(self):
+        self.assertEqual(imported_modules("import postnormalism.core"),
+                         ['postnormalism', 'postnormalism.core', 'postnormalism.schema'])
+
+    def test_lazy_attributes(self):
+        from postnormalism import analysis, schema
+        from postnormalism.schema import migrations
+
+        self.assertEqual(migrations.PostnormalismMigrations.name, 'postnormalism_migrations')
+        self.assertIs(migrations.PostnormalismMigrations, schema.PostnormalismMigrations)
+        self.assertTrue(callable(analysis.diff_databases))
+        self.assertIn('Database', dir(schema))
+        with self.assertRaises(AttributeError):
+            schema.Missing
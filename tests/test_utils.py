@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from postnormalism.utils import (generate_project_structure, is_ignored, parse_written_tables, split_statements,
+                                 walk_project_structure)
+
+
+class TestProjectStructure(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        for path in ["schema/tables/material.sql", "schema/tables/player.sql", "schema/views/inventory.sql",
+                     "build/output.txt", "notes.log", "README.md"]:
+            full_path = os.path.join(self.folder.name, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            open(full_path, "w").close()
+        with open(os.path.join(self.folder.name, ".gitignore"), "w") as file:
+            file.write("# logs\n*.log\n/schema/views/\n")
+
+    def test_generate_project_structure(self):
+        self.assertEqual(generate_project_structure(self.folder.name), (
+            "|-- .gitignore\n"
+            "|-- README.md\n"
+            "|-- schema/\n"
+            "|   |-- tables/\n"
+            "|   |   |-- material.sql\n"
+            "|   |   |-- player.sql\n"
+        ))
+
+    def test_max_depth_summarizes_directories(self):
+        self.assertEqual(generate_project_structure(self.folder.name, max_depth=1), (
+            "|-- .gitignore\n"
+            "|-- README.md\n"
+            "|-- schema/ (2 files)\n"
+        ))
+
+    def test_walk_is_a_generator(self):
+        lines = walk_project_structure(self.folder.name, ignore_files=())
+        self.assertEqual(next(lines), "|-- .gitignore\n")
+        self.assertIn("|-- notes.log\n", list(lines))
+
+    def test_is_ignored(self):
+        patterns = ["*.log", "cache/", "/docs/*.md"]
+        self.assertTrue(is_ignored("deep/debug.log", False, patterns))
+        self.assertTrue(is_ignored("src/cache", True, patterns))
+        self.assertFalse(is_ignored("src/cache", False, patterns))
+        self.assertTrue(is_ignored("docs/index.md", False, patterns))
+        self.assertFalse(is_ignored("src/docs/index.md", False, patterns))
+
+
+class TestSplitStatements(unittest.TestCase):
+
+    def test_parse_written_tables(self):
+        sql = """
+        INSERT INTO material (id) VALUES (1) ON CONFLICT (id) DO UPDATE SET id = 1;
+        UPDATE shop.item SET name = lower(name);
+        DELETE FROM tag; -- DELETE FROM commented
+        COPY unit (id) FROM STDIN;
+        COPY report TO STDOUT;
+        SELECT * FROM queue FOR UPDATE SKIP LOCKED;
+        CREATE TRIGGER touch BEFORE UPDATE ON material FOR EACH ROW EXECUTE FUNCTION touch();
+        CREATE FUNCTION log() RETURNS void AS $$ INSERT INTO audit VALUES (1) $$ LANGUAGE sql;
+        """
+        self.assertEqual(parse_written_tables(sql), {"public.material", "shop.item", "public.tag", "public.unit"})
+
+    def test_split_statements(self):
+        sql = """
+        CREATE TABLE material (id INT);
+        INSERT INTO material VALUES (1);
+        """
+        self.assertEqual(split_statements(sql), ["CREATE TABLE material (id INT);", "INSERT INTO material VALUES (1);"])
+
+    def test_semicolons_in_quotes_and_comments(self):
+        sql = """
+        INSERT INTO note VALUES ('a;b', 'it''s;');
+        -- a comment; with a semicolon
+        SELECT "odd;name" FROM note; /* block; comment */
+        """
+        statements = split_statements(sql)
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(statements[0], "INSERT INTO note VALUES ('a;b', 'it''s;');")
+
+    def test_dollar_quoted_function_body(self):
+        sql = """
+        CREATE FUNCTION answer() RETURNS INTEGER AS $body$
+        BEGIN
+            RETURN 42;
+        END;
+        $body$ LANGUAGE plpgsql;
+        SELECT answer()
+        """
+        statements = split_statements(sql)
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[0].endswith("$body$ LANGUAGE plpgsql;"))
+        self.assertEqual(statements[1], "SELECT answer()")
+
+    def test_comment_only_script(self):
+        self.assertEqual(split_statements("-- nothing to do\n"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
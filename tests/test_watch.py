@@ -0,0 +1,109 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+from postnormalism.schema import Database, Function, Table, View
+from postnormalism.watch import hot_apply, load_database, snapshot, wait_for_changes, watch
+
+MODULE = '''
+from postnormalism.schema import Database, Table, View
+
+database = Database(load_order=[
+    Table(create="CREATE TABLE material (id INT, name TEXT);"),
+    View(create="CREATE VIEW named AS SELECT {columns} FROM material;"),
+    View(create="CREATE VIEW named_count AS SELECT count(*) FROM named;"),
+])
+'''
+
+ITEMS_MODULE = '''
+from postnormalism.schema import View
+
+named = View(create="CREATE VIEW named AS SELECT {columns} FROM material;")
+'''
+SCHEMA_MODULE = '''
+from postnormalism.schema import Database, Table
+from watched_items import named
+
+database = Database(load_order=[Table(create="CREATE TABLE material (id INT, name TEXT);"), named])
+'''
+
+
+class TestWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = os.path.join(self.folder.name, "watched_schema.py")
+        self.write("name", mtime=1_000_000)
+        sys.path.insert(0, self.folder.name)
+        self.addCleanup(sys.path.remove, self.folder.name)
+        self.addCleanup(sys.modules.pop, "watched_schema", None)
+
+    def write(self, columns, mtime, path=None, module=MODULE):
+        with open(path or self.path, "w", encoding="utf-8") as file:
+            file.write(module.format(columns=columns))
+        os.utime(path or self.path, ns=(int(mtime * 1e9), int(mtime * 1e9)))
+
+    def test_wait_for_changes(self):
+        previous = snapshot([self.folder.name])
+        self.assertEqual(wait_for_changes([self.folder.name], 0.01, previous, timeout=0.03)[0], set())
+
+        self.write("id, name", mtime=2_000_000)
+        changed, current = wait_for_changes([self.folder.name], 0.01, previous)
+        self.assertEqual(changed, {self.path})
+        self.assertNotEqual(current, previous)
+
+    def test_hot_apply_skips_tables(self):
+        old = Database(load_order=[
+            Table(create="CREATE TABLE material (id INT);"),
+            Function(create="CREATE FUNCTION answer() RETURNS INT AS $$ SELECT 41 $$ LANGUAGE sql;"),
+        ])
+        new = Database(load_order=[
+            Table(create="CREATE TABLE material (id BIGINT);"),
+            Function(create="CREATE FUNCTION answer() RETURNS INT AS $$ SELECT 42 $$ LANGUAGE sql;"),
+        ])
+        cursor = MagicMock()
+
+        applied = hot_apply(cursor, old, new)
+
+        self.assertEqual([(change.action, change.item.name) for change in applied], [('replace', 'answer')])
+        cursor.execute.assert_called_once_with(new.answer.full_sql(exists=True))
+        cursor.connection.commit.assert_called_once()
+
+    def test_watch_applies_changed_views_and_dependents(self):
+        cursor = MagicMock()
+        threading.Timer(0.05, self.write, args=("id, name", 2_000_000)).start()
+
+        database = watch("watched_schema:database", cursor, interval=0.01, iterations=1, verbose=False)
+
+        self.assertIn("SELECT id, name FROM material", database.named.create)
+        script = cursor.execute.call_args[0][0]
+        self.assertEqual(script.split("\n\n"), [
+            "DROP VIEW IF EXISTS public.named_count;",
+            "DROP VIEW IF EXISTS public.named;",
+            "CREATE VIEW named AS SELECT id, name FROM material;",
+            "CREATE VIEW named_count AS SELECT count(*) FROM named;",
+        ])
+
+    def test_watch_reloads_changed_item_modules(self):
+        items_path = os.path.join(self.folder.name, "watched_items.py")
+        self.write("name", 1_000_000, items_path, ITEMS_MODULE)
+        self.write("", 1_000_000, os.path.join(self.folder.name, "watched_project.py"), SCHEMA_MODULE)
+        self.addCleanup(sys.modules.pop, "watched_items", None)
+        self.addCleanup(sys.modules.pop, "watched_project", None)
+        cursor = MagicMock()
+        load_database("watched_project:database")  # writes the bytecode caches
+        # same size and same mtime second as before, only the source tells the edit apart from the bytecode cache
+        threading.Timer(0.05, self.write, args=("id  ", 1_000_000.5, items_path, ITEMS_MODULE)).start()
+
+        database = watch("watched_project:database", cursor, paths=[self.folder.name], interval=0.01, iterations=1,
+                         verbose=False)
+
+        self.assertIn("SELECT id   FROM material", database.named.create)
+        self.assertIn("CREATE VIEW named AS SELECT id   FROM material;", cursor.execute.call_args[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()